@@ -1,7 +1,9 @@
 from flask import Flask, render_template, request, jsonify, redirect, url_for, session, flash
-from calendar_api import get_google_auth_flow, get_credentials_from_auth_code, get_calendar_service
-from googleapiclient.discovery import build
+from calendar_api import get_google_auth_flow, get_credentials_from_auth_code, get_calendar_service, build_calendar_service, execute_request, remember_calendar_list, user_file_slug, get_selected_calendars
 from mcp_client import MCPClient
+from push_channels import AgendaCache, ChannelManager, WEBHOOK_URL
+from event_outbox import get_outbox
+from rate_limiter import get_quota_stats
 import threading
 import time
 import json
@@ -20,6 +22,13 @@ user_sessions = {}
 mcp_client = None
 mcp_client_lock = threading.Lock()
 
+# Cached agendas, invalidated by Google push notifications (enabled by CALENDAR_WEBHOOK_URL)
+agenda_cache = AgendaCache()
+channel_manager = ChannelManager(WEBHOOK_URL, agenda_cache) if WEBHOOK_URL else None
+
+# Calendars behind each cached agenda: (user_id, all_calendars) -> calendar IDs
+agenda_calendars = {}
+
 def get_mcp_client():
     """Get or create the global MCP client."""
     global mcp_client
@@ -62,6 +71,19 @@ def cleanup_mcp_client():
             mcp_client = None
             print("[FLASK] MCP client cleaned up")
 
+def watch_agenda_calendars(user_id, all_calendars):
+    """Register push channels for the calendars shown on a user's agenda."""
+    try:
+        calendar_ids = ['primary']
+        if all_calendars:
+            service = get_calendar_service(user_id)
+            if service:
+                calendar_ids = [calendar['id'] for calendar in get_selected_calendars(service)]
+        channel_manager.ensure_channels(user_id, calendar_ids)
+        agenda_calendars[(user_id, all_calendars)] = calendar_ids
+    except Exception as e:
+        print(f"[FLASK] Failed to watch calendars for {user_id}: {e}")
+
 def login_required(f):
     """Decorator to require login for routes."""
     @wraps(f)
@@ -78,9 +100,12 @@ def health_check():
         # Check if MCP client can be created
         mcp_client = get_mcp_client()
         if mcp_client:
+            # Calendar calls are made by both processes, each with its own counters
             return jsonify({
                 'status': 'healthy',
                 'mcp_client': 'available',
+                'quota': get_quota_stats(),
+                'mcp_stats': mcp_client.get_stats(),
                 'timestamp': datetime.now().isoformat()
             })
         else:
@@ -206,9 +231,9 @@ def oauth2callback():
         user_email = None
         try:
             # Use the calendar service to get user info
-            temp_service = build("calendar", "v3", credentials=creds)
+            temp_service = build_calendar_service(creds)
             # Try to get user info by making a simple API call
-            calendar_list = temp_service.calendarList().list().execute()
+            calendar_list = execute_request(temp_service.calendarList().list())
             # The primary calendar usually contains user info
             primary_calendar = None
             for calendar in calendar_list.get('items', []):
@@ -228,10 +253,13 @@ def oauth2callback():
                 return redirect(url_for('index'))
             
             # Save credentials to user-specific file
-            token_file = f"token_{user_email.replace('@', '_at_').replace('.', '_')}.json"
+            token_file = f"token_{user_file_slug(user_email)}.json"
             with open(token_file, "w") as token:
                 token.write(creds.to_json())
             
+            # Reuse the calendar list we just fetched for multi-calendar agendas
+            remember_calendar_list(user_email, calendar_list.get('items', []))
+            
             # Create user session
             user_id = user_email
             user_sessions[user_id] = {
@@ -276,6 +304,9 @@ def logout():
         user_id = session['user_id']
         if user_id in user_sessions:
             del user_sessions[user_id]
+        if channel_manager:
+            channel_manager.stop(user_id)
+        agenda_cache.mark_dirty(user_id)
         session.pop('user_id', None)
         session.pop('_fresh', None)
     
@@ -324,21 +355,26 @@ def add_event():
                     duration_minutes = data.get('duration_minutes')
                     if duration_minutes:
                         # Create event with specific duration
-                        result = mcp_client.add_calendar_event_with_duration(prompt, user_id, duration_minutes, chat_context)
+                        result = mcp_client.add_calendar_event_with_duration(prompt, user_id, duration_minutes, chat_context, data.get('request_nonce'), data.get('write_behind'))
                     else:
                         # Use MCP client to create the event
-                        result = mcp_client.add_calendar_event(prompt, user_id, chat_context)
+                        result = mcp_client.add_calendar_event(prompt, user_id, chat_context, data.get('request_nonce'), data.get('write_behind'))
         except Exception as e:
             print(f"[FLASK] MCP client error: {str(e)}")
             result = {'success': False, 'error': f'MCP client error: {str(e)}'}
         
         print(f"[FLASK] MCP result: {result}")
         
+        if result.get('success'):
+            # Our own write: don't wait for the push notification
+            agenda_cache.mark_dirty(user_id)
+        
         if result.get('needs_followup', False):
             return jsonify({
                 'success': False,
                 'needs_followup': True,
                 'followup_questions': result.get('followup_questions', []),
+                'conflicts': result.get('conflicts', []),
                 'parsed_data': result.get('parsed_data', {}),
                 'message': result.get('message', 'Please provide additional details.')
             })
@@ -351,7 +387,9 @@ def add_event():
                 'duration': result.get('duration', 'Event details in message'),
                 'location': result.get('location', 'Not specified'),
                 'description': result.get('description', ''),
-                'link': result.get('link', 'https://calendar.google.com')
+                'link': result.get('link', 'https://calendar.google.com'),
+                'queued': result.get('queued', False),
+                'job_id': result.get('job_id')
             })
         else:
             return jsonify({'success': False, 'error': result['error']})
@@ -360,12 +398,39 @@ def add_event():
         print(f"[FLASK] Error in add_event: {str(e)}")
         return jsonify({'success': False, 'error': f'Error: {str(e)}'})
 
+@app.route('/event_status/<job_id>')
+@login_required
+def event_status(job_id):
+    """Report the progress of a queued (write-behind) event insert."""
+    user_id = session['user_id']
+    # The MCP server process runs the workers; this process only reads the shared outbox
+    status = get_outbox(start_workers=False).get_status(job_id)
+    if status is None or status['user_id'] != user_id:
+        return jsonify({'success': False, 'error': 'Unknown job'}), 404
+    if status['status'] == 'done':
+        agenda_cache.mark_dirty(user_id)
+    return jsonify({'success': True, **status})
+
 @app.route('/list_events')
 @login_required
 def list_events():
     """List upcoming events using MCP server."""
     try:
         user_id = session['user_id']
+        all_calendars = request.args.get('all_calendars', os.getenv('AGENDA_ALL_CALENDARS', 'false')).lower() in ('1', 'true', 'yes')
+        max_results = 10
+        cache_key = (all_calendars, max_results)
+        
+        # Serve from cache while push channels guarantee we'd have heard about changes
+        calendar_ids = agenda_calendars.get((user_id, all_calendars))
+        watching = bool(channel_manager and calendar_ids and channel_manager.is_watching(user_id, calendar_ids))
+        if watching:
+            events = agenda_cache.get(user_id, cache_key)
+            if events is not None:
+                return jsonify({'success': True, 'events': events})
+        
+        # Read before listing: a change notified mid-fetch must keep this result out of the cache
+        generation = agenda_cache.generation(user_id)
         
         # Use persistent MCP client to list events
         try:
@@ -373,18 +438,29 @@ def list_events():
             if mcp_client is None:
                 result = {'success': False, 'error': 'Failed to start MCP server'}
             else:
-                result = mcp_client.list_upcoming_events(user_id, max_results=10)
+                result = mcp_client.list_upcoming_events(user_id, max_results=max_results, all_calendars=all_calendars)
         except Exception as e:
             print(f"[FLASK] MCP client error: {str(e)}")
             result = {'success': False, 'error': f'MCP client error: {str(e)}'}
         
         if result['success']:
+            if channel_manager:
+                agenda_cache.put(user_id, cache_key, result['events'], generation)
+                if not watching:
+                    threading.Thread(target=watch_agenda_calendars, args=(user_id, all_calendars), daemon=True).start()
             return jsonify({'success': True, 'events': result['events']})
         else:
             return jsonify({'success': False, 'error': result['error']})
     except Exception as e:
         return jsonify({'success': False, 'error': f'Error: {str(e)}'})
 
+@app.route('/calendar/notifications', methods=['POST'])
+def calendar_notifications():
+    """Receive Google Calendar push notifications (events.watch)."""
+    if not channel_manager or not channel_manager.handle_notification(request.headers):
+        return '', 404
+    return '', 204
+
 @app.route('/get_duration', methods=['POST'])
 @login_required
 def get_duration():
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for the dateparser fallback parser.
+
+Compares the original fallback, copied unchanged (dateparser.parse with
+language detection, one re.sub per time word), against parse_prompt, cold
+and with repeats.
+
+Usage: python benchmark_fallback.py [rounds]
+"""
+
+import logging
+import re
+import sys
+import time
+
+import dateparser
+
+import parsing_engine
+
+logger = logging.getLogger(__name__)
+
+PROMPTS = [
+    'team meeting tomorrow at 3pm',
+    'lunch with Sam on Friday at noon',
+    'dentist appointment next Tuesday 10am',
+    'call mom in 2 hours',
+    'project review on March 14 at 4:30pm',
+    'yoga every Monday at 7am',
+    'flight to Berlin on 2025-09-02 at 06:15',
+    'coffee today 5pm',
+    'tomorrow at 3pm',
+    'Friday noon',
+]
+
+def legacy_parse(text):
+    """The fallback as it was before the shared parser, unchanged."""
+    logger.info(f"[PARSE] Using fallback parsing for: '{text}'")
+    
+    try:
+        # Basic parsing with dateparser
+        parsed_datetime = dateparser.parse(text, settings={'PREFER_DATES_FROM': 'future'})
+        
+        if not parsed_datetime:
+            return {'success': False, 'error': 'Could not parse date/time from prompt'}
+        
+        # Extract title (remove time-related words)
+        title = text
+        time_words = ['today', 'tomorrow', 'next', 'at', 'on', 'in', 'for', 'minutes', 'hours', 'am', 'pm']
+        for word in time_words:
+            title = re.sub(rf'\b{word}\b', '', title, flags=re.IGNORECASE)
+        title = re.sub(r'\s+', ' ', title).strip()
+        
+        if not title:
+            title = 'Untitled Event'
+        
+        return {
+            'success': True,
+            'title': title,
+            'date_time': parsed_datetime,
+            'duration_minutes': None,
+            'location': None,
+            'description': '',
+            'needs_followup': True,
+            'followup_questions': ['What\'s the duration?', 'Where is this event?']
+        }
+        
+    except Exception as e:
+        logger.error(f"[ERROR] Fallback parsing failed: {e}")
+        return {'success': False, 'error': f'Failed to parse prompt: {str(e)}'}
+
+def clear_memo():
+    parsing_engine._parse_date_fragment.cache_clear()
+    parsing_engine._fallback_title.cache_clear()
+    parsing_engine.get_date_parser.cache_clear()
+
+def per_prompt_ms(parse, rounds, before_each_round=None):
+    parse(PROMPTS[0])  # warm-up: imports and locale loading aren't per-prompt cost
+    started = time.perf_counter()
+    for _ in range(rounds):
+        if before_each_round:
+            before_each_round()
+        for prompt in PROMPTS:
+            parse(prompt)
+    return (time.perf_counter() - started) * 1000 / (rounds * len(PROMPTS))
+
+def main():
+    logging.disable(logging.INFO)
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    legacy = per_prompt_ms(legacy_parse, rounds)
+    cold = per_prompt_ms(parsing_engine.parse_prompt, rounds, clear_memo)
+    warm = per_prompt_ms(parsing_engine.parse_prompt, rounds)
+    print(f"Fallback parse cost per prompt ({len(PROMPTS)} prompts x {rounds} rounds):")
+    print(f"  before (dateparser.parse, autodetect): {legacy:8.2f} ms")
+    print(f"  after, unique prompts:                 {cold:8.2f} ms  ({legacy / cold:.1f}x)")
+    print(f"  after, repeated prompts:               {warm:8.2f} ms  ({legacy / warm:.0f}x)")
+
+if __name__ == "__main__":
+    main()
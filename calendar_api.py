@@ -5,11 +5,22 @@ Core functions for Google Calendar operations.
 """
 
 import datetime
+import base64
+import hashlib
+import heapq
+import json
 import os.path
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 from datetime import timezone
+import httplib2
 import tzlocal
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
+from google_auth_httplib2 import AuthorizedHttp
 from google_auth_oauthlib.flow import InstalledAppFlow
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
@@ -20,6 +31,8 @@ import pytz
 from tzlocal import get_localzone
 from dotenv import load_dotenv
 import logging
+from rate_limiter import execute_with_retry
+from recurrence import expand_events, normalize_rrule
 
 # Load environment variables
 load_dotenv()
@@ -38,6 +51,88 @@ logger = logging.getLogger(__name__)
 # If modifying these scopes, delete the file token.pickle.
 SCOPES = ['https://www.googleapis.com/auth/calendar', 'https://www.googleapis.com/auth/calendar.readonly']
 
+# Socket timeout (seconds) for pooled Google API connections
+HTTP_TIMEOUT = int(os.getenv('GOOGLE_HTTP_TIMEOUT', '30'))
+
+# How far ahead busy intervals are prefetched for conflict checks
+CONFLICT_PREFETCH_DAYS = int(os.getenv('CONFLICT_PREFETCH_DAYS', '14'))
+BUSY_CACHE_TTL = int(os.getenv('BUSY_CACHE_TTL', '60'))
+
+# freebusy.query accepts at most this many calendars per request
+FREEBUSY_MAX_CALENDARS = 50
+
+# How long a user's calendarList stays fresh, and how many calendars are listed at once
+CALENDAR_LIST_TTL = int(os.getenv('CALENDAR_LIST_TTL', '900'))
+LIST_MAX_WORKERS = int(os.getenv('CALENDAR_LIST_WORKERS', '8'))
+
+# Fetch recurring series once and expand their instances locally instead of singleEvents=True
+LOCAL_RECURRENCE_EXPANSION = os.getenv('CALENDAR_LOCAL_EXPANSION', 'false').lower() in ('1', 'true', 'yes')
+RECURRENCE_WINDOW_DAYS = int(os.getenv('RECURRENCE_WINDOW_DAYS', '30'))
+
+# How long per-user Calendar settings (timezone, default event length) stay cached
+SETTINGS_TTL = int(os.getenv('CALENDAR_SETTINGS_TTL', '3600'))
+
+# Background pool for Calendar lookups that overlap with prompt parsing
+_background_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='calendar-bg')
+
+# Bounded pool for per-calendar listing fan-out
+_list_executor = ThreadPoolExecutor(max_workers=LIST_MAX_WORKERS, thread_name_prefix='calendar-list')
+
+# Cached calendarList per user: user_id -> (fetched_at, calendars)
+_calendar_list_cache = {}
+_calendar_list_lock = threading.Lock()
+
+# Cached Calendar settings per user: user_id -> (fetched_at, settings)
+_settings_cache = {}
+_settings_lock = threading.Lock()
+
+# Recently fetched busy windows per user: user_id -> (fetched_at, time_min, time_max, busy)
+_busy_cache = {}
+_busy_cache_lock = threading.Lock()
+
+# One keep-alive httplib2 pool per worker thread (httplib2.Http is not thread-safe)
+_thread_local = threading.local()
+
+def get_pooled_http():
+    """Get the calling thread's keep-alive HTTP transport."""
+    http = getattr(_thread_local, 'http', None)
+    if http is None:
+        http = httplib2.Http(timeout=HTTP_TIMEOUT)
+        _thread_local.http = http
+        logger.debug(f"[HTTP] Created pooled transport for thread {threading.current_thread().name}")
+    return http
+
+def get_authorized_http(creds):
+    """Attach credentials to the calling thread's pooled transport."""
+    return AuthorizedHttp(creds, http=get_pooled_http())
+
+def build_calendar_service(creds):
+    """Build a Calendar service bound to the pooled transport."""
+    return build('calendar', 'v3', http=get_authorized_http(creds), cache_discovery=False)
+
+def execute_request(request, user_id=None):
+    """Execute an API request on the calling thread's pooled connection.
+
+    Requests remember the transport of the thread that built the service, so
+    worker threads re-wrap the request credentials around their own pool.
+    Calls go through the shared quota and retry layer.
+    """
+    creds = getattr(request.http, 'credentials', None)
+
+    def call():
+        http = get_authorized_http(creds) if creds else get_pooled_http()
+        return request.execute(http=http)
+
+    return execute_with_retry(call, user_id)
+
+def user_file_slug(user_id):
+    """Filesystem-safe slug used for per-user files (tokens, cached calendar lists)."""
+    return user_id.replace('@', '_at_').replace('.', '_')
+
+def get_service_user(service):
+    """Get the user a calendar service was built for."""
+    return getattr(service, 'calendar_user_id', None)
+
 def get_google_auth_flow(redirect_uri=None):
     """Get Google OAuth flow for web application."""
     # Try to use environment variables first (for deployment)
@@ -77,7 +172,7 @@ def get_calendar_service(user_id=None):
     
     if user_id:
         # Load user-specific token file
-        token_file = f"token_{user_id.replace('@', '_at_').replace('.', '_')}.json"
+        token_file = f"token_{user_file_slug(user_id)}.json"
         if os.path.exists(token_file):
             creds = Credentials.from_authorized_user_file(token_file, SCOPES)
     
@@ -98,23 +193,103 @@ def get_calendar_service(user_id=None):
             return None
     
     try:
-        service = build('calendar', 'v3', credentials=creds)
+        service = build_calendar_service(creds)
+        service.calendar_user_id = user_id
         return service
     except Exception as e:
         logger.error(f"Error building calendar service: {e}")
         return None
 
-def create_event(service, title, start_time, duration_minutes=None, location=None, description=None):
-    """Create a calendar event with location and description."""
+@lru_cache(maxsize=None)
+def get_zone(name):
+    """Get a cached ZoneInfo, falling back to the server's zone for unknown names."""
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        logger.warning(f"[SETTINGS] Unknown timezone '{name}', using server timezone")
+        return get_localzone()
+
+def peek_user_settings(user_id):
+    """Get a user's cached Calendar settings without calling the API (None if stale)."""
+    with _settings_lock:
+        cached = _settings_cache.get(user_id)
+    if cached and time.time() - cached[0] < SETTINGS_TTL:
+        return cached[1]
+    return None
+
+def get_user_settings(service):
+    """Get the user's Calendar settings (timezone, defaultEventLength, ...), cached per user."""
+    user_id = get_service_user(service)
+    settings = peek_user_settings(user_id)
+    if settings is not None:
+        return settings
+    
+    settings = {}
+    try:
+        page_token = None
+        while True:
+            result = execute_request(service.settings().list(pageToken=page_token), user_id)
+            for item in result.get('items', []):
+                settings[item['id']] = item.get('value')
+            page_token = result.get('nextPageToken')
+            if not page_token:
+                break
+        logger.info(f"[SETTINGS] Loaded settings for {user_id} - Timezone: {settings.get('timezone')}")
+    except Exception as e:
+        # Don't cache failures; fall back to server defaults for this call only
+        logger.error(f"[SETTINGS] Error loading settings for {user_id}: {e}")
+        return {}
+    
+    with _settings_lock:
+        _settings_cache[user_id] = (time.time(), settings)
+    return settings
+
+def get_user_timezone(service):
+    """Get the user's Calendar timezone as a ZoneInfo (server timezone if unknown)."""
+    name = get_user_settings(service).get('timezone') if service else None
+    return get_zone(name) if name else get_localzone()
+
+def get_default_duration(service):
+    """Get the user's default event length in minutes."""
+    try:
+        return int(get_user_settings(service).get('defaultEventLength') or 60)
+    except (TypeError, ValueError):
+        return 60
+
+def make_event_id(user_id, title, start_time, duration_minutes=None, location=None, request_nonce=None, recurrence=None):
+    """Derive the event ID for one logical create request.
+
+    With a request_nonce, retries of the same request produce the same ID, so
+    Google rejects the duplicate insert with 409 instead of creating a second
+    event. Without one the ID is random: identical content alone doesn't mean
+    a retry (the user may want the same event twice, or re-add one they
+    deleted). IDs use the base32hex alphabet (0-9, a-v) that Calendar requires.
+    """
+    if request_nonce is None:
+        return base64.b32hexencode(os.urandom(20)).decode('ascii').rstrip('=').lower()
+    fields = [user_id, title, start_time.isoformat(), duration_minutes, location, request_nonce]
+    if recurrence:
+        fields.append(recurrence)
+    key = json.dumps(fields)
+    digest = hashlib.sha256(key.encode('utf-8')).digest()
+    return base64.b32hexencode(digest).decode('ascii').rstrip('=').lower()
+
+def create_event(service, title, start_time, duration_minutes=None, location=None, description=None, request_nonce=None, recurrence=None):
+    """Create a calendar event with location and description.
+
+    When a request_nonce is given, the event ID is derived from it, the user
+    and the event fields, which makes retrying the same request safe. A recurrence rule
+    ('RRULE:...') creates the whole series with this single insert.
+    """
     logger.info(f"[CREATE] Creating event - Title: '{title}', Start: {start_time}, Duration: {duration_minutes}, Location: '{location}', Description: '{description}'")
     
     if not service:
         logger.error("[ERROR] No calendar service available")
         return {'success': False, 'error': 'No calendar service available'}
     
-    # Convert to local timezone
-    local_tz = get_localzone()
-    start_time = start_time.replace(tzinfo=local_tz)
+    # Convert to the user's calendar timezone
+    local_tz = get_user_timezone(service)
+    start_time = _localize(start_time, local_tz)
     logger.info(f"[TIMEZONE] Timezone adjusted - Start: {start_time}, Timezone: {local_tz}")
     
     # Calculate end time
@@ -122,8 +297,9 @@ def create_event(service, title, start_time, duration_minutes=None, location=Non
         end_time = start_time + timedelta(minutes=duration_minutes)
         logger.info(f"[DURATION] Duration specified: {duration_minutes} minutes")
     else:
-        end_time = start_time + timedelta(hours=1)  # Default 1 hour
-        logger.info(f"[DURATION] Using default duration: 1 hour")
+        default_minutes = get_default_duration(service)
+        end_time = start_time + timedelta(minutes=default_minutes)
+        logger.info(f"[DURATION] Using default duration: {default_minutes} minutes")
     
     logger.info(f"[ENDTIME] Calculated end time: {end_time}")
     
@@ -149,21 +325,392 @@ def create_event(service, title, start_time, duration_minutes=None, location=Non
         event['description'] = description
         logger.info(f"[DESCRIPTION] Added description: {description}")
 
+    # Recurring series need the start timezone set above to expand correctly
+    if recurrence:
+        try:
+            recurrence = normalize_rrule(recurrence, start_time)
+        except ValueError as e:
+            logger.error(f"[ERROR] Invalid recurrence rule '{recurrence}': {e}")
+            return {'success': False, 'error': f'Invalid recurrence rule: {e}'}
+        event['recurrence'] = [recurrence]
+        logger.info(f"[RECURRENCE] Added recurrence: {recurrence}")
+
+    user_id = get_service_user(service)
+    event['id'] = make_event_id(user_id, title, start_time, duration_minutes, location, request_nonce, recurrence)
+
     try:
-        logger.info(f"[API] Sending event to Google Calendar API...")
-        created_event = service.events().insert(calendarId='primary', body=event).execute()
+        logger.info(f"[API] Sending event to Google Calendar API - ID: {event['id']}")
+        created_event = execute_request(service.events().insert(calendarId='primary', body=event), user_id)
         logger.info(f"[SUCCESS] Event created successfully: {title}")
         return {
             'success': True,
             'event': created_event,
             'link': created_event.get('htmlLink', 'https://calendar.google.com')
         }
+    except HttpError as e:
+        if e.resp.status != 409:
+            logger.error(f"[ERROR] Error creating event: {e}")
+            return {'success': False, 'error': str(e)}
+        # Already inserted by an earlier attempt of this request
+        logger.info(f"[DUPLICATE] Event {event['id']} already exists, treating insert as successful")
+        try:
+            existing = execute_request(service.events().get(calendarId='primary', eventId=event['id']), user_id)
+        except Exception as get_error:
+            logger.error(f"[ERROR] Error fetching existing event: {get_error}")
+            return {'success': False, 'error': str(get_error)}
+        if existing.get('status') == 'cancelled':
+            return {'success': False, 'error': 'This event was already created and has since been deleted.'}
+        return {
+            'success': True,
+            'event': existing,
+            'duplicate': True,
+            'link': existing.get('htmlLink', 'https://calendar.google.com')
+        }
     except Exception as e:
         logger.error(f"[ERROR] Error creating event: {e}")
         return {'success': False, 'error': str(e)}
+    finally:
+        invalidate_busy_cache(get_service_user(service))
+
+def _localize(dt, tz=None):
+    """Attach a timezone (the server's by default) to naive datetimes."""
+    if dt.tzinfo is None:
+        return dt.replace(tzinfo=tz or get_localzone())
+    return dt
+
+def _parse_rfc3339(value):
+    """Parse an RFC 3339 timestamp returned by the Calendar API."""
+    return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+def query_freebusy(service, time_min, time_max, calendar_ids=None):
+    """Run freebusy.query between two datetimes.
+
+    Returns (busy intervals, IDs of calendars whose availability couldn't be
+    read). A calendar with errors (notFound, no access to an attendee's
+    calendar) has no busy list, which is not the same as being free.
+    """
+    calendar_ids = calendar_ids or ['primary']
+    body = {
+        'timeMin': _localize(time_min).isoformat(),
+        'timeMax': _localize(time_max).isoformat(),
+        'items': [{'id': calendar_id} for calendar_id in calendar_ids],
+    }
+    result = execute_request(service.freebusy().query(body=body), get_service_user(service))
+    busy = []
+    unavailable = []
+    for calendar_id, calendar in result.get('calendars', {}).items():
+        if calendar.get('errors'):
+            logger.warning(f"[FREEBUSY] Errors for calendar {calendar_id}: {calendar['errors']}")
+            unavailable.append(calendar_id)
+        for interval in calendar.get('busy', []):
+            busy.append((_parse_rfc3339(interval['start']), _parse_rfc3339(interval['end'])))
+    busy.sort()
+    return busy, unavailable
+
+def query_busy_intervals(service, time_min, time_max, calendar_ids=None):
+    """Fetch busy intervals between two datetimes with freebusy.query."""
+    return query_freebusy(service, time_min, time_max, calendar_ids)[0]
+
+def query_busy_intervals_many(service, calendar_ids, time_min, time_max):
+    """Fetch busy intervals for many calendars, one parallel freebusy call per chunk.
+
+    Returns (busy intervals, IDs of calendars that couldn't be read).
+    """
+    chunks = [calendar_ids[i:i + FREEBUSY_MAX_CALENDARS] for i in range(0, len(calendar_ids), FREEBUSY_MAX_CALENDARS)]
+    logger.info(f"[FREEBUSY] Querying {len(calendar_ids)} calendar(s) in {len(chunks)} parallel request(s)")
+    futures = [
+        _background_executor.submit(query_freebusy, service, time_min, time_max, chunk)
+        for chunk in chunks
+    ]
+    busy = []
+    unavailable = []
+    for future in futures:
+        chunk_busy, chunk_unavailable = future.result()
+        busy.extend(chunk_busy)
+        unavailable.extend(chunk_unavailable)
+    return busy, unavailable
+
+def get_busy_intervals(service, time_min, time_max):
+    """Get busy intervals, served from the local cache when it covers the window."""
+    user_id = get_service_user(service)
+    time_min, time_max = _localize(time_min), _localize(time_max)
+    with _busy_cache_lock:
+        cached = _busy_cache.get(user_id)
+    if cached:
+        fetched_at, cached_min, cached_max, busy = cached
+        if time.monotonic() - fetched_at < BUSY_CACHE_TTL and cached_min <= time_min and time_max <= cached_max:
+            logger.debug(f"[FREEBUSY] Cache hit for user {user_id}")
+            return busy
+    busy = query_busy_intervals(service, time_min, time_max)
+    with _busy_cache_lock:
+        _busy_cache[user_id] = (time.monotonic(), time_min, time_max, busy)
+    return busy
+
+def invalidate_busy_cache(user_id):
+    """Drop cached busy intervals for a user after their calendar changes."""
+    with _busy_cache_lock:
+        _busy_cache.pop(user_id, None)
+
+def start_conflict_prefetch(service, days=CONFLICT_PREFETCH_DAYS):
+    """Start fetching the user's busy intervals in the background.
+
+    Runs while the prompt is still being parsed, so the conflict check after
+    parsing is a local lookup instead of another API round trip.
+    """
+    time_min = datetime.now(get_user_timezone(service))
+    time_max = time_min + timedelta(days=days)
+    future = _background_executor.submit(get_busy_intervals, service, time_min, time_max)
+    future.window = (time_min, time_max)
+    return future
+
+def peek_user_timezone(user_id):
+    """Get a user's timezone from cached settings without calling the API (None if unknown)."""
+    settings = peek_user_settings(user_id)
+    name = settings.get('timezone') if settings else None
+    return get_zone(name) if name else None
+
+def start_calendar_stage(user_id):
+    """Resolve the user's Calendar service in the background and start the busy prefetch.
+
+    Returns a future of (service, busy_prefetch), or (None, None) when the
+    user needs to log in. Lets the add flow parse the prompt meanwhile.
+    """
+    def stage():
+        service = get_calendar_service(user_id)
+        if not service:
+            return None, None
+        return service, start_conflict_prefetch(service)
+    return _background_executor.submit(stage)
+
+def find_conflicts(busy_intervals, start_time, end_time):
+    """Return the busy intervals that overlap [start_time, end_time)."""
+    start_time, end_time = _localize(start_time), _localize(end_time)
+    return [(start, end) for start, end in busy_intervals if start < end_time and start_time < end]
+
+def check_conflicts(service, start_time, duration_minutes=None, prefetch=None):
+    """Check a parsed slot against the user's calendar.
+
+    Uses the prefetched busy window when it covers the slot and falls back to a
+    direct freebusy query otherwise. Returns conflicts as ISO strings in the
+    user's Calendar timezone (freebusy answers in UTC).
+    """
+    user_tz = get_user_timezone(service)
+    start_time = _localize(start_time, user_tz)
+    end_time = start_time + timedelta(minutes=duration_minutes or get_default_duration(service))
+    try:
+        busy = None
+        if prefetch is not None:
+            window_min, window_max = prefetch.window
+            if window_min <= start_time and end_time <= window_max:
+                busy = prefetch.result()
+        if busy is None:
+            busy = get_busy_intervals(service, start_time, end_time)
+        conflicts = find_conflicts(busy, start_time, end_time)
+    except Exception as e:
+        logger.error(f"[FREEBUSY] Conflict check failed: {e}")
+        return []
+    if conflicts:
+        logger.info(f"[FREEBUSY] Found {len(conflicts)} conflict(s) for slot {start_time} - {end_time}")
+    return [{'start': start.astimezone(user_tz).isoformat(), 'end': end.astimezone(user_tz).isoformat()} for start, end in conflicts]
+
+def _selected_calendars(items):
+    """Reduce calendarList items to the calendars the user shows in Google Calendar."""
+    return [
+        {'id': item['id'], 'summary': item.get('summaryOverride', item.get('summary', item['id'])), 'primary': item.get('primary', False)}
+        for item in items
+        if item.get('selected') or item.get('primary')
+    ]
+
+def remember_calendar_list(user_id, items):
+    """Cache a user's calendarList, e.g. the one fetched during login.
+
+    The snapshot is also written next to the user's token so the MCP server
+    process can reuse it without another API call.
+    """
+    calendars = _selected_calendars(items)
+    with _calendar_list_lock:
+        _calendar_list_cache[user_id] = (time.time(), calendars)
+    try:
+        with open(f"calendars_{user_file_slug(user_id)}.json", "w") as f:
+            json.dump(calendars, f)
+    except OSError as e:
+        logger.warning(f"[CALENDARS] Could not save calendar list for {user_id}: {e}")
+    return calendars
+
+def get_selected_calendars(service):
+    """Get the user's selected calendars from memory, the login snapshot, or the API."""
+    user_id = get_service_user(service)
+    with _calendar_list_lock:
+        cached = _calendar_list_cache.get(user_id)
+    if cached and time.time() - cached[0] < CALENDAR_LIST_TTL:
+        return cached[1]
+    
+    if user_id:
+        snapshot = f"calendars_{user_file_slug(user_id)}.json"
+        try:
+            fetched_at = os.path.getmtime(snapshot)
+            if time.time() - fetched_at < CALENDAR_LIST_TTL:
+                with open(snapshot) as f:
+                    calendars = json.load(f)
+                with _calendar_list_lock:
+                    _calendar_list_cache[user_id] = (fetched_at, calendars)
+                return calendars
+        except (OSError, ValueError):
+            pass
+    
+    items = []
+    page_token = None
+    while True:
+        result = execute_request(service.calendarList().list(pageToken=page_token), user_id)
+        items.extend(result.get('items', []))
+        page_token = result.get('nextPageToken')
+        if not page_token:
+            break
+    logger.info(f"[CALENDARS] Fetched {len(items)} calendars for {user_id}")
+    return remember_calendar_list(user_id, items) if user_id else _selected_calendars(items)
+
+def _event_start(event, tz):
+    """Sortable start time of an API event (all-day events start at midnight in tz)."""
+    start = event["start"]
+    if "dateTime" in start:
+        return _parse_rfc3339(start["dateTime"])
+    return datetime.fromisoformat(start["date"]).replace(tzinfo=tz)
 
-def list_upcoming_events(service, max_results=10):
-    """List upcoming events from the calendar."""
+def _event_end(event, tz):
+    """End time of an API event (all-day events end at midnight in tz)."""
+    end = event["end"]
+    if "dateTime" in end:
+        return _parse_rfc3339(end["dateTime"])
+    return datetime.fromisoformat(end["date"]).replace(tzinfo=tz)
+
+def _format_event(event):
+    """Format an API event for display."""
+    start = event["start"].get("dateTime", event["start"].get("date"))
+    summary = event.get("summary", "No title")
+    link = event.get("htmlLink", "")
+    
+    # Format the start time
+    try:
+        if "T" in start:  # Has time
+            start_dt = datetime.fromisoformat(start.replace("Z", "+00:00"))
+            formatted_start = start_dt.strftime("%B %d, %Y at %I:%M %p")
+        else:  # Date only
+            start_dt = datetime.fromisoformat(start)
+            formatted_start = start_dt.strftime("%B %d, %Y")
+    except:
+        formatted_start = start
+    
+    return {
+        "summary": summary,
+        "start_time": formatted_start,
+        "link": link
+    }
+
+def _list_calendar_events(service, calendar_id, time_min, max_results):
+    """List one calendar's upcoming events, sorted by start time."""
+    events_result = execute_request(
+        service.events()
+        .list(
+            calendarId=calendar_id,
+            timeMin=time_min,
+            maxResults=max_results,
+            singleEvents=True,
+            orderBy="startTime",
+        ),
+        get_service_user(service)
+    )
+    return events_result.get("items", [])
+
+def _list_series_instances(service, calendar_id, master, window_start, window_end):
+    """The API's own expansion of one series, for rules that can't be expanded locally."""
+    items = []
+    page_token = None
+    try:
+        while True:
+            page = execute_request(
+                service.events().instances(
+                    calendarId=calendar_id,
+                    eventId=master['id'],
+                    timeMin=window_start.isoformat(),
+                    timeMax=window_end.isoformat(),
+                    maxResults=250,
+                    pageToken=page_token,
+                ),
+                get_service_user(service)
+            )
+            items.extend(page.get("items", []))
+            page_token = page.get("nextPageToken")
+            if not page_token:
+                return items
+    except Exception as e:
+        logger.error(f"[RECURRENCE] Error listing instances of {master['id']}: {e}")
+        return []
+
+def _list_calendar_series(service, calendar_id, time_min, max_results):
+    """List one calendar's upcoming events, expanding recurring series locally.
+
+    Masters come back once with their RRULEs instead of once per instance, so
+    the whole window is paged in and max_results is applied after expansion.
+    Cancelled and modified instances arrive as exceptions (showDeleted=True).
+    Events past the window are listed with singleEvents, as without expansion.
+    """
+    now = _parse_rfc3339(time_min)
+    tz = get_user_timezone(service)
+    # Day-aligned window so expansions stay cached across calls on the same day
+    window_start = now.astimezone(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    window_end = window_start + timedelta(days=RECURRENCE_WINDOW_DAYS)
+    items = []
+    page_token = None
+    while True:
+        page = execute_request(
+            service.events().list(
+                calendarId=calendar_id,
+                timeMin=window_start.isoformat(),
+                timeMax=window_end.isoformat(),
+                singleEvents=False,
+                showDeleted=True,
+                maxResults=250,
+                pageToken=page_token,
+            ),
+            get_service_user(service)
+        )
+        items.extend(page.get("items", []))
+        page_token = page.get("nextPageToken")
+        if not page_token:
+            break
+    events = expand_events(
+        items, window_start, window_end, tz,
+        list_instances=lambda master: _list_series_instances(service, calendar_id, master, window_start, window_end)
+    )
+    upcoming = [event for event in events if _event_end(event, tz) > now]
+    logger.info(f"[RECURRENCE] Expanded {len(items)} items into {len(events)} instances for {calendar_id}")
+    if len(upcoming) < max_results:
+        # Fill up with what comes after the window; events overlapping its end are already listed
+        listed = {event['id'] for event in upcoming}
+        later = _list_calendar_events(service, calendar_id, window_end.isoformat(), max_results)
+        upcoming.extend(event for event in later if event['id'] not in listed)
+    return upcoming[:max_results]
+
+def _merge_calendar_streams(streams, max_results, tz):
+    """K-way merge per-calendar event streams (each sorted by start) with a heap.
+
+    Events shared between calendars (e.g. invitations) are emitted once.
+    All-day events are placed at midnight in tz, the user's Calendar timezone.
+    """
+    seen = set()
+    merged = []
+    for calendar, event in heapq.merge(*streams, key=lambda pair: _event_start(pair[1], tz)):
+        key = (event.get("iCalUID", event.get("id")), _event_start(event, tz))
+        if key in seen:
+            continue
+        seen.add(key)
+        merged.append((calendar, event))
+        if len(merged) >= max_results:
+            break
+    return merged
+
+def list_upcoming_events(service, max_results=10, all_calendars=False, expand_locally=LOCAL_RECURRENCE_EXPANSION):
+    """List upcoming events from the primary calendar, or from all selected calendars."""
     if not service:
         logger.error("No calendar service available")
         return []
@@ -171,45 +718,34 @@ def list_upcoming_events(service, max_results=10):
     try:
         # Call the Calendar API
         now = datetime.utcnow().isoformat() + "Z"
+        list_events = _list_calendar_series if expand_locally else _list_calendar_events
         
-        events_result = (
-            service.events()
-            .list(
-                calendarId="primary",
-                timeMin=now,
-                maxResults=max_results,
-                singleEvents=True,
-                orderBy="startTime",
-            )
-            .execute()
-        )
-        events = events_result.get("items", [])
-
-        formatted_events = []
-        for event in events:
-            start = event["start"].get("dateTime", event["start"].get("date"))
-            summary = event.get("summary", "No title")
-            link = event.get("htmlLink", "")
-            
-            # Format the start time
+        if not all_calendars:
+            events = list_events(service, "primary", now, max_results)
+            return [_format_event(event) for event in events]
+        
+        # Fan out over the user's calendars; each needs at most max_results events
+        calendars = get_selected_calendars(service)
+        futures = [
+            _list_executor.submit(list_events, service, calendar['id'], now, max_results)
+            for calendar in calendars
+        ]
+        streams = []
+        for calendar, future in zip(calendars, futures):
             try:
-                if "T" in start:  # Has time
-                    start_dt = datetime.fromisoformat(start.replace("Z", "+00:00"))
-                    formatted_start = start_dt.strftime("%B %d, %Y at %I:%M %p")
-                else:  # Date only
-                    start_dt = datetime.fromisoformat(start)
-                    formatted_start = start_dt.strftime("%B %d, %Y")
-            except:
-                formatted_start = start
-                
-            formatted_events.append({
-                "summary": summary,
-                "start_time": formatted_start,
-                "link": link
-            })
+                streams.append([(calendar, event) for event in future.result()])
+            except Exception as e:
+                logger.error(f"Error listing calendar {calendar['id']}: {e}")
         
+        formatted_events = []
+        for calendar, event in _merge_calendar_streams(streams, max_results, get_user_timezone(service)):
+            formatted = _format_event(event)
+            formatted["calendar"] = calendar['summary']
+            formatted_events.append(formatted)
+        
+        logger.info(f"[CALENDARS] Merged {len(formatted_events)} events from {len(streams)} calendars")
         return formatted_events
         
     except Exception as e:
         logger.error(f"Error listing events: {e}")
-        return [] 
\ No newline at end of file
+        return []
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Circuit Breaker Module
+Latency- and error-aware circuit breaker for calls to slow upstream services.
+"""
+
+import logging
+import math
+import os
+import threading
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+# Thresholds for the OpenAI parser breaker
+BREAKER_WINDOW_SECONDS = float(os.getenv('LLM_BREAKER_WINDOW', '60'))
+BREAKER_MIN_SAMPLES = int(os.getenv('LLM_BREAKER_MIN_SAMPLES', '5'))
+BREAKER_P95_SECONDS = float(os.getenv('LLM_BREAKER_P95', '8'))
+BREAKER_ERROR_RATE = float(os.getenv('LLM_BREAKER_ERROR_RATE', '0.5'))
+BREAKER_OPEN_SECONDS = float(os.getenv('LLM_BREAKER_OPEN_SECONDS', '30'))
+
+CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list (None when empty)."""
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, max(math.ceil(fraction * len(sorted_values)) - 1, 0))]
+
+class LatencyWindow:
+    """Rolling window of (when, latency, ok) samples over the last window_seconds."""
+
+    def __init__(self, window_seconds, clock=time.monotonic):
+        self.window_seconds = window_seconds
+        self.clock = clock
+        self.samples = deque()
+        self.lock = threading.Lock()
+
+    def add(self, latency, ok=True):
+        with self.lock:
+            self.samples.append((self.clock(), latency, ok))
+            self._trim()
+
+    def clear(self):
+        with self.lock:
+            self.samples.clear()
+
+    def _trim(self):
+        horizon = self.clock() - self.window_seconds
+        while self.samples and self.samples[0][0] < horizon:
+            self.samples.popleft()
+
+    def snapshot(self):
+        """Return (count, error_rate) plus the sorted latencies of the window."""
+        with self.lock:
+            self._trim()
+            samples = list(self.samples)
+        if not samples:
+            return 0, 0.0, []
+        errors = sum(1 for _, _, ok in samples if not ok)
+        return len(samples), errors / len(samples), sorted(latency for _, latency, _ in samples)
+
+    def percentile(self, fraction):
+        """Latency at the given fraction (0.95 for p95), or None without samples."""
+        return percentile(self.snapshot()[2], fraction)
+
+class CircuitBreaker:
+    """Opens when rolling p95 latency or error rate crosses its threshold.
+
+    While open, allow() is False and callers use their local fallback. After
+    open_seconds a single probe request is let through; a fast, successful
+    probe closes the breaker, anything else keeps it open for another period.
+    """
+
+    def __init__(self, name, window_seconds=BREAKER_WINDOW_SECONDS, min_samples=BREAKER_MIN_SAMPLES,
+                 p95_seconds=BREAKER_P95_SECONDS, error_rate=BREAKER_ERROR_RATE,
+                 open_seconds=BREAKER_OPEN_SECONDS, clock=time.monotonic):
+        self.name = name
+        self.min_samples = min_samples
+        self.p95_seconds = p95_seconds
+        self.error_rate = error_rate
+        self.open_seconds = open_seconds
+        self.clock = clock
+        self.window = LatencyWindow(window_seconds, clock)
+        self.state = CLOSED
+        self.open_until = 0.0
+        self.probe_in_flight = False
+        self.lock = threading.Lock()
+        self.stats = {'opened': 0, 'short_circuited': 0, 'probes': 0}
+
+    def allow(self):
+        """Whether the next call may go upstream; in half-open state only one probe at a time does."""
+        with self.lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and self.clock() >= self.open_until:
+                self.state = HALF_OPEN
+            if self.state == HALF_OPEN and not self.probe_in_flight:
+                self.probe_in_flight = True
+                self.stats['probes'] += 1
+                logger.info(f"[BREAKER] {self.name}: sending probe request")
+                return True
+            self.stats['short_circuited'] += 1
+            return False
+
+    def record(self, latency, ok=True):
+        """Report how an allowed call went."""
+        with self.lock:
+            if self.state == HALF_OPEN and self.probe_in_flight:
+                self.probe_in_flight = False
+                if ok and latency <= self.p95_seconds:
+                    self.state = CLOSED
+                    self.window.clear()
+                    logger.info(f"[BREAKER] {self.name}: probe took {latency:.2f}s, closing")
+                else:
+                    self._open(f"probe {'took %.2fs' % latency if ok else 'failed'}")
+                return
+        self.window.add(latency, ok)
+        count, error_rate, latencies = self.window.snapshot()
+        if count < self.min_samples:
+            return
+        p95 = percentile(latencies, 0.95)
+        if p95 > self.p95_seconds or error_rate > self.error_rate:
+            with self.lock:
+                if self.state == CLOSED:
+                    self._open(f"p95 {p95:.2f}s, error rate {error_rate:.0%} over {count} calls")
+
+    def cancel(self):
+        """Report that an allowed call never reached upstream; frees the probe slot if it held it."""
+        with self.lock:
+            self.probe_in_flight = False
+
+    def _open(self, reason):
+        self.state = OPEN
+        self.open_until = self.clock() + self.open_seconds
+        self.stats['opened'] += 1
+        logger.warning(f"[BREAKER] {self.name}: opening for {self.open_seconds:.0f}s ({reason})")
+
+    def get_stats(self):
+        count, error_rate, latencies = self.window.snapshot()
+        with self.lock:
+            stats = dict(self.stats, state=self.state)
+        stats.update(samples=count, error_rate=error_rate, p95=percentile(latencies, 0.95))
+        return stats
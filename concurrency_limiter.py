@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Concurrency Limiter Module
+AIMD adaptive concurrency limit with a fair, bounded wait queue.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Concurrent OpenAI calls: start, floor and ceiling of the adaptive limit
+LLM_INITIAL_CONCURRENCY = float(os.getenv('LLM_INITIAL_CONCURRENCY', '8'))
+LLM_MIN_CONCURRENCY = float(os.getenv('LLM_MIN_CONCURRENCY', '1'))
+LLM_MAX_CONCURRENCY = float(os.getenv('LLM_MAX_CONCURRENCY', '32'))
+# Multiplier applied on 429s and timeouts
+LLM_BACKOFF_RATIO = float(os.getenv('LLM_BACKOFF_RATIO', '0.5'))
+# Longest a call waits for a slot before the caller gives up
+LLM_QUEUE_MAX_WAIT = float(os.getenv('LLM_QUEUE_MAX_WAIT', '5'))
+
+class LimiterTimeout(Exception):
+    """No slot became free within the queue's max wait."""
+
+class AdaptiveLimiter:
+    """Concurrency limit that grows by one per limit's worth of successes and halves on overload.
+
+    Callers over the limit wait in per-user FIFO queues that are served
+    round-robin, so one user's burst can't starve everyone else.
+    """
+
+    def __init__(self, name, is_overload, initial=LLM_INITIAL_CONCURRENCY, min_limit=LLM_MIN_CONCURRENCY,
+                 max_limit=LLM_MAX_CONCURRENCY, backoff=LLM_BACKOFF_RATIO, max_wait=LLM_QUEUE_MAX_WAIT,
+                 decrease_cooldown=1.0):
+        self.name = name
+        self.is_overload = is_overload
+        self.limit = initial
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff = backoff
+        self.max_wait = max_wait
+        self.decrease_cooldown = decrease_cooldown
+        self.in_flight = 0
+        self.queues = {}
+        self.turns = deque()
+        self.granted = set()
+        self.last_decrease = 0.0
+        self.cond = threading.Condition()
+        self.stats = {'acquired': 0, 'queued': 0, 'timeouts': 0, 'overloads': 0, 'decreases': 0, 'max_queue_depth': 0}
+
+    def _dispatch(self):
+        """Hand free slots to waiting callers, one user at a time."""
+        while self.turns and self.in_flight < int(self.limit):
+            user = self.turns.popleft()
+            self.granted.add(self.queues[user].popleft())
+            self.in_flight += 1
+            if self.queues[user]:
+                self.turns.append(user)
+            else:
+                del self.queues[user]
+        self.cond.notify_all()
+
+    def _queue_depth(self):
+        return sum(len(queue) for queue in self.queues.values())
+
+    def acquire(self, user_id=None):
+        """Take a slot, waiting up to max_wait; raises LimiterTimeout."""
+        with self.cond:
+            if not self.turns and self.in_flight < int(self.limit):
+                self.in_flight += 1
+                self.stats['acquired'] += 1
+                return
+            ticket = object()
+            if user_id not in self.queues:
+                self.queues[user_id] = deque()
+                self.turns.append(user_id)
+            self.queues[user_id].append(ticket)
+            self.stats['queued'] += 1
+            self.stats['max_queue_depth'] = max(self.stats['max_queue_depth'], self._queue_depth())
+            deadline = time.monotonic() + self.max_wait
+            while ticket not in self.granted:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.queues[user_id].remove(ticket)
+                    if not self.queues[user_id]:
+                        del self.queues[user_id]
+                        self.turns.remove(user_id)
+                    self.stats['timeouts'] += 1
+                    raise LimiterTimeout(f"{self.name}: no slot free after {self.max_wait:.1f}s ({self.in_flight} in flight, limit {int(self.limit)})")
+                self.cond.wait(remaining)
+            self.granted.remove(ticket)
+            self.stats['acquired'] += 1
+
+    def release(self, outcome='ok'):
+        """Free a slot and adapt the limit: additive increase on 'ok', multiplicative decrease on 'overload'.
+
+        Other failures ('error') leave the limit alone.
+        """
+        with self.cond:
+            self.in_flight -= 1
+            now = time.monotonic()
+            if outcome == 'overload':
+                self.stats['overloads'] += 1
+                # One burst of 429s is one congestion signal, not one per failed call
+                if now - self.last_decrease >= self.decrease_cooldown:
+                    self.limit = max(self.min_limit, self.limit * self.backoff)
+                    self.last_decrease = now
+                    self.stats['decreases'] += 1
+                    logger.warning(f"[LIMITER] {self.name}: overload, limit down to {int(self.limit)}")
+            elif outcome == 'ok':
+                self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+            self._dispatch()
+
+    @contextmanager
+    def slot(self, user_id=None):
+        """Hold a slot for the duration of the block; overload errors shrink the limit."""
+        self.acquire(user_id)
+        outcome = 'ok'
+        try:
+            yield
+        except BaseException as e:
+            outcome = 'overload' if self.is_overload(e) else 'error'
+            raise
+        finally:
+            self.release(outcome)
+
+    def get_stats(self):
+        """Gauges (limit, in flight, queue depth) plus counters."""
+        with self.cond:
+            return dict(self.stats, limit=int(self.limit), in_flight=self.in_flight,
+                        queue_depth=self._queue_depth(), waiting_users=len(self.queues))
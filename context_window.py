@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Context Window Module
+Keeps the chat context sent to OpenAI within a token budget.
+"""
+
+import logging
+import math
+import os
+
+try:
+    import tiktoken
+except ImportError:  # optional; the estimator below is close enough for budgeting
+    tiktoken = None
+
+from fast_parser import fast_parse
+
+logger = logging.getLogger(__name__)
+
+CONTEXT_TOKEN_BUDGET = int(os.getenv('CONTEXT_TOKEN_BUDGET', '600'))
+CONTEXT_RECENT_TURNS = int(os.getenv('CONTEXT_RECENT_TURNS', '4'))
+
+# Chat format overhead per message (role, separators)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+_encoding = None
+
+def estimate_tokens(text):
+    """Count tokens with tiktoken when installed, otherwise estimate (~4 chars or 0.75 words per token)."""
+    global _encoding
+    if tiktoken is not None:
+        if _encoding is None:
+            _encoding = tiktoken.get_encoding('cl100k_base')
+        return len(_encoding.encode(text))
+    return max(math.ceil(len(text) / 4), math.ceil(len(text.split()) * 4 / 3))
+
+def message_tokens(message):
+    return estimate_tokens(message['content']) + MESSAGE_OVERHEAD_TOKENS
+
+def _truncate(text, budget):
+    """Cut text down to roughly budget tokens, keeping the end (the latest details)."""
+    while text and estimate_tokens(text) > budget:
+        text = text[len(text) // 4 or 1:]
+    return text
+
+def summarize_turns(turns, current_time=None):
+    """Collapse older turns into one line of the event fields the user gave so far.
+
+    Relative dates ("tomorrow") resolve from current_time, the user's now.
+    """
+    fields = {}
+    for turn in turns:
+        if turn['role'] != 'user':
+            continue
+        parsed = fast_parse(turn['content'], current_time)
+        if parsed.get('success'):
+            for key in ('title', 'duration_minutes', 'location', 'recurrence'):
+                if parsed.get(key):
+                    fields[key] = parsed[key]
+            fields['date_time'] = parsed['date_time'].strftime('%Y-%m-%d %H:%M')
+        fields['last request'] = turn['content']
+    if not fields:
+        return None
+    details = '; '.join(f"{key.replace('_', ' ')}: {value}" for key, value in fields.items())
+    return f"Summary of {len(turns)} earlier messages - {details}"
+
+def fit_context(chat_context, prompt=None, budget=CONTEXT_TOKEN_BUDGET, recent_turns=CONTEXT_RECENT_TURNS, current_time=None):
+    """Return chat context that fits the token budget.
+
+    The newest turns are kept verbatim; older ones become a single summary
+    message. A trailing user turn repeating the current prompt is dropped,
+    since the prompt is sent on its own anyway.
+    """
+    turns = [
+        {'role': turn['role'], 'content': turn['content']}
+        for turn in chat_context or []
+        if isinstance(turn, dict) and turn.get('role') in ('user', 'assistant') and isinstance(turn.get('content'), str)
+    ]
+    if turns and prompt is not None and turns[-1]['role'] == 'user' and turns[-1]['content'].strip() == prompt.strip():
+        turns.pop()
+    if not turns:
+        return []
+
+    kept = []
+    used = 0
+    for turn in reversed(turns[-recent_turns:]):
+        cost = message_tokens(turn)
+        if used + cost > budget:
+            if not kept:
+                # Even the newest turn is too long: keep its tail
+                turn = {'role': turn['role'], 'content': _truncate(turn['content'], budget - MESSAGE_OVERHEAD_TOKENS)}
+                kept.append(turn)
+                used += message_tokens(turn)
+            break
+        kept.append(turn)
+        used += cost
+    kept.reverse()
+
+    older = turns[:len(turns) - len(kept)]
+    summary = summarize_turns(older, current_time) if older else None
+    if summary and budget - used > MESSAGE_OVERHEAD_TOKENS:
+        summary = _truncate(summary, budget - used - MESSAGE_OVERHEAD_TOKENS)
+        if summary:
+            kept.insert(0, {'role': 'system', 'content': summary})
+
+    total = sum(message_tokens(turn) for turn in turns)
+    if len(kept) != len(turns) or older:
+        logger.info(f"[CONTEXT] Trimmed chat context from {len(turns)} turns (~{total} tokens) to {len(kept)} (~{sum(message_tokens(t) for t in kept)} tokens)")
+    return kept
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Event Outbox Module
+Durable SQLite write-behind queue for Google Calendar event inserts.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import closing
+from datetime import datetime
+
+from calendar_api import get_calendar_service, create_event
+from rate_limiter import backoff_delay
+
+logger = logging.getLogger(__name__)
+
+# Queue inserts instead of making the caller wait for Google (per-request override allowed)
+WRITE_BEHIND = os.getenv('EVENT_WRITE_BEHIND', 'false').lower() in ('1', 'true', 'yes')
+
+OUTBOX_DB = os.getenv('EVENT_OUTBOX_DB', 'event_outbox.db')
+OUTBOX_WORKERS = int(os.getenv('EVENT_OUTBOX_WORKERS', '2'))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv('EVENT_OUTBOX_MAX_ATTEMPTS', '8'))
+OUTBOX_POLL_SECONDS = float(os.getenv('EVENT_OUTBOX_POLL_SECONDS', '1'))
+
+# A running job whose worker died is picked up again after its lease expires
+LEASE_SECONDS = 120
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS event_jobs (
+    id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    lease_until REAL,
+    result TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_event_jobs_due ON event_jobs (status, next_attempt_at);
+"""
+
+class EventOutbox:
+    """SQLite outbox: jobs are pending -> running -> done | failed."""
+
+    def __init__(self, path=OUTBOX_DB, service_factory=get_calendar_service, max_attempts=OUTBOX_MAX_ATTEMPTS,
+                 insert_event=create_event):
+        self.path = path
+        self.service_factory = service_factory
+        self.insert_event = insert_event
+        self.max_attempts = max_attempts
+        self.wakeup = threading.Event()
+        self.workers = []
+        with closing(self._connect()) as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA journal_mode=WAL')
+        return conn
+
+    def enqueue(self, user_id, title, start_time, duration_minutes=None, location=None, description=None, request_nonce=None, recurrence=None):
+        """Persist an insert and return its job ID."""
+        job_id = uuid.uuid4().hex
+        payload = {
+            'title': title,
+            'start_time': start_time.isoformat(),
+            'duration_minutes': duration_minutes,
+            'location': location,
+            'description': description,
+            'recurrence': recurrence,
+            # Replays reuse the nonce, so the deterministic event ID prevents duplicates
+            'request_nonce': request_nonce or job_id,
+        }
+        now = time.time()
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "INSERT INTO event_jobs (id, user_id, payload, status, next_attempt_at, created_at, updated_at) "
+                "VALUES (?, ?, ?, 'pending', ?, ?, ?)",
+                (job_id, user_id, json.dumps(payload), now, now, now)
+            )
+        logger.info(f"[OUTBOX] Queued job {job_id} for {user_id}: '{title}'")
+        self.wakeup.set()
+        return job_id
+
+    def get_status(self, job_id):
+        """Get a job's status, or None if unknown."""
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT * FROM event_jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        return {
+            'job_id': row['id'],
+            'user_id': row['user_id'],
+            'status': row['status'],
+            'attempts': row['attempts'],
+            'result': json.loads(row['result']) if row['result'] else None,
+            'error': row['error'],
+        }
+
+    def claim_next(self):
+        """Atomically lease the next due job (including jobs abandoned by a dead worker)."""
+        now = time.time()
+        with closing(self._connect()) as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                row = conn.execute(
+                    "SELECT * FROM event_jobs "
+                    "WHERE (status = 'pending' AND next_attempt_at <= ?) OR (status = 'running' AND lease_until < ?) "
+                    "ORDER BY next_attempt_at LIMIT 1",
+                    (now, now)
+                ).fetchone()
+                if row is not None:
+                    conn.execute(
+                        "UPDATE event_jobs SET status = 'running', attempts = attempts + 1, lease_until = ?, updated_at = ? WHERE id = ?",
+                        (now + LEASE_SECONDS, now, row['id'])
+                    )
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+        return row
+
+    def _finish(self, job_id, status, result=None, error=None, next_attempt_at=None):
+        now = time.time()
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "UPDATE event_jobs SET status = ?, result = ?, error = ?, next_attempt_at = COALESCE(?, next_attempt_at), "
+                "lease_until = NULL, updated_at = ? WHERE id = ?",
+                (status, json.dumps(result) if result else None, error, next_attempt_at, now, job_id)
+            )
+
+    def process(self, row):
+        """Run one leased job: insert the event, or schedule a retry."""
+        job_id = row['id']
+        attempts = row['attempts'] + 1
+        payload = json.loads(row['payload'])
+        service = self.service_factory(row['user_id'])
+        if service:
+            result = self.insert_event(
+                service=service,
+                title=payload['title'],
+                start_time=datetime.fromisoformat(payload['start_time']),
+                duration_minutes=payload.get('duration_minutes'),
+                location=payload.get('location'),
+                description=payload.get('description'),
+                request_nonce=payload['request_nonce'],
+                recurrence=payload.get('recurrence')
+            )
+        else:
+            result = {'success': False, 'error': 'Authentication required. Please login first.'}
+
+        if result['success']:
+            logger.info(f"[OUTBOX] Job {job_id} done after {attempts} attempt(s)")
+            self._finish(job_id, 'done', result={'link': result.get('link'), 'event_id': result['event'].get('id')})
+        elif attempts >= self.max_attempts:
+            logger.error(f"[OUTBOX] Job {job_id} failed permanently: {result.get('error')}")
+            self._finish(job_id, 'failed', error=result.get('error'))
+        else:
+            delay = backoff_delay(attempts)
+            logger.warning(f"[OUTBOX] Job {job_id} attempt {attempts} failed, retrying in {delay:.1f}s: {result.get('error')}")
+            self._finish(job_id, 'pending', error=result.get('error'), next_attempt_at=time.time() + delay)
+
+    def run_once(self):
+        """Process one due job; return False when the queue has nothing due."""
+        row = self.claim_next()
+        if row is None:
+            return False
+        try:
+            self.process(row)
+        except Exception as e:
+            logger.error(f"[OUTBOX] Job {row['id']} crashed: {e}")
+            self._finish(row['id'], 'pending', error=str(e), next_attempt_at=time.time() + backoff_delay(row['attempts'] + 1))
+        return True
+
+    def start_workers(self, count=OUTBOX_WORKERS):
+        """Start background threads that drain the queue."""
+        for index in range(count):
+            worker = threading.Thread(target=self._worker_loop, daemon=True, name=f'outbox-{index}')
+            worker.start()
+            self.workers.append(worker)
+        logger.info(f"[OUTBOX] Started {count} worker(s) on {self.path}")
+
+    def _worker_loop(self):
+        while True:
+            try:
+                if self.run_once():
+                    continue
+            except Exception as e:
+                logger.error(f"[OUTBOX] Worker error: {e}")
+            self.wakeup.wait(OUTBOX_POLL_SECONDS)
+            self.wakeup.clear()
+
+_outbox = None
+_outbox_lock = threading.Lock()
+
+def get_outbox(start_workers=True):
+    """Get the process-wide outbox, starting its workers on first use.
+
+    Processes that only read job status (the web app) pass start_workers=False.
+    """
+    global _outbox
+    with _outbox_lock:
+        if _outbox is None:
+            _outbox = EventOutbox()
+        if start_workers and not _outbox.workers:
+            _outbox.start_workers()
+        return _outbox
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Fast Parser Module
+Deterministic grammar for common event prompts, tried before the AI parser.
+"""
+
+import os
+import re
+from datetime import datetime, timedelta
+
+from recurrence import extract_recurrence, first_occurrence
+
+# Results at or above this confidence skip the LLM
+FAST_PARSE_THRESHOLD = float(os.getenv('FAST_PARSE_THRESHOLD', '0.8'))
+
+WEEKDAYS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+MONTHS = ['january', 'february', 'march', 'april', 'may', 'june', 'july',
+          'august', 'september', 'october', 'november', 'december']
+
+_WEEKDAY = r'(?P<weekday>mon|tue|tues|wed|thu|thur|thurs|fri|sat|sun)(?:day|sday|nesday|rsday|urday)?'
+_MONTH = r'(?P<month>jan|feb|mar|apr|may|jun|jul|aug|sep|sept|oct|nov|dec)[a-z]*\.?'
+
+_TIME = re.compile(
+    r'\b(?:at\s+|@\s*)?(?:(?P<noon>noon|midday)|(?P<midnight>midnight)|'
+    r'(?P<hour>\d{1,2})(?::(?P<minute>\d{2}))?\s*(?P<meridiem>a\.?m\.?|p\.?m\.?)|'
+    r'(?P<hour24>\d{1,2}):(?P<minute24>\d{2}))(?![\w:])',
+    re.I
+)
+_RELATIVE = re.compile(r'\bin\s+(?P<amount>\d+|an?|half an)\s*(?P<unit>min(?:ute)?s?|hours?|hrs?)\b', re.I)
+_DURATION = re.compile(
+    r'\bfor\s+(?:(?P<half>half an hour)|(?P<amount>\d+(?:\.\d+)?|an?|one|two|three)\s*'
+    r'(?P<unit>min(?:ute)?s?|hours?|hrs?|h)\b)|'
+    r'\b(?P<compact>\d+)\s*-?\s*(?P<compact_unit>min(?:ute)?|hour)s?\b',
+    re.I
+)
+_DAY_WORDS = re.compile(r'\b(?P<word>today|tonight|tomorrow|tmrw|tmr|day after tomorrow)\b', re.I)
+_WEEKDAY_PHRASE = re.compile(rf'\b(?:(?P<qualifier>on|this|next)\s+)?{_WEEKDAY}\b', re.I)
+_DATE_PHRASES = [
+    re.compile(r'\b(?:on\s+)?(?P<year>\d{4})-(?P<month_num>\d{1,2})-(?P<day>\d{1,2})\b'),
+    re.compile(rf'\b(?:on\s+)?{_MONTH}\s+(?P<day>\d{{1,2}})(?:st|nd|rd|th)?\b', re.I),
+    re.compile(rf'\b(?:on\s+)?(?:the\s+)?(?P<day>\d{{1,2}})(?:st|nd|rd|th)?\s+(?:of\s+)?{_MONTH}', re.I),
+    re.compile(r'\b(?:on\s+)?(?P<month_num>\d{1,2})/(?P<day>\d{1,2})\b'),
+]
+_LOCATION = re.compile(
+    r'(?:\b(?:at|in)\s+|@\s*)(?P<place>(?:the\s+)?[A-Z0-9][\w\'&.-]*(?:\s+(?:[A-Z0-9][\w\'&.-]*|of|the|and|&))*)'
+)
+# Words that signal a shape the grammar does not understand
+_VAGUE = re.compile(
+    r'\b(morning|afternoon|evening|night|noonish|ish|sometime|around|about|after|before|between|'
+    r'next week|next month|weekend|end of|early|late|later|soon|or|until|till|every)\b',
+    re.I
+)
+# Dates before today, unit words the grammar didn't consume, and corrections all mean the
+# prompt says more about "when" than the grammar read
+_PAST = re.compile(rf'\b(?:yesterday|ago|last\s+(?:night|week|month|year|{_WEEKDAY}))\b', re.I)
+_LEFTOVER_UNITS = re.compile(r'\b(?:days?|weeks?|months?|years?|hours?|hrs?|minutes?|mins?)\b', re.I)
+_CORRECTION = re.compile(r"\b(?:not|no|don'?t|never|instead|actually|rather|but|wait|scratch that|i mean|correction)\b", re.I)
+_WORD_NUMBERS = {'a': 1, 'an': 1, 'one': 1, 'two': 2, 'three': 3, 'half an': 0.5}
+_FILLER = re.compile(r'^(?:(?:add|schedule|create|book|set up|put|remind me of|remind me to)\s+)?(?:an?\s+)?', re.I)
+_DANGLING = re.compile(r'\b(?:on|at|for|from|the|in)\s*$|^\s*(?:on|at|for|in)\b', re.I)
+
+def _amount(value):
+    value = value.lower()
+    return _WORD_NUMBERS[value] if value in _WORD_NUMBERS else float(value)
+
+def _minutes(amount, unit):
+    return int(round(amount * (60 if unit.lower().startswith('h') else 1)))
+
+def _take(pattern, text, spans):
+    """Search text outside spans already consumed; record the match span."""
+    for match in pattern.finditer(text):
+        if not any(start < match.end() and match.start() < end for start, end in spans):
+            spans.append(match.span())
+            return match
+    return None
+
+def _parse_time(match):
+    if match.group('noon'):
+        return 12, 0, True
+    if match.group('midnight'):
+        return 0, 0, True
+    if match.group('hour'):
+        hour, minute = int(match.group('hour')), int(match.group('minute') or 0)
+        if not 1 <= hour <= 12 or minute > 59:
+            return None
+        pm = match.group('meridiem').lower().startswith('p')
+        return hour % 12 + (12 if pm else 0), minute, True
+    hour, minute = int(match.group('hour24')), int(match.group('minute24'))
+    if hour > 23 or minute > 59:
+        return None
+    # "at 3:30" without am/pm is probably the afternoon, but say so via the confidence
+    if 1 <= hour <= 7:
+        return hour + 12, minute, False
+    return hour, minute, hour >= 13 or hour == 0
+
+def _resolve_date(text, spans, current_time):
+    """Find the event day; returns (date, certain) or (None, True) when no day is given."""
+    today = current_time.date()
+    match = _take(_DAY_WORDS, text, spans)
+    if match:
+        word = match.group('word').lower()
+        if word == 'day after tomorrow':
+            return today + timedelta(days=2), True
+        if word in ('tomorrow', 'tmrw', 'tmr'):
+            return today + timedelta(days=1), True
+        return today, True
+
+    match = _take(_WEEKDAY_PHRASE, text, spans)
+    if match:
+        target = next(i for i, name in enumerate(WEEKDAYS) if name.startswith(match.group('weekday').lower()[:3]))
+        days_ahead = (target - today.weekday()) % 7
+        qualifier = (match.group('qualifier') or '').lower()
+        if qualifier == 'next' and days_ahead == 0:
+            days_ahead = 7
+        # "next Friday" is ambiguous (this coming one or the one after), so let the model decide
+        return today + timedelta(days=days_ahead), qualifier != 'next'
+
+    for pattern in _DATE_PHRASES:
+        match = _take(pattern, text, spans)
+        if not match:
+            continue
+        groups = match.groupdict()
+        month = int(groups['month_num']) if groups.get('month_num') else \
+            next(i + 1 for i, name in enumerate(MONTHS) if name.startswith(groups['month'].lower().rstrip('.')[:3]))
+        year = int(groups['year']) if groups.get('year') else today.year
+        try:
+            date = datetime(year, month, int(groups['day'])).date()
+        except ValueError:
+            return None, False
+        if not groups.get('year') and date < today:
+            date = date.replace(year=year + 1)
+        return date, True
+    return None, True
+
+def _clean_title(text, spans):
+    pieces = []
+    last = 0
+    for start, end in sorted(spans):
+        pieces.append(text[last:start])
+        last = max(last, end)
+    pieces.append(text[last:])
+    title = ' '.join(' '.join(pieces).split())
+    title = _FILLER.sub('', title)
+    for _ in range(3):
+        title = _DANGLING.sub('', title).strip(' ,.-')
+    return title
+
+def fast_parse(text, current_time=None):
+    """Parse a common-shaped prompt without the LLM.
+
+    Returns a parse result with a 'confidence' between 0 and 1; anything
+    below FAST_PARSE_THRESHOLD should be sent to the AI parser instead.
+    'time_confidence' scores the date/time alone, ignoring the title.
+    """
+    current_time = current_time or datetime.now()
+    recurrence, text = extract_recurrence(text, explicit_only=True)
+    # A leading cadence adjective ("daily standup") is only taken as a repeat once we know there's no date
+    cadence = None if recurrence else extract_recurrence(text)[0]
+    spans = []
+    # Date/time doubts are tracked apart from title doubts so callers can trust just the time
+    time_penalty = 0.0
+    title_penalty = 0.0
+
+    date_time = None
+    date_given = False
+    relative = _take(_RELATIVE, text, spans)
+    if relative:
+        amount = _amount(relative.group('amount'))
+        date_time = current_time.replace(second=0, microsecond=0) + timedelta(minutes=_minutes(amount, relative.group('unit')))
+    else:
+        time_match = _take(_TIME, text, spans)
+        clock = _parse_time(time_match) if time_match else None
+        date, date_certain = _resolve_date(text, spans, current_time)
+        date_given = date is not None
+        if clock is None:
+            return {'success': False, 'confidence': 0.0, 'error': 'No time of day found'}
+        hour, minute, clock_certain = clock
+        if not clock_certain:
+            time_penalty += 0.3
+        if not date_certain:
+            time_penalty += 0.3
+        if date is None:
+            # A bare time means the next time the clock shows it
+            date = current_time.date()
+            if (hour, minute) <= (current_time.hour, current_time.minute):
+                date += timedelta(days=1)
+            time_penalty += 0.1
+        date_time = datetime(date.year, date.month, date.day, hour, minute, tzinfo=current_time.tzinfo)
+        if date_time < current_time - timedelta(hours=12):
+            time_penalty += 0.3
+
+    if cadence:
+        if not date_given:
+            recurrence = cadence
+            spans.append(re.match(r'\s*\S+', text).span())
+        else:
+            # "weekly report review Friday 3pm": a repeat or just a title word? Let the model decide
+            time_penalty += 0.4
+
+    duration_minutes = None
+    duration = _take(_DURATION, text, spans)
+    if duration:
+        if duration.group('half'):
+            duration_minutes = 30
+        elif duration.group('compact'):
+            duration_minutes = _minutes(float(duration.group('compact')), duration.group('compact_unit'))
+        else:
+            duration_minutes = _minutes(_amount(duration.group('amount')), duration.group('unit'))
+
+    location = None
+    place = _take(_LOCATION, text, spans)
+    if place:
+        location = place.group('place').strip(' ,.')
+
+    if _PAST.search(text) or _CORRECTION.search(text):
+        time_penalty += 0.5
+    if location and not re.search(r'[^\W\d_]', location):
+        # "in 2 days" read as a place called "2"
+        time_penalty += 0.5
+
+    title = _clean_title(text, spans)
+    if _LEFTOVER_UNITS.search(title):
+        time_penalty += 0.5
+    if not title:
+        title = 'Untitled Event'
+        title_penalty += 0.4
+    if _VAGUE.search(title) or re.search(r'\d|@|\b(?:at|in)\b', title):
+        # Leftover time-ish words, numbers or places mean part of the prompt went unparsed
+        title_penalty += 0.4
+
+    if recurrence:
+        date_time = first_occurrence(recurrence, date_time)
+
+    followup_questions = []
+    if duration_minutes is None:
+        followup_questions.append("What's the duration?")
+    if location is None:
+        followup_questions.append('Where is this event?')
+
+    return {
+        'success': True,
+        'title': title,
+        'date_time': date_time,
+        'duration_minutes': duration_minutes,
+        'location': location,
+        'description': '',
+        'needs_followup': bool(followup_questions),
+        'followup_questions': followup_questions,
+        'recurrence': recurrence,
+        'source': 'fast',
+        'confidence': round(max(1.0 - time_penalty - title_penalty, 0.0), 2),
+        'time_confidence': round(max(1.0 - time_penalty, 0.0), 2),
+    }
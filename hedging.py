@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Hedging Module
+Hedged requests: send a second copy of a slow call and keep whichever answers first.
+"""
+
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from circuit_breaker import percentile
+from rate_limiter import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+LLM_HEDGING = os.getenv('LLM_HEDGING', 'false').lower() in ('1', 'true', 'yes')
+# Hedge once the first call has run longer than this percentile of recent latencies
+HEDGE_PERCENTILE = float(os.getenv('LLM_HEDGE_PERCENTILE', '0.9'))
+HEDGE_MIN_SAMPLES = int(os.getenv('LLM_HEDGE_MIN_SAMPLES', '20'))
+HEDGE_DEFAULT_DELAY = float(os.getenv('LLM_HEDGE_DEFAULT_DELAY', '3'))
+HEDGE_MIN_DELAY = float(os.getenv('LLM_HEDGE_MIN_DELAY', '0.5'))
+# At most this many hedges per minute (bursts up to HEDGE_BURST)
+HEDGE_MAX_PER_MINUTE = float(os.getenv('LLM_HEDGE_MAX_PER_MINUTE', '6'))
+HEDGE_BURST = int(os.getenv('LLM_HEDGE_BURST', '3'))
+HEDGE_WORKERS = int(os.getenv('LLM_HEDGE_WORKERS', '16'))
+
+class Hedger:
+    """Runs attempt(cancelled) and, past the hedge delay, a second identical attempt.
+
+    The first attempt to succeed wins; the loser's cancelled event is set so
+    it can stop reading and close its connection. Hedges are rate-capped by
+    a token bucket so a slow upstream doesn't get twice the load.
+    """
+
+    def __init__(self, name, latency_window, percentile=HEDGE_PERCENTILE, min_samples=HEDGE_MIN_SAMPLES,
+                 default_delay=HEDGE_DEFAULT_DELAY, min_delay=HEDGE_MIN_DELAY,
+                 max_per_minute=HEDGE_MAX_PER_MINUTE, burst=HEDGE_BURST, workers=HEDGE_WORKERS):
+        self.name = name
+        self.latency_window = latency_window
+        self.fraction = percentile
+        self.min_samples = min_samples
+        self.default_delay = default_delay
+        self.min_delay = min_delay
+        self.bucket = TokenBucket(max_per_minute / 60.0, burst)
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f'{name}-hedge')
+        self.stats = {'calls': 0, 'hedged': 0, 'hedge_wins': 0, 'primary_wins': 0, 'rate_capped': 0}
+        self.lock = threading.Lock()
+
+    def _count(self, key):
+        with self.lock:
+            self.stats[key] += 1
+
+    def delay(self):
+        """Seconds to wait for the first attempt before hedging."""
+        count, _, latencies = self.latency_window.snapshot()
+        if count < self.min_samples:
+            return self.default_delay
+        return max(percentile(latencies, self.fraction), self.min_delay)
+
+    def run(self, attempt):
+        """Return the first successful attempt's result; raise if every attempt failed."""
+        self._count('calls')
+        delay = self.delay()
+        cancel_events = {}
+
+        cancelled = threading.Event()
+        primary = self.executor.submit(attempt, cancelled)
+        cancel_events[primary] = cancelled
+        done, _ = wait([primary], timeout=delay)
+        if done:
+            return primary.result()
+        if not self.bucket.try_acquire():
+            self._count('rate_capped')
+            return primary.result()
+
+        self._count('hedged')
+        logger.info(f"[HEDGE] {self.name}: no answer after {delay:.2f}s, sending a hedge request")
+        cancelled = threading.Event()
+        hedge = self.executor.submit(attempt, cancelled)
+        cancel_events[hedge] = cancelled
+
+        pending = {primary, hedge}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is not None:
+                    error = future.exception()
+                    continue
+                for loser in pending:
+                    cancel_events[loser].set()
+                    loser.cancel()
+                self._count('hedge_wins' if future is hedge else 'primary_wins')
+                return future.result()
+        raise error
+
+    def get_stats(self):
+        with self.lock:
+            stats = dict(self.stats)
+        stats['hedge_rate'] = stats['hedged'] / stats['calls'] if stats['calls'] else 0.0
+        stats['hedge_win_rate'] = stats['hedge_wins'] / stats['hedged'] if stats['hedged'] else 0.0
+        return stats
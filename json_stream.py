@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+JSON Stream Module
+Incremental extraction of top-level fields from a JSON object arriving in chunks.
+"""
+
+import json
+
+class JsonFieldStream:
+    """Feed chunks of a JSON object; completed top-level fields come back as soon as they close.
+
+    Only the characters added since the last feed are scanned, so a streamed
+    response of n characters costs O(n) overall.
+    """
+
+    def __init__(self):
+        self.buffer = ''
+        self.fields = {}
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._field_start = None
+
+    def feed(self, chunk):
+        """Add a chunk and return a dict of the fields completed by it."""
+        self.buffer += chunk
+        completed = {}
+        while self._pos < len(self.buffer):
+            char = self.buffer[self._pos]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == '\\':
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in '{[':
+                self._depth += 1
+                if self._depth == 1 and char == '{':
+                    self._field_start = self._pos + 1
+            elif char in '}]':
+                if self._depth == 1 and char == '}':
+                    self._close_field(completed)
+                self._depth -= 1
+            elif char == ',' and self._depth == 1:
+                self._close_field(completed)
+                self._field_start = self._pos + 1
+            self._pos += 1
+        return completed
+
+    def _close_field(self, completed):
+        if self._field_start is None:
+            return
+        segment = self.buffer[self._field_start:self._pos].strip()
+        if not segment:
+            return
+        try:
+            field = json.loads('{' + segment + '}')
+        except ValueError:
+            return
+        completed.update(field)
+        self.fields.update(field)
@@ -8,7 +8,9 @@ import json
 import subprocess
 import logging
 import os
-from typing import Dict, Any, Optional
+import threading
+import uuid
+from typing import Callable, Dict, Any, Optional
 
 # Configure logging
 logging.basicConfig(
@@ -29,6 +31,7 @@ class MCPClient:
         self.server_command = server_command
         self.server_process = None
         self.request_id = 1
+        self.lock = threading.Lock()  # one request in flight on the stdio pipe at a time
         
     def start_server(self):
         """Start the MCP server process."""
@@ -97,17 +100,29 @@ class MCPClient:
             except Exception as e:
                 logger.error(f"[ERROR] Error stopping server: {e}")
     
-    def send_request(self, method: str, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-        """Send JSON-RPC request to server and get response."""
+    def send_request(self, method: str, params: Dict[str, Any], on_progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> Optional[Dict[str, Any]]:
+        """Send JSON-RPC request to server and get response.
+        
+        With on_progress, the request carries a progress token and the params of
+        matching notifications/progress messages are passed to it as they arrive.
+        """
+        with self.lock:
+            return self._send_request(method, params, on_progress)
+    
+    def _send_request(self, method: str, params: Dict[str, Any], on_progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> Optional[Dict[str, Any]]:
         if not self.server_process:
             logger.error("[ERROR] Server not running")
             return None
         
         try:
-            # Create JSON-RPC request
+            # Create JSON-RPC request (IDs are never reused, so late replies can be told apart)
+            request_id = self.request_id
+            self.request_id += 1
+            if on_progress:
+                params = dict(params, _meta={"progressToken": request_id})
             request = {
                 "jsonrpc": "2.0",
-                "id": self.request_id,
+                "id": request_id,
                 "method": method,
                 "params": params
             }
@@ -131,7 +146,29 @@ class MCPClient:
                     # Use a simple blocking read with timeout
                     response_line = self.server_process.stdout.readline()
                     if response_line:
-                        break
+                        try:
+                            message = json.loads(response_line)
+                        except ValueError:
+                            message = None
+                        if not isinstance(message, dict):
+                            message = {}
+                        # Notifications have a method and no id; they are never the reply
+                        if 'method' in message and 'id' not in message:
+                            progress = message.get('params') or {}
+                            if on_progress and message['method'] == 'notifications/progress' and progress.get('progressToken') == request_id:
+                                try:
+                                    on_progress(progress)
+                                except Exception as e:
+                                    logger.error(f"[ERROR] Progress callback failed: {e}")
+                            response_line = None
+                            continue
+                        # Skip replies to earlier requests that timed out on our side
+                        reply_id = message.get('id')
+                        if reply_id in (request_id, None):
+                            break
+                        logger.warning(f"[MCP] Discarding stale response for request {reply_id}")
+                        response_line = None
+                        continue
                     time.sleep(0.1)
                 except Exception as e:
                     logger.error(f"[ERROR] Error reading from server: {e}")
@@ -166,7 +203,6 @@ class MCPClient:
                 logger.error(f"[ERROR] Server error: {response['error']}")
                 return None
             
-            self.request_id += 1
             return response.get('result')
             
         except Exception as e:
@@ -185,13 +221,24 @@ class MCPClient:
         """Get list of available tools from server."""
         return self.send_request("tools/list", {})
     
-    def call_tool(self, tool_name: str, arguments: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-        """Call a tool on the server."""
+    def get_stats(self) -> Optional[Dict[str, Any]]:
+        """Get the server's Calendar quota and parsing counters."""
+        return self.send_request("stats", {})
+    
+    def call_tool(self, tool_name: str, arguments: Dict[str, Any], retries: int = 0, on_progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> Optional[Dict[str, Any]]:
+        """Call a tool on the server, retrying on communication failures.
+        
+        Only pass retries for idempotent calls (e.g. inserts carrying a request_nonce).
+        """
         params = {
             "name": tool_name,
             "arguments": arguments
         }
-        result = self.send_request("tools/call", params)
+        result = self.send_request("tools/call", params, on_progress)
+        while result is None and retries > 0:
+            retries -= 1
+            logger.warning(f"[MCP] Retrying {tool_name} ({retries} retries left)")
+            result = self.send_request("tools/call", params, on_progress)
         
         if result and 'content' in result:
             # Extract the actual result from the content
@@ -205,19 +252,24 @@ class MCPClient:
         
         return result
     
-    def add_calendar_event(self, prompt: str, user_id: str, chat_context: Optional[list] = None) -> Dict[str, Any]:
-        """Add calendar event using MCP server."""
+    def add_calendar_event(self, prompt: str, user_id: str, chat_context: Optional[list] = None, request_nonce: Optional[str] = None, write_behind: Optional[bool] = None, on_progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        """Add calendar event using MCP server; on_progress receives partially parsed fields."""
         logger.info(f"[MCP] Adding calendar event - Prompt: '{prompt}', User: {user_id}")
         
         arguments = {
             "prompt": prompt,
-            "user_id": user_id
+            "user_id": user_id,
+            "request_nonce": request_nonce or uuid.uuid4().hex
         }
         
         if chat_context:
             arguments["chat_context"] = chat_context
         
-        result = self.call_tool("add_calendar_event", arguments)
+        if write_behind is not None:
+            arguments["write_behind"] = write_behind
+        
+        # Safe to retry: the nonce gives the insert a deterministic event ID
+        result = self.call_tool("add_calendar_event", arguments, retries=1, on_progress=on_progress)
         
         if result is None:
             return {
@@ -227,15 +279,18 @@ class MCPClient:
         
         return result
     
-    def list_upcoming_events(self, user_id: str, max_results: int = 10) -> Dict[str, Any]:
+    def list_upcoming_events(self, user_id: str, max_results: int = 10, all_calendars: bool = False) -> Dict[str, Any]:
         """List upcoming events using MCP server."""
-        logger.info(f"[MCP] Listing upcoming events - User: {user_id}, Max: {max_results}")
+        logger.info(f"[MCP] Listing upcoming events - User: {user_id}, Max: {max_results}, All calendars: {all_calendars}")
         
         arguments = {
             "user_id": user_id,
             "max_results": max_results
         }
         
+        if all_calendars:
+            arguments["all_calendars"] = True
+        
         result = self.call_tool("list_upcoming_events", arguments)
         
         if result is None:
@@ -246,20 +301,24 @@ class MCPClient:
         
         return result
     
-    def add_calendar_event_with_duration(self, prompt: str, user_id: str, duration_minutes: int, chat_context: Optional[list] = None) -> Dict[str, Any]:
+    def add_calendar_event_with_duration(self, prompt: str, user_id: str, duration_minutes: int, chat_context: Optional[list] = None, request_nonce: Optional[str] = None, write_behind: Optional[bool] = None) -> Dict[str, Any]:
         """Add calendar event with specific duration using MCP server."""
         logger.info(f"[MCP] Adding calendar event with duration - Prompt: '{prompt}', Duration: {duration_minutes}, User: {user_id}")
         
         arguments = {
             "prompt": prompt,
             "user_id": user_id,
-            "duration_minutes": duration_minutes
+            "duration_minutes": duration_minutes,
+            "request_nonce": request_nonce or uuid.uuid4().hex
         }
         
         if chat_context:
             arguments["chat_context"] = chat_context
         
-        result = self.call_tool("add_calendar_event_with_duration", arguments)
+        if write_behind is not None:
+            arguments["write_behind"] = write_behind
+        
+        result = self.call_tool("add_calendar_event_with_duration", arguments, retries=1)
         
         if result is None:
             return {
@@ -280,7 +339,55 @@ class MCPClient:
             "original_parsed_data": original_parsed_data
         }
         
-        result = self.call_tool("handle_followup_response", arguments)
+        # The original parsed data carries the request nonce, so retrying is safe
+        result = self.call_tool("handle_followup_response", arguments, retries=1)
+        
+        if result is None:
+            return {
+                'success': False,
+                'error': 'Failed to communicate with MCP server'
+            }
+        
+        return result
+    
+    def add_calendar_events_bulk(self, prompts: list, user_id: str, request_nonce: Optional[str] = None, write_behind: Optional[bool] = None) -> Dict[str, Any]:
+        """Add several calendar events from a list of prompts using MCP server."""
+        logger.info(f"[MCP] Adding {len(prompts)} calendar events in bulk - User: {user_id}")
+        
+        arguments = {
+            "prompts": prompts,
+            "user_id": user_id,
+            "request_nonce": request_nonce or uuid.uuid4().hex
+        }
+        
+        if write_behind is not None:
+            arguments["write_behind"] = write_behind
+        
+        # Safe to retry: every item's event ID derives from the shared nonce
+        result = self.call_tool("add_calendar_events_bulk", arguments, retries=1)
+        
+        if result is None:
+            return {
+                'success': False,
+                'error': 'Failed to communicate with MCP server'
+            }
+        
+        return result
+    
+    def find_free_slots(self, user_id: str, duration_minutes: int, calendars: Optional[list] = None, **options) -> Dict[str, Any]:
+        """Find free meeting slots across calendars using MCP server."""
+        logger.info(f"[MCP] Finding free slots - User: {user_id}, Calendars: {calendars}, Duration: {duration_minutes}")
+        
+        arguments = {
+            "user_id": user_id,
+            "duration_minutes": duration_minutes
+        }
+        
+        if calendars:
+            arguments["calendars"] = calendars
+        arguments.update(options)
+        
+        result = self.call_tool("find_free_slots", arguments)
         
         if result is None:
             return {
@@ -4,17 +4,20 @@ MCP Handlers Module
 MCP-style tools and AI parsing for Google Calendar operations with enhanced features.
 """
 
-import os
-import json
-from datetime import datetime
-import dateparser
-import openai
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
 from dotenv import load_dotenv
 import logging
+import os
 import re
+import uuid
 
 # Import calendar API functions
-from calendar_api import get_calendar_service, create_event, list_upcoming_events
+from calendar_api import get_calendar_service, get_user_timezone, create_event, list_upcoming_events, start_calendar_stage, peek_user_timezone, check_conflicts, query_busy_intervals_many, get_default_duration
+from scheduling import find_free_slots
+from event_outbox import WRITE_BEHIND, get_outbox
+from parsing_engine import get_openai_client, parse_prompt, parse_prompt_with_ai, parse_prompts_with_ai
+from tzlocal import get_localzone
 
 # Load environment variables
 load_dotenv()
@@ -30,6 +33,9 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Most prompts accepted by one add_calendar_events_bulk call
+BULK_MAX_PROMPTS = int(os.getenv('BULK_MAX_PROMPTS', '50'))
+
 # MCP Tool Definitions
 MCP_TOOLS = [
     {
@@ -46,6 +52,14 @@ MCP_TOOLS = [
                     "type": "string",
                     "description": "User identifier for authentication"
                 },
+                "request_nonce": {
+                    "type": "string",
+                    "description": "Client-generated ID of this logical request; retries with the same nonce never create duplicates"
+                },
+                "write_behind": {
+                    "type": "boolean",
+                    "description": "Queue the insert and return a job ID instead of waiting for Google Calendar"
+                },
                 "chat_context": {
                     "type": "array",
                     "description": "Previous conversation context for follow-up questions",
@@ -61,6 +75,37 @@ MCP_TOOLS = [
             "required": ["prompt", "user_id"]
         }
     },
+    {
+        "name": "add_calendar_events_bulk",
+        "description": "Add several events to Google Calendar from a list of natural language prompts, parsed together",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "prompts": {
+                    "type": "array",
+                    "description": "One natural language event description per item (or pass text with one per line)",
+                    "items": {"type": "string"}
+                },
+                "text": {
+                    "type": "string",
+                    "description": "Pasted list of events, one per line"
+                },
+                "user_id": {
+                    "type": "string",
+                    "description": "User identifier for authentication"
+                },
+                "request_nonce": {
+                    "type": "string",
+                    "description": "Client-generated ID of this bulk request; item i is created under <nonce>-<i>, so retries never duplicate"
+                },
+                "write_behind": {
+                    "type": "boolean",
+                    "description": "Queue the inserts and return job IDs instead of waiting for Google Calendar"
+                }
+            },
+            "required": ["user_id"]
+        }
+    },
     {
         "name": "list_upcoming_events",
         "description": "List upcoming events from Google Calendar",
@@ -71,6 +116,10 @@ MCP_TOOLS = [
                     "type": "integer",
                     "description": "Maximum number of events to return"
                 },
+                "all_calendars": {
+                    "type": "boolean",
+                    "description": "Merge events from all of the user's selected calendars instead of only the primary one"
+                },
                 "user_id": {
                     "type": "string",
                     "description": "User identifier for authentication"
@@ -78,187 +127,100 @@ MCP_TOOLS = [
             },
             "required": ["user_id"]
         }
+    },
+    {
+        "name": "find_free_slots",
+        "description": "Find meeting slots that are free on every given calendar within working hours",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "user_id": {
+                    "type": "string",
+                    "description": "User identifier for authentication"
+                },
+                "calendars": {
+                    "type": "array",
+                    "description": "Calendar IDs or attendee emails to check (defaults to the user's primary calendar)",
+                    "items": {"type": "string"}
+                },
+                "duration_minutes": {
+                    "type": "integer",
+                    "description": "Meeting length in minutes"
+                },
+                "window_start": {
+                    "type": "string",
+                    "description": "Start of the search window in ISO format (defaults to now)"
+                },
+                "window_end": {
+                    "type": "string",
+                    "description": "End of the search window in ISO format (defaults to 7 days from the start)"
+                },
+                "working_hours_start": {
+                    "type": "string",
+                    "description": "Start of working hours as HH:MM (default 09:00)"
+                },
+                "working_hours_end": {
+                    "type": "string",
+                    "description": "End of working hours as HH:MM (default 17:00)"
+                },
+                "timezone": {
+                    "type": "string",
+                    "description": "IANA timezone for the window and working hours (defaults to the user's Calendar timezone)"
+                },
+                "max_results": {
+                    "type": "integer",
+                    "description": "Maximum number of candidate slots to return"
+                }
+            },
+            "required": ["user_id", "duration_minutes"]
+        }
     }
 ]
 
-def get_openai_client():
-    """Get OpenAI client with API key."""
-    api_key = os.getenv('OPENAI_API_KEY')
-    if not api_key:
-        raise ValueError("OPENAI_API_KEY environment variable not set")
-    return openai.OpenAI(api_key=api_key)
-
 def get_mcp_tools():
     """Get available MCP tools."""
     return MCP_TOOLS
 
-def parse_prompt_with_ai(text, chat_context=None):
-    """Parse natural language prompt using AI to extract event details including location."""
-    logger.info(f"[AI] Attempting AI parsing...")
-    logger.info(f"[AI] Starting AI parsing for prompt: '{text}'")
-    
-    try:
-        client = get_openai_client()
-        current_time = datetime.now()
-        
-        logger.info(f"[CONTEXT] Current context - Date: {current_time.strftime('%Y-%m-%d')}, Time: {current_time.strftime('%H:%M')}")
-        
-        # Build conversation context
-        messages = [
-            {
-                "role": "system",
-                "content": """You are a calendar assistant that extracts event details from natural language. 
-                Return a JSON object with these fields:
-                - title: The event title/description
-                - date_time: The date and time in ISO format (YYYY-MM-DDTHH:MM:SS)
-                - duration_minutes: Duration in minutes (only if explicitly mentioned)
-                - location: Location/venue of the event (only if explicitly mentioned)
-                - description: A brief description of the event (generate if not provided)
-                - needs_followup: Boolean indicating if follow-up questions are needed
-                - followup_questions: Array of questions to ask the user (e.g., duration, location details, etc.)
-                
-                IMPORTANT: 
-                - Use 2025 as the current year. Today is 2025-08-06.
-                - Current time is """ + current_time.strftime('%H:%M') + """
-                - For relative times like "in 2 hours", calculate from current time
-                - Set needs_followup to TRUE if duration_minutes is null/not provided
-                - Set needs_followup to TRUE if location is not explicitly mentioned
-                - Do NOT provide default values for missing information
-                - Only set location if it's explicitly mentioned in the prompt
-                - Only set duration_minutes if it's explicitly mentioned in the prompt
-                - Generate meaningful descriptions based on the event type
-                
-                Examples:
-                "team meeting tomorrow at 4pm" → {"title": "team meeting", "date_time": "2025-08-07T16:00:00", "needs_followup": true, "followup_questions": ["What's the duration?", "Where is the meeting?"]}
-                "doctor appointment on Friday 2pm for 30 minutes at City Medical Center" → {"title": "doctor appointment", "date_time": "2025-08-09T14:00:00", "duration_minutes": 30, "location": "City Medical Center", "description": "Medical appointment"}
-                "call with John in 2 hours" → {"title": "call with John", "date_time": "2025-08-06T13:10:00", "needs_followup": true, "followup_questions": ["What's the duration?", "Is this a video call?"]}
-                
-                Use 2025 as the current year. Return only valid JSON."""
-            }
-        ]
-        
-        # Add chat context if available
-        if chat_context:
-            messages.extend(chat_context)
-        
-        # Add current prompt
-        messages.append({
-            "role": "user",
-            "content": f"Parse this calendar prompt: '{text}'"
-        })
-        
-        logger.info(f"[API] Sending request to OpenAI API...")
-        
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=messages,
-            temperature=0.1
-        )
-        
-        logger.info(f"[SUCCESS] Received response from OpenAI API")
-        
-        # Extract and parse the response
-        content = response.choices[0].message.content.strip()
-        logger.info(f"[RESPONSE] Raw AI response: {content}")
-        
-        # Try to extract JSON from the response
-        try:
-            # Look for JSON in the response
-            json_match = re.search(r'\{.*\}', content, re.DOTALL)
-            if json_match:
-                parsed_data = json.loads(json_match.group())
-            else:
-                parsed_data = json.loads(content)
-        except json.JSONDecodeError as e:
-            logger.error(f"[ERROR] Failed to parse JSON: {e}")
-            # Fallback to basic parsing
-            return parse_prompt(text)
-        
-        # Extract fields
-        title = parsed_data.get('title', 'Untitled Event')
-        date_time_str = parsed_data.get('date_time')
-        duration_minutes = parsed_data.get('duration_minutes')
-        location = parsed_data.get('location')
-        description = parsed_data.get('description', '')
-        needs_followup = parsed_data.get('needs_followup', False)
-        followup_questions = parsed_data.get('followup_questions', [])
-        
-        logger.info(f"[DATA] Parsed data - Title: '{title}', Date/Time: '{date_time_str}', Duration: {duration_minutes}, Location: '{location}', Needs Followup: {needs_followup}")
-        
-        # Parse datetime
-        if date_time_str:
-            try:
-                parsed_datetime = datetime.fromisoformat(date_time_str.replace('Z', '+00:00'))
-                logger.info(f"[SUCCESS] Successfully parsed datetime: {parsed_datetime}")
-            except ValueError as e:
-                logger.error(f"[ERROR] Failed to parse datetime: {e}")
-                return parse_prompt(text)
-        else:
-            logger.error(f"[ERROR] No date_time in response")
-            return parse_prompt(text)
-        
-        logger.info(f"[SUCCESS] AI parsing successful - Title: '{title}', Time: {parsed_datetime}, Duration: {duration_minutes}, Location: '{location}'")
-        
-        return {
-            'success': True,
-            'title': title,
-            'date_time': parsed_datetime,
-            'duration_minutes': duration_minutes,
-            'location': location,
-            'description': description,
-            'needs_followup': needs_followup,
-            'followup_questions': followup_questions
-        }
-        
-    except Exception as e:
-        logger.error(f"[ERROR] AI parsing failed: {e}")
-        return parse_prompt(text)
+def apply_conflicts(parsed_data, conflicts):
+    """Attach scheduling conflicts to parsed data and ask the user to confirm."""
+    if not conflicts:
+        return parsed_data
+    parsed_data['conflicts'] = conflicts
+    parsed_data['needs_followup'] = True
+    questions = list(parsed_data.get('followup_questions') or [])
+    times = ', '.join(
+        f"{datetime.fromisoformat(c['start']).strftime('%I:%M %p')}-{datetime.fromisoformat(c['end']).strftime('%I:%M %p')}"
+        for c in conflicts
+    )
+    questions.append(f"This overlaps with {len(conflicts)} existing event(s) ({times}). Should I book it anyway?")
+    parsed_data['followup_questions'] = questions
+    return parsed_data
 
-def parse_prompt(text):
-    """Fallback parsing using dateparser."""
-    logger.info(f"[PARSE] Using fallback parsing for: '{text}'")
-    
-    try:
-        # Basic parsing with dateparser
-        parsed_datetime = dateparser.parse(text, settings={'PREFER_DATES_FROM': 'future'})
-        
-        if not parsed_datetime:
-            return {'success': False, 'error': 'Could not parse date/time from prompt'}
-        
-        # Extract title (remove time-related words)
-        title = text
-        time_words = ['today', 'tomorrow', 'next', 'at', 'on', 'in', 'for', 'minutes', 'hours', 'am', 'pm']
-        for word in time_words:
-            title = re.sub(rf'\b{word}\b', '', title, flags=re.IGNORECASE)
-        title = re.sub(r'\s+', ' ', title).strip()
-        
-        if not title:
-            title = 'Untitled Event'
-        
-        return {
-            'success': True,
-            'title': title,
-            'date_time': parsed_datetime,
-            'duration_minutes': None,
-            'location': None,
-            'description': '',
-            'needs_followup': True,
-            'followup_questions': ['What\'s the duration?', 'Where is this event?']
-        }
-        
-    except Exception as e:
-        logger.error(f"[ERROR] Fallback parsing failed: {e}")
-        return {'success': False, 'error': f'Failed to parse prompt: {str(e)}'}
+def add_calendar_event_mcp(prompt, user_id, chat_context=None, request_nonce=None, write_behind=WRITE_BEHIND, on_progress=None,
+                           duration_minutes=None):
+    """Add calendar event using MCP-style interface with enhanced features.
 
-def add_calendar_event_mcp(prompt, user_id, chat_context=None):
-    """Add calendar event using MCP-style interface with enhanced features."""
+    duration_minutes is a duration the user already confirmed: it replaces the
+    parsed one and settles the parse's follow-up questions (conflicts are still asked).
+    """
     logger.info(f"[MCP] Adding calendar event - Prompt: '{prompt}', User: {user_id}")
     
     try:
-        # Get calendar service
+        # Auth and the busy prefetch run in the background while the prompt is parsed
         logger.info(f"[AUTH] MCP: Getting calendar service for user: {user_id}")
-        service = get_calendar_service(user_id)
+        calendar_stage = start_calendar_stage(user_id)
+        
+        # Parsing needs the user's "now"; only wait for auth when the timezone isn't cached
+        user_tz = peek_user_timezone(user_id)
+        if user_tz is None:
+            service, _ = calendar_stage.result()
+            user_tz = get_user_timezone(service) if service else get_localzone()
+        
+        # Parse the prompt
+        logger.info(f"[PARSE] MCP: Parsing prompt with AI...")
+        parsed_data = parse_prompt_with_ai(prompt, chat_context, datetime.now(user_tz), on_progress, user_id=user_id)
         
+        service, busy_prefetch = calendar_stage.result()
         if not service:
             logger.error(f"[ERROR] MCP: No calendar service available - authentication required")
             return {
@@ -267,10 +229,6 @@ def add_calendar_event_mcp(prompt, user_id, chat_context=None):
                 'needs_auth': True
             }
         
-        # Parse the prompt
-        logger.info(f"[PARSE] MCP: Parsing prompt with AI...")
-        parsed_data = parse_prompt_with_ai(prompt, chat_context)
-        
         if not parsed_data['success']:
             logger.error(f"[ERROR] MCP: Failed to parse prompt: {parsed_data.get('error')}")
             return {
@@ -278,6 +236,18 @@ def add_calendar_event_mcp(prompt, user_id, chat_context=None):
                 'error': parsed_data.get('error', 'Failed to parse event details')
             }
         
+        # Follow-up turns create the event under the same request nonce
+        parsed_data['request_nonce'] = request_nonce
+        
+        if duration_minutes:
+            parsed_data['duration_minutes'] = duration_minutes
+            parsed_data['needs_followup'] = False
+            parsed_data['followup_questions'] = []
+        
+        # Check the parsed slot against the user's calendar
+        conflicts = check_conflicts(service, parsed_data['date_time'], parsed_data.get('duration_minutes'), busy_prefetch)
+        apply_conflicts(parsed_data, conflicts)
+        
         # Check if follow-up questions are needed
         if parsed_data.get('needs_followup', False):
             logger.info(f"[FOLLOWUP] MCP: Follow-up questions needed")
@@ -285,10 +255,38 @@ def add_calendar_event_mcp(prompt, user_id, chat_context=None):
                 'success': False,
                 'needs_followup': True,
                 'followup_questions': parsed_data.get('followup_questions', []),
+                'conflicts': conflicts,
                 'parsed_data': parsed_data,
                 'message': 'Please provide additional details to complete the event creation.'
             }
         
+        # Without a parsed duration create_event uses the calendar's default length
+        duration = parsed_data.get('duration_minutes') or get_default_duration(service)
+        
+        if write_behind:
+            job_id = get_outbox().enqueue(
+                user_id,
+                parsed_data['title'],
+                parsed_data['date_time'],
+                parsed_data.get('duration_minutes'),
+                parsed_data.get('location'),
+                parsed_data.get('description', ''),
+                request_nonce,
+                parsed_data.get('recurrence')
+            )
+            return {
+                'success': True,
+                'queued': True,
+                'job_id': job_id,
+                'message': f"[QUEUED] Event queued and will be added to your calendar shortly.\n\n**Event:** {parsed_data['title']}\n**Date/Time:** {parsed_data['date_time'].strftime('%B %d, %Y at %I:%M %p')}",
+                'title': parsed_data['title'],
+                'start_time': parsed_data['date_time'].strftime('%B %d, %Y at %I:%M %p'),
+                'duration': f"{duration} minutes",
+                'location': parsed_data.get('location', 'Not specified'),
+                'description': parsed_data.get('description', ''),
+                'link': 'https://calendar.google.com'
+            }
+        
         # Create the event
         logger.info(f"[CREATE] MCP: Creating event - Title: '{parsed_data['title']}', Time: {parsed_data['date_time']}, Duration: {parsed_data.get('duration_minutes')}, Location: '{parsed_data.get('location')}'")
         
@@ -298,17 +296,19 @@ def add_calendar_event_mcp(prompt, user_id, chat_context=None):
             start_time=parsed_data['date_time'],
             duration_minutes=parsed_data.get('duration_minutes'),
             location=parsed_data.get('location'),
-            description=parsed_data.get('description', '')
+            description=parsed_data.get('description', ''),
+            request_nonce=request_nonce,
+            recurrence=parsed_data.get('recurrence')
         )
         
         if result['success']:
             logger.info(f"[SUCCESS] MCP: Event created successfully - Link: {result.get('link', 'N/A')}")
             return {
                 'success': True,
-                'message': f"[SUCCESS] Event created successfully!\n\n**Event:** {parsed_data['title']}\n**Date/Time:** {parsed_data['date_time'].strftime('%B %d, %Y at %I:%M %p')}\n**Duration:** {parsed_data.get('duration_minutes', 'Default (1 hour)')} minutes\n**Location:** {parsed_data.get('location', 'Not specified')}\n**Link:** {result.get('link', 'https://calendar.google.com')}",
+                'message': f"[SUCCESS] Event created successfully!\n\n**Event:** {parsed_data['title']}\n**Date/Time:** {parsed_data['date_time'].strftime('%B %d, %Y at %I:%M %p')}\n**Duration:** {duration} minutes\n**Location:** {parsed_data.get('location', 'Not specified')}\n**Link:** {result.get('link', 'https://calendar.google.com')}",
                 'title': parsed_data['title'],
                 'start_time': parsed_data['date_time'].strftime('%B %d, %Y at %I:%M %p'),
-                'duration': parsed_data.get('duration_minutes', 'Default (1 hour)'),
+                'duration': f"{duration} minutes",
                 'location': parsed_data.get('location', 'Not specified'),
                 'description': parsed_data.get('description', ''),
                 'link': result.get('link', 'https://calendar.google.com')
@@ -327,6 +327,113 @@ def add_calendar_event_mcp(prompt, user_id, chat_context=None):
             'error': f'Error creating event: {str(e)}'
         }
 
+def split_bulk_prompts(prompts=None, text=None):
+    """Turn a prompts list or a pasted block into clean prompts, dropping bullets and blank lines."""
+    lines = list(prompts or []) + (text.splitlines() if text else [])
+    return [re.sub(r'^\s*(?:[-*\u2022]|\d+[.)])\s*', '', line).strip() for line in lines if isinstance(line, str) and line.strip()]
+
+def add_calendar_events_bulk_mcp(prompts, user_id, request_nonce=None, write_behind=WRITE_BEHIND):
+    """Add several events at once; the prompts share batched parse requests.
+
+    Returns a result per prompt. Items that need follow-up or conflict
+    confirmation are not created and carry their parsed_data so each can be
+    finished with handle_followup_response.
+    """
+    logger.info(f"[MCP] Adding {len(prompts)} calendar events in bulk, User: {user_id}")
+    
+    if not prompts:
+        return {'success': False, 'error': 'No prompts given'}
+    if len(prompts) > BULK_MAX_PROMPTS:
+        return {'success': False, 'error': f'Too many prompts ({len(prompts)}); at most {BULK_MAX_PROMPTS} per request'}
+    request_nonce = request_nonce or uuid.uuid4().hex
+    
+    try:
+        # Auth and the busy prefetch run in the background while the prompts are parsed
+        calendar_stage = start_calendar_stage(user_id)
+        user_tz = peek_user_timezone(user_id)
+        if user_tz is None:
+            service, _ = calendar_stage.result()
+            user_tz = get_user_timezone(service) if service else get_localzone()
+        
+        parsed_items = parse_prompts_with_ai(prompts, datetime.now(user_tz), user_id=user_id)
+        
+        service, busy_prefetch = calendar_stage.result()
+        if not service:
+            return {
+                'success': False,
+                'error': 'Authentication required. Please login first.',
+                'needs_auth': True
+            }
+        
+        results = []
+        for i, (prompt, parsed_data) in enumerate(zip(prompts, parsed_items)):
+            item = {'prompt': prompt}
+            results.append(item)
+            if not parsed_data['success']:
+                item.update(success=False, error=parsed_data.get('error', 'Failed to parse event details'))
+                continue
+            
+            item_nonce = f"{request_nonce}-{i}"
+            parsed_data['request_nonce'] = item_nonce
+            conflicts = check_conflicts(service, parsed_data['date_time'], parsed_data.get('duration_minutes'), busy_prefetch)
+            apply_conflicts(parsed_data, conflicts)
+            item.update(title=parsed_data['title'], start_time=parsed_data['date_time'].strftime('%B %d, %Y at %I:%M %p'))
+            
+            if parsed_data.get('needs_followup', False):
+                item.update(success=False, needs_followup=True, followup_questions=parsed_data.get('followup_questions', []),
+                            conflicts=conflicts, parsed_data=parsed_data)
+                continue
+            
+            if write_behind:
+                job_id = get_outbox().enqueue(
+                    user_id,
+                    parsed_data['title'],
+                    parsed_data['date_time'],
+                    parsed_data.get('duration_minutes'),
+                    parsed_data.get('location'),
+                    parsed_data.get('description', ''),
+                    item_nonce,
+                    parsed_data.get('recurrence')
+                )
+                item.update(success=True, queued=True, job_id=job_id)
+                continue
+            
+            result = create_event(
+                service=service,
+                title=parsed_data['title'],
+                start_time=parsed_data['date_time'],
+                duration_minutes=parsed_data.get('duration_minutes'),
+                location=parsed_data.get('location'),
+                description=parsed_data.get('description', ''),
+                request_nonce=item_nonce,
+                recurrence=parsed_data.get('recurrence')
+            )
+            if result['success']:
+                item.update(success=True, link=result.get('link', 'https://calendar.google.com'))
+            else:
+                item.update(success=False, error=result.get('error', 'Failed to create event'))
+        
+        created = sum(1 for item in results if item['success'])
+        pending = sum(1 for item in results if item.get('needs_followup'))
+        failed = len(results) - created - pending
+        logger.info(f"[SUCCESS] MCP: Bulk add - {created} added, {pending} need follow-up, {failed} failed")
+        return {
+            'success': created > 0,
+            'message': f"{created} of {len(results)} events added, {pending} need more details, {failed} failed.",
+            'created': created,
+            'pending_followup': pending,
+            'failed': failed,
+            'request_nonce': request_nonce,
+            'results': results
+        }
+    
+    except Exception as e:
+        logger.error(f"[ERROR] MCP: Exception in add_calendar_events_bulk_mcp: {e}")
+        return {
+            'success': False,
+            'error': f'Error creating events: {str(e)}'
+        }
+
 def handle_followup_response(original_prompt, followup_response, user_id, original_parsed_data):
     """Handle follow-up responses and create the final event."""
     logger.info(f"[FOLLOWUP] Handling follow-up response: '{followup_response}'")
@@ -342,6 +449,14 @@ def handle_followup_response(original_prompt, followup_response, user_id, origin
                 'needs_auth': True
             }
         
+        # Respect a "no" to a scheduling conflict question
+        if original_parsed_data.get('conflicts') and re.match(r"^\s*(no|nope|cancel|don'?t)\b", followup_response.lower()):
+            logger.info(f"[FOLLOWUP] User declined conflicting slot")
+            return {
+                'success': False,
+                'error': 'Event not created because it conflicts with an existing event.'
+            }
+        
         # Simple parsing of follow-up response
         followup_data = {}
         
@@ -368,7 +483,8 @@ def handle_followup_response(original_prompt, followup_response, user_id, origin
                         break
         
         # If no specific location found, check if the whole response might be a location
-        if 'location' not in followup_data and len(followup_response.strip()) > 3:
+        is_confirmation = re.match(r"^\s*(yes|yeah|yep|sure|ok|okay|book it)\b", followup_response.lower())
+        if 'location' not in followup_data and len(followup_response.strip()) > 3 and not is_confirmation:
             # Check if it doesn't look like a duration
             if not re.search(r'\d+', followup_response):
                 followup_data['location'] = followup_response.strip()
@@ -377,9 +493,34 @@ def handle_followup_response(original_prompt, followup_response, user_id, origin
         # Merge original data with follow-up data
         final_data = original_parsed_data.copy()
         final_data.update(followup_data)
+        final_data.pop('conflicts', None)
+        
+        # Parsed data round-trips through JSON, so the start time may be a string
+        if isinstance(final_data.get('date_time'), str):
+            final_data['date_time'] = datetime.fromisoformat(final_data['date_time'])
+        
+        # The answer can change the slot (e.g. a longer duration), so check it again;
+        # overlaps the user just agreed to aren't asked about twice
+        confirmed = (original_parsed_data.get('conflicts') or []) if is_confirmation else []
+        conflicts = [c for c in check_conflicts(service, final_data['date_time'], final_data.get('duration_minutes')) if c not in confirmed]
+        if conflicts:
+            logger.info(f"[FOLLOWUP] Updated slot conflicts with {len(conflicts)} event(s)")
+            final_data['needs_followup'] = False
+            final_data['followup_questions'] = []
+            apply_conflicts(final_data, conflicts)
+            return {
+                'success': False,
+                'needs_followup': True,
+                'followup_questions': final_data['followup_questions'],
+                'conflicts': conflicts,
+                'parsed_data': final_data,
+                'message': 'Please provide additional details to complete the event creation.'
+            }
         
         logger.info(f"[FOLLOWUP] Final data: {final_data}")
         
+        duration = final_data.get('duration_minutes') or get_default_duration(service)
+        
         # Create the event
         result = create_event(
             service=service,
@@ -387,7 +528,9 @@ def handle_followup_response(original_prompt, followup_response, user_id, origin
             start_time=final_data['date_time'],
             duration_minutes=final_data.get('duration_minutes'),
             location=final_data.get('location'),
-            description=final_data.get('description', '')
+            description=final_data.get('description', ''),
+            request_nonce=final_data.get('request_nonce'),
+            recurrence=final_data.get('recurrence')
         )
         
         if result['success']:
@@ -396,7 +539,7 @@ def handle_followup_response(original_prompt, followup_response, user_id, origin
                 'message': f"Event created successfully!",
                 'title': final_data['title'],
                 'start_time': final_data['date_time'].strftime('%B %d, %Y at %I:%M %p'),
-                'duration': f"{final_data.get('duration_minutes', 60)} minutes",
+                'duration': f"{duration} minutes",
                 'location': final_data.get('location', 'Not specified'),
                 'description': final_data.get('description', ''),
                 'link': result.get('link', 'https://calendar.google.com')
@@ -414,9 +557,9 @@ def handle_followup_response(original_prompt, followup_response, user_id, origin
             'error': f'Error handling follow-up: {str(e)}'
         }
 
-def list_upcoming_events_mcp(max_results=10, user_id=None):
+def list_upcoming_events_mcp(max_results=10, user_id=None, all_calendars=False):
     """List upcoming events using MCP-style interface."""
-    logger.info(f"[MCP] Listing upcoming events - Max: {max_results}, User: {user_id}")
+    logger.info(f"[MCP] Listing upcoming events - Max: {max_results}, User: {user_id}, All calendars: {all_calendars}")
     
     try:
         # Get calendar service
@@ -431,7 +574,7 @@ def list_upcoming_events_mcp(max_results=10, user_id=None):
             }
         
         # List events
-        events = list_upcoming_events(service, max_results)
+        events = list_upcoming_events(service, max_results, all_calendars)
         
         logger.info(f"[SUCCESS] MCP: Successfully listed {len(events)} events")
         return {
@@ -446,6 +589,73 @@ def list_upcoming_events_mcp(max_results=10, user_id=None):
             'error': f'Error listing events: {str(e)}'
         }
 
+def find_free_slots_mcp(user_id, duration_minutes, calendars=None, window_start=None, window_end=None,
+                        working_hours_start='09:00', working_hours_end='17:00', timezone=None, max_results=10):
+    """Find free meeting slots across calendars using MCP-style interface."""
+    logger.info(f"[MCP] Finding free slots - Calendars: {calendars}, Duration: {duration_minutes}, User: {user_id}")
+    
+    try:
+        service = get_calendar_service(user_id)
+        
+        if not service:
+            logger.error(f"[ERROR] MCP: No calendar service available - authentication required")
+            return {
+                'success': False,
+                'error': 'Authentication required. Please login first.',
+                'needs_auth': True
+            }
+        
+        tz = ZoneInfo(timezone) if timezone else get_user_timezone(service)
+        
+        def to_local(value, default):
+            if not value:
+                return default
+            dt = datetime.fromisoformat(value)
+            return dt.replace(tzinfo=tz) if dt.tzinfo is None else dt.astimezone(tz)
+        
+        start = to_local(window_start, datetime.now(tz))
+        end = to_local(window_end, start + timedelta(days=7))
+        if end <= start:
+            return {'success': False, 'error': 'window_end must be after window_start'}
+        
+        calendar_ids = list(dict.fromkeys(calendars or ['primary']))
+        busy, unavailable = query_busy_intervals_many(service, calendar_ids, start, end)
+        if len(unavailable) == len(calendar_ids):
+            return {
+                'success': False,
+                'error': f"Couldn't read availability for {', '.join(unavailable)}",
+                'unavailable_calendars': unavailable
+            }
+        slots = find_free_slots(busy, start, end, int(duration_minutes),
+                                working_hours_start, working_hours_end, max_results=max_results)
+        
+        logger.info(f"[SUCCESS] MCP: Found {len(slots)} free slot(s) from {len(busy)} busy interval(s)")
+        result = {
+            'success': True,
+            'slots': [
+                {
+                    'start': slot['start'].astimezone(tz).isoformat(),
+                    'end': slot['end'].astimezone(tz).isoformat(),
+                    'display': slot['start'].astimezone(tz).strftime('%A, %B %d at %I:%M %p'),
+                    'buffered': slot['buffered']
+                }
+                for slot in slots
+            ],
+            'unavailable_calendars': unavailable
+        }
+        if unavailable:
+            # Unreadable calendars aren't known to be free, so the slots only cover the others
+            result['warning'] = (f"Couldn't read availability for {', '.join(unavailable)}; "
+                                 f"these slots only account for the other calendars.")
+        return result
+        
+    except Exception as e:
+        logger.error(f"[ERROR] MCP: Exception in find_free_slots_mcp: {e}")
+        return {
+            'success': False,
+            'error': f'Error finding free slots: {str(e)}'
+        }
+
 def main():
     """Main function for testing."""
     print("MCP Handlers Module")
@@ -5,16 +5,18 @@ Implements the Model Context Protocol specification.
 """
 
 import json
+import os
 import sys
 import logging
 from datetime import datetime
-import dateparser
-import openai
-import re
 from dotenv import load_dotenv
 
 # Import calendar API functions
-from calendar_api import get_calendar_service, create_event, list_upcoming_events
+from calendar_api import get_calendar_service, list_upcoming_events
+from mcp_handlers import MCP_TOOLS, add_calendar_event_mcp, find_free_slots_mcp, add_calendar_events_bulk_mcp, split_bulk_prompts
+from event_outbox import WRITE_BEHIND, OUTBOX_DB, get_outbox
+from parsing_engine import get_parse_stats
+from rate_limiter import get_quota_stats
 
 # Load environment variables
 load_dotenv()
@@ -30,6 +32,12 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+def json_default(value):
+    """Serialize datetimes in tool results as ISO strings."""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
 class MCPServer:
     """MCP Server implementing the Model Context Protocol."""
     
@@ -49,6 +57,14 @@ class MCPServer:
                             "type": "string",
                             "description": "User identifier for authentication"
                         },
+                        "request_nonce": {
+                            "type": "string",
+                            "description": "Client-generated ID of this logical request; retries with the same nonce never create duplicates"
+                        },
+                        "write_behind": {
+                            "type": "boolean",
+                            "description": "Queue the insert and return a job ID instead of waiting for Google Calendar"
+                        },
                         "chat_context": {
                             "type": "array",
                             "description": "Previous conversation context",
@@ -74,6 +90,10 @@ class MCPServer:
                             "type": "integer",
                             "description": "Maximum number of events to return"
                         },
+                        "all_calendars": {
+                            "type": "boolean",
+                            "description": "Merge events from all of the user's selected calendars instead of only the primary one"
+                        },
                         "user_id": {
                             "type": "string",
                             "description": "User identifier for authentication"
@@ -100,6 +120,14 @@ class MCPServer:
                             "type": "integer",
                             "description": "Duration of the event in minutes"
                         },
+                        "request_nonce": {
+                            "type": "string",
+                            "description": "Client-generated ID of this logical request; retries with the same nonce never create duplicates"
+                        },
+                        "write_behind": {
+                            "type": "boolean",
+                            "description": "Queue the insert and return a job ID instead of waiting for Google Calendar"
+                        },
                         "chat_context": {
                             "type": "array",
                             "description": "Previous conversation context",
@@ -140,185 +168,31 @@ class MCPServer:
                     },
                     "required": ["original_prompt", "followup_response", "user_id", "original_parsed_data"]
                 }
-            }
+            },
+            next(tool for tool in MCP_TOOLS if tool['name'] == 'find_free_slots'),
+            next(tool for tool in MCP_TOOLS if tool['name'] == 'add_calendar_events_bulk')
         ]
     
-    def get_openai_client(self):
-        """Get OpenAI client with API key."""
-        api_key = os.getenv('OPENAI_API_KEY')
-        if not api_key:
-            raise ValueError("OPENAI_API_KEY environment variable not set")
-        return openai.OpenAI(api_key=api_key)
-    
-    def parse_prompt_with_ai(self, text, chat_context=None):
-        """Parse natural language prompt using AI."""
-        logger.info(f"[AI] Parsing prompt: '{text}'")
-        
-        try:
-            client = self.get_openai_client()
-            current_time = datetime.now()
-            
-            messages = [
-                {
-                    "role": "system",
-                    "content": """You are a calendar assistant that extracts event details from natural language. 
-                    Return a JSON object with these fields:
-                    - title: The event title/description
-                    - date_time: The date and time in ISO format (YYYY-MM-DDTHH:MM:SS)
-                    - duration_minutes: Duration in minutes (only if explicitly mentioned)
-                    - location: Location/venue of the event (only if explicitly mentioned)
-                    - description: A brief description of the event (generate if not provided)
-                    - needs_followup: Boolean indicating if follow-up questions are needed
-                    - followup_questions: Array of questions to ask the user
-                    
-                    IMPORTANT: 
-                    - Use 2025 as the current year. Today is 2025-08-06.
-                    - Current time is """ + current_time.strftime('%H:%M') + """
-                    - For relative times like "in 2 hours", calculate from current time
-                    - Set needs_followup to TRUE if duration_minutes is null/not provided
-                    - Set needs_followup to TRUE if location is not explicitly mentioned
-                    - Do NOT provide default values for missing information
-                    - Only set location if it's explicitly mentioned in the prompt
-                    - Only set duration_minutes if it's explicitly mentioned in the prompt
-                    - Generate meaningful descriptions based on the event type
-                    
-                    Examples:
-                    "team meeting tomorrow at 3pm" → needs_followup: true, followup_questions: ["What's the duration?", "Where is the meeting?"]
-                    "doctor appointment on Friday 2pm for 30 minutes at City Medical Center" → needs_followup: false
-                    
-                    Return only valid JSON."""
-                }
-            ]
-            
-            if chat_context:
-                messages.extend(chat_context)
-            
-            messages.append({
-                "role": "user",
-                "content": f"Parse this calendar prompt: '{text}'"
-            })
-            
-            # Add better error handling and timeout for Windows compatibility
-            try:
-                response = client.chat.completions.create(
-                    model="gpt-3.5-turbo",
-                    messages=messages,
-                    temperature=0.1,
-                    timeout=30  # 30 second timeout for OpenAI API
-                )
-                
-                content = response.choices[0].message.content.strip()
-                logger.info(f"[AI] Response: {content}")
-                
-                # Extract JSON from response
-                json_match = re.search(r'\{.*\}', content, re.DOTALL)
-                if json_match:
-                    parsed_data = json.loads(json_match.group())
-                else:
-                    parsed_data = json.loads(content)
-                
-                # Parse datetime
-                date_time_str = parsed_data.get('date_time')
-                if date_time_str:
-                    parsed_datetime = datetime.fromisoformat(date_time_str.replace('Z', '+00:00'))
-                else:
-                    raise ValueError("No date_time in response")
-                
-                return {
-                    'success': True,
-                    'title': parsed_data.get('title', 'Untitled Event'),
-                    'date_time': parsed_datetime,
-                    'duration_minutes': parsed_data.get('duration_minutes'),
-                    'location': parsed_data.get('location'),
-                    'description': parsed_data.get('description', ''),
-                    'needs_followup': parsed_data.get('needs_followup', False),
-                    'followup_questions': parsed_data.get('followup_questions', [])
-                }
-                
-            except Exception as api_error:
-                logger.error(f"[ERROR] OpenAI API call failed: {api_error}")
-                return {'success': False, 'error': f'OpenAI API error: {str(api_error)}'}
-            
-        except Exception as e:
-            logger.error(f"[ERROR] AI parsing failed: {e}")
-            return {'success': False, 'error': str(e)}
-    
-    def handle_add_calendar_event(self, params):
-        """Handle add_calendar_event tool call."""
+    def handle_add_calendar_event(self, params, on_progress=None):
+        """Handle add_calendar_event tool call; on_progress receives partial parse fields."""
         logger.info(f"[MCP] add_calendar_event called with params: {params}")
         
-        try:
-            prompt = params.get('prompt', '')
-            user_id = params.get('user_id', '')
-            chat_context = params.get('chat_context', [])
-            
-            if not prompt or not user_id:
-                return {
-                    'success': False,
-                    'error': 'Missing required parameters: prompt and user_id'
-                }
-            
-            # Get calendar service
-            service = get_calendar_service(user_id)
-            if not service:
-                return {
-                    'success': False,
-                    'error': 'Authentication required. Please login first.',
-                    'needs_auth': True
-                }
-            
-            # Parse the prompt
-            parsed_data = self.parse_prompt_with_ai(prompt, chat_context)
-            
-            if not parsed_data['success']:
-                return {
-                    'success': False,
-                    'error': parsed_data.get('error', 'Failed to parse event details')
-                }
-            
-            # Check if follow-up questions are needed
-            if parsed_data.get('needs_followup', False):
-                return {
-                    'success': False,
-                    'needs_followup': True,
-                    'followup_questions': parsed_data.get('followup_questions', []),
-                    'parsed_data': parsed_data,
-                    'message': 'Please provide additional details to complete the event creation.'
-                }
-            
-            # Create the event
-            result = create_event(
-                service=service,
-                title=parsed_data['title'],
-                start_time=parsed_data['date_time'],
-                duration_minutes=parsed_data.get('duration_minutes'),
-                location=parsed_data.get('location'),
-                description=parsed_data.get('description', '')
-            )
-            
-            if result['success']:
-                return {
-                    'success': True,
-                    'message': 'Event created successfully!',
-                    'title': parsed_data['title'],
-                    'start_time': parsed_data['date_time'].strftime('%B %d, %Y at %I:%M %p'),
-                    'duration': f"{parsed_data.get('duration_minutes', 60)} minutes",
-                    'location': parsed_data.get('location', 'Not specified'),
-                    'description': parsed_data.get('description', ''),
-                    'link': result.get('link', 'https://calendar.google.com')
-                }
-            else:
-                return {
-                    'success': False,
-                    'error': result.get('error', 'Failed to create event')
-                }
-                
-        except Exception as e:
-            logger.error(f"[ERROR] Exception in add_calendar_event: {e}")
+        prompt = params.get('prompt', '')
+        user_id = params.get('user_id', '')
+        if not prompt or not user_id:
             return {
                 'success': False,
-                'error': f'Error creating event: {str(e)}'
+                'error': 'Missing required parameters: prompt and user_id'
             }
+        
+        return add_calendar_event_mcp(
+            prompt,
+            user_id,
+            chat_context=params.get('chat_context', []),
+            request_nonce=params.get('request_nonce'),
+            write_behind=params.get('write_behind', WRITE_BEHIND),
+            on_progress=on_progress
+        )
     
     def handle_list_upcoming_events(self, params):
         """Handle list_upcoming_events tool call."""
@@ -327,6 +201,7 @@ class MCPServer:
         try:
             max_results = params.get('max_results', 10)
             user_id = params.get('user_id', '')
+            all_calendars = params.get('all_calendars', False)
             
             if not user_id:
                 return {
@@ -344,7 +219,7 @@ class MCPServer:
                 }
             
             # List events
-            events = list_upcoming_events(service, max_results)
+            events = list_upcoming_events(service, max_results, all_calendars)
             
             return {
                 'success': True,
@@ -359,75 +234,26 @@ class MCPServer:
             }
     
     def handle_add_calendar_event_with_duration(self, params):
-        """Handle add_calendar_event_with_duration tool call."""
+        """Handle add_calendar_event_with_duration tool call (the web UI's confirm step)."""
         logger.info(f"[MCP] add_calendar_event_with_duration called with params: {params}")
         
-        try:
-            prompt = params.get('prompt', '')
-            user_id = params.get('user_id', '')
-            duration_minutes = params.get('duration_minutes', 60)
-            chat_context = params.get('chat_context', [])
-            
-            if not prompt or not user_id:
-                return {
-                    'success': False,
-                    'error': 'Missing required parameters: prompt and user_id'
-                }
-            
-            # Get calendar service
-            service = get_calendar_service(user_id)
-            if not service:
-                return {
-                    'success': False,
-                    'error': 'Authentication required. Please login first.',
-                    'needs_auth': True
-                }
-            
-            # Parse the prompt with AI
-            parsed_data = self.parse_prompt_with_ai(prompt, chat_context)
-            
-            if not parsed_data or not parsed_data.get('success'):
-                return {
-                    'success': False,
-                    'error': parsed_data.get('error', 'Failed to parse event details') if parsed_data else 'Failed to parse event details'
-                }
-            
-            # Override duration with provided value
-            parsed_data['duration_minutes'] = duration_minutes
-            
-            # Create the event
-            result = create_event(
-                service=service,
-                title=parsed_data['title'],
-                start_time=parsed_data['date_time'],
-                duration_minutes=duration_minutes,
-                location=parsed_data.get('location'),
-                description=parsed_data.get('description', '')
-            )
-            
-            if result['success']:
-                return {
-                    'success': True,
-                    'message': 'Event created successfully!',
-                    'title': parsed_data['title'],
-                    'start_time': parsed_data['date_time'].strftime('%B %d, %Y at %I:%M %p'),
-                    'duration': f"{duration_minutes} minutes",
-                    'location': parsed_data.get('location', 'Not specified'),
-                    'description': parsed_data.get('description', ''),
-                    'link': result.get('link', 'https://calendar.google.com')
-                }
-            else:
-                return {
-                    'success': False,
-                    'error': result.get('error', 'Failed to create event')
-                }
-                
-        except Exception as e:
-            logger.error(f"[ERROR] Exception in add_calendar_event_with_duration: {e}")
+        prompt = params.get('prompt', '')
+        user_id = params.get('user_id', '')
+        if not prompt or not user_id:
             return {
                 'success': False,
-                'error': f'Error creating event: {str(e)}'
+                'error': 'Missing required parameters: prompt and user_id'
             }
+        
+        # Same staged flow as add_calendar_event: auth and the busy prefetch overlap the parse
+        return add_calendar_event_mcp(
+            prompt,
+            user_id,
+            chat_context=params.get('chat_context', []),
+            request_nonce=params.get('request_nonce'),
+            write_behind=params.get('write_behind', WRITE_BEHIND),
+            duration_minutes=params.get('duration_minutes', 60)
+        )
     
     def handle_followup_response(self, params):
         """Handle handle_followup_response tool call."""
@@ -469,22 +295,92 @@ class MCPServer:
                 'error': f'Error handling followup response: {str(e)}'
             }
     
-    def handle_tool_call(self, tool_name, params):
+    def handle_add_calendar_events_bulk(self, params):
+        """Handle add_calendar_events_bulk tool call."""
+        logger.info(f"[MCP] add_calendar_events_bulk called with params: {params}")
+        
+        user_id = params.get('user_id', '')
+        prompts = split_bulk_prompts(params.get('prompts'), params.get('text'))
+        if not prompts or not user_id:
+            return {
+                'success': False,
+                'error': 'Missing required parameters: prompts (or text) and user_id'
+            }
+        
+        return add_calendar_events_bulk_mcp(
+            prompts,
+            user_id,
+            request_nonce=params.get('request_nonce'),
+            write_behind=params.get('write_behind', WRITE_BEHIND)
+        )
+    
+    def handle_find_free_slots(self, params):
+        """Handle find_free_slots tool call."""
+        logger.info(f"[MCP] find_free_slots called with params: {params}")
+        
+        user_id = params.get('user_id', '')
+        duration_minutes = params.get('duration_minutes')
+        
+        if not user_id or not duration_minutes:
+            return {
+                'success': False,
+                'error': 'Missing required parameters: user_id and duration_minutes'
+            }
+        
+        return find_free_slots_mcp(
+            user_id=user_id,
+            duration_minutes=duration_minutes,
+            calendars=params.get('calendars'),
+            window_start=params.get('window_start'),
+            window_end=params.get('window_end'),
+            working_hours_start=params.get('working_hours_start', '09:00'),
+            working_hours_end=params.get('working_hours_end', '17:00'),
+            timezone=params.get('timezone'),
+            max_results=params.get('max_results', 10)
+        )
+    
+    def handle_tool_call(self, tool_name, params, on_progress=None):
         """Route tool calls to appropriate handlers."""
         if tool_name == "add_calendar_event":
-            return self.handle_add_calendar_event(params)
+            return self.handle_add_calendar_event(params, on_progress)
         elif tool_name == "list_upcoming_events":
             return self.handle_list_upcoming_events(params)
         elif tool_name == "add_calendar_event_with_duration":
             return self.handle_add_calendar_event_with_duration(params)
         elif tool_name == "handle_followup_response":
             return self.handle_followup_response(params)
+        elif tool_name == "find_free_slots":
+            return self.handle_find_free_slots(params)
+        elif tool_name == "add_calendar_events_bulk":
+            return self.handle_add_calendar_events_bulk(params)
         else:
             return {
                 'success': False,
                 'error': f'Unknown tool: {tool_name}'
             }
     
+    def send_message(self, message):
+        """Write one JSON-RPC message to stdout."""
+        message_json = json.dumps(message, default=json_default)
+        logger.info(f"[MCP] Sending message: {message_json}")
+        print(message_json, flush=True)
+    
+    def progress_notifier(self, progress_token):
+        """Build an on_progress callback that forwards partial parse fields as notifications/progress."""
+        def notify(fields, ready):
+            self.send_message({
+                "jsonrpc": "2.0",
+                "method": "notifications/progress",
+                "params": {
+                    "progressToken": progress_token,
+                    "progress": len(fields),
+                    "message": "Event details ready" if ready else "Parsing event details",
+                    "fields": fields,
+                    "ready": ready
+                }
+            })
+        return notify
+    
     def process_request(self, request):
         """Process JSON-RPC request."""
         try:
@@ -507,12 +403,26 @@ class MCPServer:
                         "tools": self.tools
                     }
                 }
+            elif method == "stats":
+                # Calendar quota and prompt parsing counters of this process
+                response = {
+                    "jsonrpc": "2.0",
+                    "id": request_id,
+                    "result": {
+                        "quota": get_quota_stats(),
+                        "parsing": get_parse_stats()
+                    }
+                }
             elif method == "tools/call":
                 # Handle tool call
                 tool_name = params.get('name')
                 tool_params = params.get('arguments', {})
                 
-                result = self.handle_tool_call(tool_name, tool_params)
+                # Clients that send a progress token get partial results as notifications
+                progress_token = (params.get('_meta') or {}).get('progressToken')
+                on_progress = self.progress_notifier(progress_token) if progress_token is not None else None
+                
+                result = self.handle_tool_call(tool_name, tool_params, on_progress)
                 
                 response = {
                     "jsonrpc": "2.0",
@@ -521,7 +431,7 @@ class MCPServer:
                         "content": [
                             {
                                 "type": "text",
-                                "text": json.dumps(result, indent=2)
+                                "text": json.dumps(result, indent=2, default=json_default)
                             }
                         ]
                     }
@@ -555,6 +465,10 @@ class MCPServer:
         logger.info("[MCP] Server starting...")
         print("MCP Server started", file=sys.stderr)  # Debug output
         
+        # Drain inserts left queued by a previous run
+        if WRITE_BEHIND or os.path.exists(OUTBOX_DB):
+            get_outbox()
+        
         try:
             while True:
                 try:
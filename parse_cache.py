@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Parse Cache Module
+Caches AI parse results keyed by normalized prompt and the date/time it was resolved against.
+"""
+
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import closing
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+PARSE_CACHE_SIZE = int(os.getenv('PARSE_CACHE_SIZE', '1024'))
+PARSE_CACHE_TTL = int(os.getenv('PARSE_CACHE_TTL', str(6 * 3600)))
+
+# Optional second tier shared across processes and restarts (disabled when unset)
+PARSE_CACHE_DB = os.getenv('PARSE_CACHE_DB', '')
+
+# Prompts whose meaning changes by the minute are anchored to the minute, the rest to the day
+_MINUTE_RELATIVE = re.compile(
+    r'\b(now|right away|asap|in\s+(?:an?|\d+|a few|a couple(?: of)?)\s*(?:min(?:ute)?s?|hours?|hrs?)|'
+    r'(?:half|quarter) (?:an )?hour|later today|this (?:morning|afternoon|evening))\b'
+)
+_PUNCTUATION = re.compile(r"[^\w\s:/@&+-]")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS parse_cache (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+"""
+
+def normalize_prompt(text):
+    """Lowercase, drop punctuation that doesn't change meaning and collapse whitespace."""
+    text = _PUNCTUATION.sub(' ', text.lower())
+    return re.sub(r'\s+', ' ', text).strip()
+
+def time_anchor(normalized, current_time):
+    """Resolved 'now' the prompt depends on, so "tomorrow" never goes stale across midnight."""
+    if _MINUTE_RELATIVE.search(normalized):
+        return current_time.strftime('%Y-%m-%dT%H:%M')
+    return current_time.strftime('%Y-%m-%d')
+
+def _dump(result):
+    return json.dumps({**result, 'date_time': result['date_time'].isoformat()})
+
+def _load(value):
+    result = json.loads(value)
+    result['date_time'] = datetime.fromisoformat(result['date_time'])
+    return result
+
+class ParseCache:
+    """In-memory LRU of parse results with TTLs and an optional SQLite tier.
+
+    Keys start with the namespace (prompt version and model), so answers from
+    an older prompt or model are never served after either changes.
+    """
+
+    def __init__(self, max_entries=PARSE_CACHE_SIZE, ttl=PARSE_CACHE_TTL, db_path=PARSE_CACHE_DB, clock=time.time,
+                 namespace=''):
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.db_path = db_path
+        self.clock = clock
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.stats = {'hits': 0, 'sqlite_hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0, 'expired': 0}
+        if self.db_path:
+            with closing(self._connect()) as conn:
+                conn.executescript(SCHEMA)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=5, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        return conn
+
+    def make_key(self, text, current_time):
+        normalized = normalize_prompt(text)
+        # The UTC offset keeps users in different zones apart on the same date
+        return f"{self.namespace}|{time_anchor(normalized, current_time)}|{current_time.utcoffset()}|{normalized}"
+
+    def get(self, text, current_time):
+        """Return a fresh copy of the cached result, or None."""
+        key = self.make_key(text, current_time)
+        now = self.clock()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] <= now:
+                del self.entries[key]
+                self.stats['expired'] += 1
+                entry = None
+            if entry is not None:
+                self.entries.move_to_end(key)
+                self.stats['hits'] += 1
+        if entry is not None:
+            return _load(entry[1])
+
+        value = self._sqlite_get(key, now)
+        with self.lock:
+            if value is None:
+                self.stats['misses'] += 1
+                return None
+            self.stats['sqlite_hits'] += 1
+            self._remember(key, value[0], value[1])
+        return _load(value[1])
+
+    def put(self, text, current_time, result):
+        """Cache a successful parse."""
+        key = self.make_key(text, current_time)
+        value = _dump(result)
+        expires_at = self.clock() + self.ttl
+        with self.lock:
+            self._remember(key, expires_at, value)
+            self.stats['stores'] += 1
+        self._sqlite_put(key, value, expires_at)
+
+    def _remember(self, key, expires_at, value):
+        self.entries[key] = (expires_at, value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.stats['evictions'] += 1
+
+    def _sqlite_get(self, key, now):
+        if not self.db_path:
+            return None
+        try:
+            with closing(self._connect()) as conn:
+                row = conn.execute("SELECT expires_at, value FROM parse_cache WHERE key = ? AND expires_at > ?", (key, now)).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"[CACHE] SQLite read failed: {e}")
+            return None
+        return row
+
+    def _sqlite_put(self, key, value, expires_at):
+        if not self.db_path:
+            return
+        try:
+            with closing(self._connect()) as conn:
+                conn.execute("INSERT OR REPLACE INTO parse_cache (key, value, expires_at) VALUES (?, ?, ?)", (key, value, expires_at))
+                conn.execute("DELETE FROM parse_cache WHERE expires_at <= ?", (self.clock(),))
+        except sqlite3.Error as e:
+            logger.warning(f"[CACHE] SQLite write failed: {e}")
+
+    def get_stats(self):
+        """Hit/miss counters plus the current hit rate."""
+        with self.lock:
+            stats = dict(self.stats, size=len(self.entries))
+        lookups = stats['hits'] + stats['sqlite_hits'] + stats['misses']
+        stats['hit_rate'] = (stats['hits'] + stats['sqlite_hits']) / lookups if lookups else 0.0
+        return stats
+
+_parse_caches = {}
+_parse_cache_lock = threading.Lock()
+
+def get_parse_cache(namespace=''):
+    """Get the process-wide parse cache for a namespace."""
+    with _parse_cache_lock:
+        if namespace not in _parse_caches:
+            _parse_caches[namespace] = ParseCache(namespace=namespace)
+        return _parse_caches[namespace]
@@ -0,0 +1,619 @@
+#!/usr/bin/env python3
+"""
+Parsing Engine Module
+Natural language event parsing shared by the MCP server, MCP handlers and simple client.
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from functools import lru_cache
+from datetime import datetime
+from typing import List, Optional
+
+from dateparser.date import DateDataParser
+import httpx
+import openai
+from dotenv import load_dotenv
+
+from recurrence import extract_recurrence, resolve_recurrence, first_occurrence
+from parse_cache import get_parse_cache
+from similarity_cache import SIMILARITY_CACHE, get_similarity_cache
+from fast_parser import fast_parse, FAST_PARSE_THRESHOLD
+from context_window import fit_context
+from json_stream import JsonFieldStream
+from circuit_breaker import CircuitBreaker
+from hedging import LLM_HEDGING, Hedger
+from concurrency_limiter import AdaptiveLimiter, LimiterTimeout
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+OPENAI_MODEL = os.getenv('OPENAI_MODEL', 'gpt-3.5-turbo')
+
+# Connection pool and timeouts of the shared OpenAI client
+OPENAI_TIMEOUT = float(os.getenv('OPENAI_TIMEOUT', '30'))
+OPENAI_CONNECT_TIMEOUT = float(os.getenv('OPENAI_CONNECT_TIMEOUT', '5'))
+OPENAI_MAX_CONNECTIONS = int(os.getenv('OPENAI_MAX_CONNECTIONS', '20'))
+OPENAI_MAX_KEEPALIVE = int(os.getenv('OPENAI_MAX_KEEPALIVE', '10'))
+OPENAI_KEEPALIVE_EXPIRY = float(os.getenv('OPENAI_KEEPALIVE_EXPIRY', '60'))
+
+# Most prompts packed into one batch parse request
+PARSE_BATCH_SIZE = int(os.getenv('PARSE_BATCH_SIZE', '10'))
+
+# Languages the dateparser fallback reads; a fixed set skips its slow language detection
+DATEPARSER_LANGUAGES = [lang.strip() for lang in os.getenv('DATEPARSER_LANGUAGES', 'en').split(',') if lang.strip()]
+
+_openai_client = None
+_openai_client_lock = threading.Lock()
+
+# Where parse results came from: fast-path grammar, cache, model or dateparser fallback
+_parse_stats = {'fast': 0, 'cache': 0, 'similar': 0, 'ai': 0, 'fallback': 0}
+_parse_stats_lock = threading.Lock()
+
+# Sends prompts to the local parser while OpenAI is slow or failing
+llm_breaker = CircuitBreaker('openai')
+
+# Optional second request when the first runs past the recent latency percentile
+llm_hedger = Hedger('openai', llm_breaker.window)
+
+def _is_overload(error):
+    """429s and timeouts mean OpenAI is congested; other errors say nothing about load."""
+    return isinstance(error, (openai.RateLimitError, openai.APITimeoutError, httpx.TimeoutException))
+
+# Adaptive cap on concurrent OpenAI calls, shared fairly between users
+llm_limiter = AdaptiveLimiter('openai', _is_overload)
+
+def get_openai_client():
+    """Get the process-wide OpenAI client, creating it on first use.
+
+    One client means one keep-alive connection pool, so prompts after the
+    first skip the TCP and TLS handshakes. Every call it makes goes through
+    llm_limiter, so the SDK does not retry: a 429 has to reach the limiter
+    to shrink it, and the local fallback covers the failed prompt.
+    """
+    global _openai_client
+    if _openai_client is not None:
+        return _openai_client
+    with _openai_client_lock:
+        if _openai_client is None:
+            api_key = os.getenv('OPENAI_API_KEY')
+            if not api_key:
+                raise ValueError("OPENAI_API_KEY environment variable not set")
+            http_client = httpx.Client(
+                limits=httpx.Limits(
+                    max_connections=OPENAI_MAX_CONNECTIONS,
+                    max_keepalive_connections=OPENAI_MAX_KEEPALIVE,
+                    keepalive_expiry=OPENAI_KEEPALIVE_EXPIRY,
+                ),
+                timeout=httpx.Timeout(OPENAI_TIMEOUT, connect=OPENAI_CONNECT_TIMEOUT),
+            )
+            _openai_client = openai.OpenAI(api_key=api_key, http_client=http_client, max_retries=0)
+            logger.info(f"[AI] Created shared OpenAI client (pool {OPENAI_MAX_CONNECTIONS}, timeout {OPENAI_TIMEOUT}s)")
+        return _openai_client
+
+# Function the model must call; the schema mirrors ParseResult
+PARSE_EVENT_TOOL = {
+    "type": "function",
+    "function": {
+        "name": "record_event",
+        "description": "Record the calendar event described by the user",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "title": {"type": "string", "description": "The event title"},
+                "date_time": {"type": "string", "description": "Start in ISO format (YYYY-MM-DDTHH:MM:SS)"},
+                "duration_minutes": {"type": ["integer", "null"], "description": "Only if explicitly mentioned"},
+                "location": {"type": ["string", "null"], "description": "Only if explicitly mentioned"},
+                "description": {"type": "string", "description": "A brief description (generate if not provided)"},
+                "recurrence": {"type": ["string", "null"], "description": "RRULE line if the event repeats, e.g. RRULE:FREQ=WEEKLY;BYDAY=MO,WE"},
+                "needs_followup": {"type": "boolean"},
+                "followup_questions": {"type": "array", "items": {"type": "string"}},
+            },
+            "required": ["title", "date_time", "needs_followup"],
+        },
+    },
+}
+
+# Batch variant: one entry per numbered prompt
+PARSE_EVENTS_TOOL = {
+    "type": "function",
+    "function": {
+        "name": "record_events",
+        "description": "Record one calendar event per numbered prompt",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "events": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "index": {"type": "integer", "description": "Number of the prompt this entry is for"},
+                            **PARSE_EVENT_TOOL["function"]["parameters"]["properties"],
+                        },
+                        "required": ["index", "title", "date_time", "needs_followup"],
+                    },
+                },
+            },
+            "required": ["events"],
+        },
+    },
+}
+
+# Bump whenever SYSTEM_PROMPT or PARSE_EVENT_TOOL changes
+PROMPT_VERSION = 3
+# Cached parses are only valid for the prompt and model that produced them
+PARSE_CACHE_NAMESPACE = f"v{PROMPT_VERSION}:{OPENAI_MODEL}"
+
+# Static so the provider can cache the prefix; anything that varies per
+# request belongs in build_context_message
+SYSTEM_PROMPT = """You are a calendar assistant that extracts event details from natural language.
+Call record_event with the details of the event.
+
+Rules:
+- Resolve dates and relative times ("in 2 hours") from the current time given in the last system message.
+- Only set duration_minutes and location if the prompt states them; never invent defaults.
+- Set needs_followup to true and ask for whatever is missing.
+- Write a short description based on the event type.
+
+Examples (current time Wednesday, 2025-08-06 11:10):
+"call with John in 2 hours" -> {"title": "call with John", "date_time": "2025-08-06T13:10:00", "description": "Call", "needs_followup": true, "followup_questions": ["What's the duration?", "Is this a video call?"]}
+"standup every weekday at 9:30 for 15 minutes in Room 4" -> {"title": "standup", "date_time": "2025-08-07T09:30:00", "duration_minutes": 15, "location": "Room 4", "description": "Daily standup", "recurrence": "RRULE:FREQ=WEEKLY;BYDAY=MO,TU,WE,TH,FR", "needs_followup": false}"""
+
+BATCH_INSTRUCTIONS = """Several prompts follow, numbered from 0. Call record_events once with one entry per prompt, each carrying its number as index."""
+
+def build_context_message(current_time):
+    """Short per-request message carrying the user's current date and time."""
+    return {
+        "role": "system",
+        "content": f"Current time: {current_time.strftime('%A, %Y-%m-%d %H:%M')} in the user's timezone."
+    }
+
+@dataclass
+class ParseResult:
+    """Validated event details decoded from the model's record_event call."""
+    title: str
+    date_time: datetime
+    duration_minutes: Optional[int] = None
+    location: Optional[str] = None
+    description: str = ''
+    recurrence: Optional[str] = None
+    needs_followup: bool = False
+    followup_questions: List[str] = field(default_factory=list)
+
+    @classmethod
+    def from_arguments(cls, arguments, text):
+        """Decode and validate tool-call arguments; raises ValueError when unusable."""
+        data = json.loads(arguments) if isinstance(arguments, str) else arguments
+        if not isinstance(data, dict):
+            raise ValueError("Tool arguments are not an object")
+
+        title = data.get('title')
+        if not isinstance(title, str) or not title.strip():
+            raise ValueError("Missing title")
+        date_time = data.get('date_time')
+        if not isinstance(date_time, str):
+            raise ValueError("Missing date_time")
+        start = datetime.fromisoformat(date_time.replace('Z', '+00:00'))
+
+        duration = data.get('duration_minutes')
+        if duration is not None:
+            if isinstance(duration, bool) or not isinstance(duration, (int, float)) or not 0 < duration <= 24 * 60:
+                raise ValueError(f"Invalid duration_minutes: {duration!r}")
+            duration = int(duration)
+
+        location = data.get('location')
+        if location is not None and not isinstance(location, str):
+            raise ValueError(f"Invalid location: {location!r}")
+        location = location.strip() if location and location.strip() else None
+
+        questions = data.get('followup_questions') or []
+        if not isinstance(questions, list) or not all(isinstance(q, str) for q in questions):
+            raise ValueError("Invalid followup_questions")
+
+        # Local grammar first, then the model's rule if it validates
+        recurrence = resolve_recurrence(text, data.get('recurrence'))
+        if recurrence:
+            start = first_occurrence(recurrence, start)
+
+        # Missing details always need asking, whatever the model said
+        needs_followup = bool(data.get('needs_followup')) or duration is None or location is None
+        if needs_followup and not questions:
+            if duration is None:
+                questions.append("What's the duration?")
+            if location is None:
+                questions.append('Where is this event?')
+
+        description = data.get('description')
+        return cls(
+            title=title.strip(),
+            date_time=start,
+            duration_minutes=duration,
+            location=location,
+            description=description if isinstance(description, str) else '',
+            recurrence=recurrence,
+            needs_followup=needs_followup,
+            followup_questions=questions,
+        )
+
+    def to_dict(self):
+        """The parse-result dict the handlers and MCP tools pass around."""
+        return {
+            'success': True,
+            'title': self.title,
+            'date_time': self.date_time,
+            'duration_minutes': self.duration_minutes,
+            'location': self.location,
+            'description': self.description,
+            'needs_followup': self.needs_followup,
+            'followup_questions': self.followup_questions,
+            'recurrence': self.recurrence,
+            'source': 'ai'
+        }
+
+def parse_prompt_with_ai(text, chat_context=None, current_time=None, on_progress=None, user_id=None):
+    """Parse natural language prompt using AI to extract event details including location.
+
+    Common prompt shapes are handled by the fast-path grammar and model
+    answers are cached per normalized prompt and date anchor, and reused
+    for reworded prompts via the similarity cache. Chat context is trimmed
+    to CONTEXT_TOKEN_BUDGET first. Falls back to parse_prompt when the
+    model is unavailable or its answer is unusable.
+
+    The model's answer is streamed; on_progress(fields, ready) is called
+    with the fields decoded so far each time one completes, and ready turns
+    true once title and date_time are both known. user_id keys the fair
+    share of the OpenAI concurrency limit.
+    """
+    current_time = current_time or datetime.now()
+    # Older turns are summarized to keep the request inside the token budget
+    chat_context = fit_context(chat_context, text, current_time=current_time)
+    # Follow-up turns depend on the conversation, so only standalone prompts skip the model
+    if not chat_context:
+        local = _parse_locally(text, current_time)
+        if local is not None:
+            return local
+
+    result = _parse_with_model(text, chat_context, current_time, on_progress, user_id)
+    _record(text, current_time, result, cacheable=not chat_context)
+    return result
+
+def parse_prompts_with_ai(texts, current_time=None, batch_size=PARSE_BATCH_SIZE, user_id=None):
+    """Parse several standalone prompts, packing the ones the model must see into shared requests.
+
+    Returns one result per prompt, in order; each is a parse result or
+    {'success': False, 'error': ...}. Items the model gets wrong fall back
+    to parse_prompt on their own without failing the rest of the batch.
+    """
+    current_time = current_time or datetime.now()
+    results = [None] * len(texts)
+    pending = []
+    for i, text in enumerate(texts):
+        if not isinstance(text, str) or not text.strip():
+            results[i] = {'success': False, 'error': 'Empty prompt'}
+            continue
+        results[i] = _parse_locally(text, current_time)
+        if results[i] is None:
+            pending.append(i)
+
+    batch_size = max(batch_size, 1)
+    for start in range(0, len(pending), batch_size):
+        chunk = pending[start:start + batch_size]
+        if len(chunk) == 1:
+            parsed = [_parse_with_model(texts[chunk[0]], None, current_time, user_id=user_id)]
+        else:
+            parsed = _parse_batch_with_model([texts[i] for i in chunk], current_time, user_id)
+        for i, result in zip(chunk, parsed):
+            _record(texts[i], current_time, result)
+            results[i] = result
+    return results
+
+def _parse_locally(text, current_time):
+    """Answer from the fast-path grammar, the parse cache or a near-duplicate prompt, or None if the model is needed."""
+    fast = fast_parse(text, current_time)
+    if fast['success'] and fast['confidence'] >= FAST_PARSE_THRESHOLD:
+        logger.info(f"[FAST] Parsed locally with confidence {fast['confidence']}: '{text}'")
+        _count('fast')
+        return fast
+    cached = get_parse_cache(PARSE_CACHE_NAMESPACE).get(text, current_time)
+    if cached is not None:
+        logger.info(f"[CACHE] Parse cache hit for prompt: '{text}'")
+        _count('cache')
+        return cached
+    if SIMILARITY_CACHE:
+        similar = get_similarity_cache().get(text, current_time)
+        if similar is not None:
+            _count('similar')
+            return similar
+    return None
+
+def _record(text, current_time, result, cacheable=True):
+    """Count where a model-path result came from and cache usable model answers."""
+    _count(result.get('source', 'fallback'))
+    if cacheable and result.get('source') == 'ai':
+        get_parse_cache(PARSE_CACHE_NAMESPACE).put(text, current_time, result)
+        if SIMILARITY_CACHE:
+            get_similarity_cache().put(text, current_time, result)
+
+def _count(source):
+    with _parse_stats_lock:
+        _parse_stats[source] = _parse_stats.get(source, 0) + 1
+
+def get_parse_stats():
+    """How many prompts each parser handled, and the share kept away from OpenAI."""
+    with _parse_stats_lock:
+        stats = dict(_parse_stats)
+    total = sum(stats.values())
+    stats['offloaded'] = (stats['fast'] + stats['cache'] + stats['similar']) / total if total else 0.0
+    stats['breaker'] = llm_breaker.get_stats()
+    stats['hedging'] = llm_hedger.get_stats()
+    stats['concurrency'] = llm_limiter.get_stats()
+    return stats
+
+def _parse_with_model(text, chat_context, current_time, on_progress=None, user_id=None):
+    logger.info(f"[AI] Starting AI parsing for prompt: '{text}'")
+
+    if not llm_breaker.allow():
+        logger.warning(f"[BREAKER] OpenAI is degraded, parsing locally: '{text}'")
+        return _parse_degraded(text, current_time)
+
+    started = time.monotonic()
+    try:
+        logger.info(f"[CONTEXT] Current context - Date: {current_time.strftime('%Y-%m-%d')}, Time: {current_time.strftime('%H:%M')}")
+
+        # Static prefix first, then the conversation, then what changes every request
+        messages = [{"role": "system", "content": SYSTEM_PROMPT}]
+
+        # Add chat context if available
+        if chat_context:
+            messages.extend(chat_context)
+
+        messages.append(build_context_message(current_time))
+
+        # Add current prompt
+        messages.append({
+            "role": "user",
+            "content": f"Parse this calendar prompt: '{text}'"
+        })
+
+        logger.info(f"[API] Sending request to OpenAI API (prompt v{PROMPT_VERSION})...")
+
+        # With hedging, whichever attempt reports fields first owns on_progress
+        progress_owner = []
+        def attempt(cancelled=None):
+            def progress(fields, ready):
+                if not progress_owner:
+                    progress_owner.append(cancelled)
+                if on_progress and progress_owner[0] is cancelled:
+                    on_progress(fields, ready)
+            with llm_limiter.slot(user_id):
+                attempt_started = time.monotonic()
+                try:
+                    outcome = _stream_tool_call(get_openai_client(), messages, progress, cancelled)
+                except Exception:
+                    if cancelled is None or not cancelled.is_set():
+                        llm_breaker.record(time.monotonic() - attempt_started, ok=False)
+                    raise
+            # A hedge loser that finishes after being cancelled isn't a latency sample
+            if outcome is not None and (cancelled is None or not cancelled.is_set()):
+                llm_breaker.record(time.monotonic() - attempt_started)
+            return outcome
+
+        fields, content, ready_after = llm_hedger.run(attempt) if LLM_HEDGING else attempt()
+    except LimiterTimeout as e:
+        llm_breaker.cancel()
+        logger.warning(f"[LIMITER] {e}; parsing locally")
+        return _parse_degraded(text, current_time)
+    except Exception as e:
+        logger.error(f"[ERROR] AI parsing failed: {e}")
+        return parse_prompt(text, current_time)
+    elapsed = time.monotonic() - started
+
+    if not fields.buffer:
+        logger.error(f"[ERROR] Model did not call record_event: {content}")
+        return parse_prompt(text, current_time)
+    arguments = fields.buffer
+    if ready_after is not None:
+        logger.info(f"[STREAM] Title and date_time after {ready_after:.2f}s of {elapsed:.2f}s")
+    logger.info(f"[RESPONSE] record_event arguments: {arguments}")
+
+    try:
+        result = ParseResult.from_arguments(arguments, text)
+    except (ValueError, TypeError) as e:
+        logger.error(f"[ERROR] Invalid record_event arguments: {e}")
+        return parse_prompt(text, current_time)
+
+    logger.info(f"[SUCCESS] AI parsing successful - Title: '{result.title}', Time: {result.date_time}, Duration: {result.duration_minutes}, Location: '{result.location}'")
+    return result.to_dict()
+
+def _stream_tool_call(client, messages, on_progress, cancelled=None):
+    """Stream one record_event call.
+
+    Returns (fields, content, seconds until title and date_time were known),
+    or None when cancelled mid-stream by a winning hedge.
+    """
+    started = time.monotonic()
+    stream = client.chat.completions.create(
+        model=OPENAI_MODEL,
+        messages=messages,
+        temperature=0.1,
+        tools=[PARSE_EVENT_TOOL],
+        tool_choice={"type": "function", "function": {"name": "record_event"}},
+        stream=True
+    )
+
+    # Decode record_event arguments field by field as they stream in
+    fields = JsonFieldStream()
+    content = ''
+    ready_after = None
+    for chunk in stream:
+        if cancelled is not None and cancelled.is_set():
+            if hasattr(stream, 'close'):
+                stream.close()
+            return None
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta
+        content += delta.content or ''
+        for call in delta.tool_calls or []:
+            if not call.function or not call.function.arguments:
+                continue
+            if not fields.feed(call.function.arguments):
+                continue
+            ready = 'title' in fields.fields and 'date_time' in fields.fields
+            if ready and ready_after is None:
+                ready_after = time.monotonic() - started
+            try:
+                on_progress(dict(fields.fields), ready)
+            except Exception as e:
+                logger.error(f"[STREAM] Progress callback failed: {e}")
+    return fields, content, ready_after
+
+def _parse_batch_with_model(texts, current_time, user_id=None):
+    """One record_events request for several prompts; returns a result per prompt."""
+    logger.info(f"[AI] Starting batch AI parsing for {len(texts)} prompts")
+
+    if not llm_breaker.allow():
+        logger.warning(f"[BREAKER] OpenAI is degraded, parsing {len(texts)} prompts locally")
+        return [_parse_degraded(text, current_time) for text in texts]
+
+    started = time.monotonic()
+    try:
+        client = get_openai_client()
+        numbered = '\n'.join(f"{i}: {json.dumps(text)}" for i, text in enumerate(texts))
+        messages = [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "system", "content": BATCH_INSTRUCTIONS},
+            build_context_message(current_time),
+            {"role": "user", "content": f"Parse these calendar prompts:\n{numbered}"}
+        ]
+
+        logger.info(f"[API] Sending batch request to OpenAI API (prompt v{PROMPT_VERSION})...")
+
+        with llm_limiter.slot(user_id):
+            started = time.monotonic()
+            response = client.chat.completions.create(
+                model=OPENAI_MODEL,
+                messages=messages,
+                temperature=0.1,
+                tools=[PARSE_EVENTS_TOOL],
+                tool_choice={"type": "function", "function": {"name": "record_events"}}
+            )
+    except LimiterTimeout as e:
+        llm_breaker.cancel()
+        logger.warning(f"[LIMITER] {e}; parsing {len(texts)} prompts locally")
+        return [_parse_degraded(text, current_time) for text in texts]
+    except Exception as e:
+        llm_breaker.record(time.monotonic() - started, ok=False)
+        logger.error(f"[ERROR] Batch AI parsing failed: {e}")
+        return [parse_prompt(text, current_time) for text in texts]
+    llm_breaker.record(time.monotonic() - started)
+
+    try:
+        message = response.choices[0].message
+        if not message.tool_calls:
+            raise ValueError(f"Model did not call record_events: {message.content}")
+        data = json.loads(message.tool_calls[0].function.arguments)
+        entries = data.get('events') if isinstance(data, dict) else None
+        if not isinstance(entries, list):
+            raise ValueError("record_events arguments have no events list")
+    except (ValueError, TypeError, AttributeError, IndexError) as e:
+        logger.error(f"[ERROR] Unusable batch response: {e}")
+        return [parse_prompt(text, current_time) for text in texts]
+
+    by_index = {}
+    for entry in entries:
+        if isinstance(entry, dict) and type(entry.get('index')) is int and 0 <= entry['index'] < len(texts):
+            by_index.setdefault(entry['index'], entry)
+
+    results = []
+    for i, text in enumerate(texts):
+        try:
+            if i not in by_index:
+                raise ValueError("No entry for this prompt")
+            results.append(ParseResult.from_arguments(by_index[i], text).to_dict())
+        except (ValueError, TypeError) as e:
+            logger.error(f"[ERROR] Batch item {i} unusable ({e}), falling back for: '{text}'")
+            results.append(parse_prompt(text, current_time))
+    logger.info(f"[SUCCESS] Batch AI parsing decoded {len(by_index)}/{len(texts)} prompts")
+    return results
+
+def _parse_degraded(text, current_time):
+    """Best local parse while OpenAI is unavailable: the grammar at any confidence, then dateparser."""
+    fast = fast_parse(text, current_time)
+    if fast['success']:
+        fast['source'] = 'fallback'
+        return fast
+    return parse_prompt(text, current_time)
+
+# Time-related words stripped from the fallback title, as one alternation
+_TIME_WORDS = re.compile(r'\b(?:today|tomorrow|next|at|on|in|for|minutes|hours|am|pm)\b', re.IGNORECASE)
+_WHITESPACE = re.compile(r'\s+')
+
+@lru_cache(maxsize=8)
+def get_date_parser(relative_base=None):
+    """Get a DateDataParser anchored at relative_base; building one loads locale data, so each is shared."""
+    settings = {'PREFER_DATES_FROM': 'future'}
+    if relative_base is not None:
+        settings['RELATIVE_BASE'] = relative_base
+    return DateDataParser(languages=DATEPARSER_LANGUAGES, settings=settings)
+
+@lru_cache(maxsize=512)
+def _parse_date_fragment(text, minute, utc_offset):
+    """dateparser result for text relative to minute, the user's wall-clock time, memoized.
+
+    The UTC offset is part of the key so users in different zones never share an entry.
+    """
+    return get_date_parser(datetime.fromisoformat(minute)).get_date_data(text).date_obj
+
+@lru_cache(maxsize=512)
+def _fallback_title(text):
+    return _WHITESPACE.sub(' ', _TIME_WORDS.sub('', text)).strip()
+
+def parse_prompt(text, current_time=None):
+    """Fallback parsing using dateparser, resolving relative dates from current_time (the user's now)."""
+    logger.info(f"[PARSE] Using fallback parsing for: '{text}'")
+
+    try:
+        # Recurrence phrases ("every weekday") confuse dateparser, so take them out first
+        recurrence, text = extract_recurrence(text, explicit_only=True)
+
+        # Basic parsing with dateparser, in the user's wall-clock time like the other parsers
+        current_time = current_time or datetime.now()
+        minute = current_time.replace(tzinfo=None).strftime('%Y-%m-%dT%H:%M')
+        parsed_datetime = _parse_date_fragment(text, minute, current_time.utcoffset())
+
+        if not parsed_datetime:
+            return {'success': False, 'error': 'Could not parse date/time from prompt'}
+        if recurrence:
+            parsed_datetime = first_occurrence(recurrence, parsed_datetime)
+
+        # Extract title (remove time-related words)
+        title = _fallback_title(text)
+
+        if not title:
+            title = 'Untitled Event'
+
+        return {
+            'success': True,
+            'title': title,
+            'date_time': parsed_datetime,
+            'duration_minutes': None,
+            'location': None,
+            'description': '',
+            'needs_followup': True,
+            'followup_questions': ['What\'s the duration?', 'Where is this event?'],
+            'recurrence': recurrence,
+            'source': 'fallback'
+        }
+
+    except Exception as e:
+        logger.error(f"[ERROR] Fallback parsing failed: {e}")
+        return {'success': False, 'error': f'Failed to parse prompt: {str(e)}'}
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Push Channels Module
+Google Calendar events.watch channels that invalidate cached agendas instead of polling.
+"""
+
+import hmac
+import logging
+import os
+import secrets
+import threading
+import time
+import uuid
+
+from calendar_api import get_calendar_service, execute_request, get_service_user
+
+logger = logging.getLogger(__name__)
+
+# Public HTTPS address of the /calendar/notifications route (push is disabled when unset)
+WEBHOOK_URL = os.getenv('CALENDAR_WEBHOOK_URL')
+
+# Requested channel lifetime and how early channels are renewed
+CHANNEL_TTL_SECONDS = int(os.getenv('CALENDAR_CHANNEL_TTL', str(7 * 24 * 3600)))
+RENEW_MARGIN_SECONDS = int(os.getenv('CALENDAR_CHANNEL_RENEW_MARGIN', '3600'))
+RENEW_CHECK_INTERVAL = int(os.getenv('CALENDAR_CHANNEL_RENEW_INTERVAL', '300'))
+
+# Upper bound on serving a cached agenda, in case a notification is lost
+AGENDA_MAX_AGE_SECONDS = int(os.getenv('AGENDA_MAX_AGE', '900'))
+
+class AgendaCache:
+    """Per-user cache of listed events, invalidated by push notifications and local writes.
+
+    Each user has a generation that mark_dirty bumps, so an agenda fetched
+    before a change can't be cached after it.
+    """
+
+    def __init__(self, max_age=AGENDA_MAX_AGE_SECONDS, clock=time.time):
+        self.max_age = max_age
+        self.clock = clock
+        self.entries = {}
+        self.generations = {}
+        self.lock = threading.Lock()
+
+    def generation(self, user_id):
+        """Current generation for a user; read it before fetching an agenda to put."""
+        with self.lock:
+            return self.generations.get(user_id, 0)
+
+    def get(self, user_id, key):
+        """Get cached events, or None if missing, dirty or too old."""
+        with self.lock:
+            entry = self.entries.get((user_id, key))
+        if entry and self.clock() - entry[0] < self.max_age:
+            return entry[1]
+        return None
+
+    def put(self, user_id, key, events, generation=None):
+        """Cache a freshly listed agenda, unless the user's calendars changed since generation."""
+        with self.lock:
+            if generation is not None and generation != self.generations.get(user_id, 0):
+                logger.info(f"[PUSH] Agenda for {user_id} changed while listing, not caching it")
+                return False
+            self.entries[(user_id, key)] = (self.clock(), events)
+            return True
+
+    def mark_dirty(self, user_id):
+        """Drop every cached agenda for a user."""
+        with self.lock:
+            self.generations[user_id] = self.generations.get(user_id, 0) + 1
+            for cache_key in [k for k in self.entries if k[0] == user_id]:
+                del self.entries[cache_key]
+
+class Channel:
+    """An active events.watch channel on one calendar."""
+
+    def __init__(self, channel_id, user_id, calendar_id, resource_id, token, expiration):
+        self.channel_id = channel_id
+        self.user_id = user_id
+        self.calendar_id = calendar_id
+        self.resource_id = resource_id
+        self.token = token
+        self.expiration = expiration
+
+class ChannelManager:
+    """Registers, renews and stops events.watch channels and routes their notifications."""
+
+    def __init__(self, webhook_url, agenda_cache, service_factory=get_calendar_service,
+                 ttl=CHANNEL_TTL_SECONDS, renew_margin=RENEW_MARGIN_SECONDS, clock=time.time):
+        self.webhook_url = webhook_url
+        self.agenda_cache = agenda_cache
+        self.service_factory = service_factory
+        self.ttl = ttl
+        self.renew_margin = renew_margin
+        self.clock = clock
+        self.channels = {}
+        self.user_channels = {}
+        self.lock = threading.Lock()
+        self.renewal_thread = None
+
+    def _get_channel(self, user_id, calendar_id):
+        with self.lock:
+            return self.user_channels.get(user_id, {}).get(calendar_id)
+
+    def is_watching(self, user_id, calendar_ids=('primary',)):
+        """Check whether every calendar has a live channel, so a cached agenda can be trusted."""
+        now = self.clock()
+        for calendar_id in calendar_ids:
+            channel = self._get_channel(user_id, calendar_id)
+            if channel is None or channel.expiration <= now:
+                return False
+        return True
+
+    def ensure_channels(self, user_id, calendar_ids=('primary',)):
+        """Register channels for any of the user's calendars without a live one."""
+        deadline = self.clock() + self.renew_margin
+        for calendar_id in calendar_ids:
+            channel = self._get_channel(user_id, calendar_id)
+            if channel is None or channel.expiration <= deadline:
+                self.register(user_id, calendar_id)
+
+    def register(self, user_id, calendar_id='primary'):
+        """Open an events.watch channel on one of the user's calendars."""
+        service = self.service_factory(user_id)
+        if not service:
+            logger.warning(f"[PUSH] No calendar service for {user_id}, not watching")
+            return None
+
+        channel_id = str(uuid.uuid4())
+        token = secrets.token_urlsafe(24)
+        body = {
+            'id': channel_id,
+            'type': 'web_hook',
+            'address': self.webhook_url,
+            'token': token,
+            'params': {'ttl': str(self.ttl)},
+        }
+        try:
+            result = execute_request(service.events().watch(calendarId=calendar_id, body=body), get_service_user(service))
+        except Exception as e:
+            logger.error(f"[PUSH] Failed to watch calendar {calendar_id} for {user_id}: {e}")
+            return None
+
+        expiration = int(result.get('expiration', (self.clock() + self.ttl) * 1000)) / 1000
+        channel = Channel(channel_id, user_id, calendar_id, result.get('resourceId'), token, expiration)
+        with self.lock:
+            previous = self.user_channels.setdefault(user_id, {}).get(calendar_id)
+            self.channels[channel_id] = channel
+            self.user_channels[user_id][calendar_id] = channel
+
+        # The calendar may have changed while we were not watching
+        self.agenda_cache.mark_dirty(user_id)
+        if previous:
+            self._stop_channel(previous, service)
+        logger.info(f"[PUSH] Watching {calendar_id} for {user_id} on channel {channel_id} until {time.ctime(expiration)}")
+        self.start_renewal_thread()
+        return channel
+
+    def handle_notification(self, headers):
+        """Handle a push notification; return False for unknown or forged channels."""
+        channel_id = headers.get('X-Goog-Channel-ID')
+        with self.lock:
+            channel = self.channels.get(channel_id)
+        if channel is None:
+            logger.warning(f"[PUSH] Notification for unknown channel {channel_id}")
+            return False
+        if not hmac.compare_digest(headers.get('X-Goog-Channel-Token', ''), channel.token):
+            logger.warning(f"[PUSH] Bad token on channel {channel_id}")
+            return False
+
+        state = headers.get('X-Goog-Resource-State')
+        if state == 'sync':
+            logger.debug(f"[PUSH] Sync message on channel {channel_id}")
+        else:
+            logger.info(f"[PUSH] {channel.calendar_id} changed for {channel.user_id} ({state}), invalidating agenda")
+            self.agenda_cache.mark_dirty(channel.user_id)
+        return True
+
+    def renew_due(self):
+        """Renew channels that expire within the renewal margin."""
+        deadline = self.clock() + self.renew_margin
+        with self.lock:
+            due = [
+                (channel.user_id, channel.calendar_id)
+                for calendars in self.user_channels.values()
+                for channel in calendars.values()
+                if channel.expiration <= deadline
+            ]
+        for user_id, calendar_id in due:
+            logger.info(f"[PUSH] Renewing channel on {calendar_id} for {user_id}")
+            self.register(user_id, calendar_id)
+        return due
+
+    def stop(self, user_id):
+        """Stop watching a user's calendars (e.g. on logout)."""
+        with self.lock:
+            channels = list(self.user_channels.pop(user_id, {}).values())
+        if channels:
+            service = self.service_factory(user_id)
+            for channel in channels:
+                self._stop_channel(channel, service)
+        self.agenda_cache.mark_dirty(user_id)
+
+    def _stop_channel(self, channel, service):
+        """Tell Google to stop sending notifications for a channel."""
+        with self.lock:
+            self.channels.pop(channel.channel_id, None)
+        if not service:
+            return
+        try:
+            execute_request(
+                service.channels().stop(body={'id': channel.channel_id, 'resourceId': channel.resource_id}),
+                get_service_user(service)
+            )
+        except Exception as e:
+            logger.warning(f"[PUSH] Failed to stop channel {channel.channel_id}: {e}")
+
+    def start_renewal_thread(self, interval=RENEW_CHECK_INTERVAL):
+        """Start the background thread that renews channels before they expire."""
+        with self.lock:
+            if self.renewal_thread is not None:
+                return
+            self.renewal_thread = threading.Thread(target=self._renewal_loop, args=(interval,), daemon=True, name='channel-renewal')
+        self.renewal_thread.start()
+
+    def _renewal_loop(self, interval):
+        while True:
+            time.sleep(interval)
+            try:
+                self.renew_due()
+            except Exception as e:
+                logger.error(f"[PUSH] Channel renewal failed: {e}")
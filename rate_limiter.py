@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Rate Limiter Module
+Quota-aware token buckets and retry policy shared by all Google Calendar API calls.
+"""
+
+import json
+import logging
+import os
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+
+from googleapiclient.errors import HttpError
+
+logger = logging.getLogger(__name__)
+
+# Request budgets (requests per second and burst size)
+USER_QPS = float(os.getenv('CALENDAR_USER_QPS', '5'))
+USER_BURST = int(os.getenv('CALENDAR_USER_BURST', '10'))
+PROJECT_QPS = float(os.getenv('CALENDAR_PROJECT_QPS', '50'))
+PROJECT_BURST = int(os.getenv('CALENDAR_PROJECT_BURST', '100'))
+
+# Retry policy
+MAX_RETRIES = int(os.getenv('CALENDAR_MAX_RETRIES', '5'))
+RETRY_BASE_DELAY = float(os.getenv('CALENDAR_RETRY_BASE_DELAY', '0.5'))
+RETRY_MAX_DELAY = float(os.getenv('CALENDAR_RETRY_MAX_DELAY', '32'))
+# Longest a caller's request thread spends sleeping between retries, in total
+RETRY_DEADLINE = float(os.getenv('CALENDAR_RETRY_DEADLINE', '30'))
+
+RATE_LIMIT_REASONS = {'rateLimitExceeded', 'userRateLimitExceeded'}
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+class TokenBucket:
+    """Thread-safe token bucket; callers reserve a token and sleep until it is due."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def reserve(self):
+        """Take one token and return how long the caller must wait for it."""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+    def try_acquire(self):
+        """Take a token only if one is available right now."""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+    def acquire(self):
+        """Block until a token is available; return the time spent waiting."""
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+_project_bucket = TokenBucket(PROJECT_QPS, PROJECT_BURST)
+_user_buckets = {}
+_user_buckets_lock = threading.Lock()
+
+_stats = {
+    'calls': 0,
+    'throttled': 0,
+    'throttle_wait_seconds': 0.0,
+    'retries': 0,
+    'rate_limited': 0,
+    'server_errors': 0,
+    'failures': 0,
+    'deadline_exceeded': 0,
+}
+_stats_lock = threading.Lock()
+
+def _count(key, amount=1):
+    with _stats_lock:
+        _stats[key] += amount
+
+def get_quota_stats():
+    """Get a snapshot of throttle and retry counters."""
+    with _stats_lock:
+        return dict(_stats)
+
+def get_user_bucket(user_id):
+    """Get (or create) the token bucket for a user."""
+    with _user_buckets_lock:
+        bucket = _user_buckets.get(user_id)
+        if bucket is None:
+            bucket = TokenBucket(USER_QPS, USER_BURST)
+            _user_buckets[user_id] = bucket
+        return bucket
+
+def _wait_for_tokens(user_id):
+    """Acquire a user token and a project token, recording any throttling."""
+    waited = _project_bucket.acquire()
+    if user_id:
+        waited += get_user_bucket(user_id).acquire()
+    if waited > 0:
+        _count('throttled')
+        _count('throttle_wait_seconds', waited)
+        logger.debug(f"[QUOTA] Throttled {waited:.3f}s for user {user_id}")
+
+def _error_reason(error):
+    """Extract the Google error reason (e.g. rateLimitExceeded) from an HttpError."""
+    try:
+        payload = json.loads(error.content.decode('utf-8') if isinstance(error.content, bytes) else error.content)
+        errors = payload.get('error', {}).get('errors', [])
+        if errors:
+            return errors[0].get('reason')
+    except (ValueError, AttributeError, TypeError):
+        pass
+    return None
+
+def is_retryable(error):
+    """Check whether an HttpError should be retried."""
+    status = error.resp.status
+    if status in RETRYABLE_STATUSES:
+        return True
+    return status == 403 and _error_reason(error) in RATE_LIMIT_REASONS
+
+def retry_after_seconds(error):
+    """Parse a Retry-After header (seconds or HTTP date) from an HttpError."""
+    value = error.resp.get('retry-after')
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+        return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+def backoff_delay(attempt, retry_after=None):
+    """Exponential backoff with full jitter, never shorter than Retry-After."""
+    delay = random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * (2 ** attempt)))
+    if retry_after is not None:
+        delay = max(delay, retry_after)
+    return delay
+
+def execute_with_retry(call, user_id=None, max_retries=MAX_RETRIES):
+    """Run an API call under the user/project budgets, retrying quota and server errors.
+
+    Gives up early rather than sleep past RETRY_DEADLINE, since the caller is
+    usually a Flask or MCP request thread.
+    """
+    deadline = time.monotonic() + RETRY_DEADLINE
+    attempt = 0
+    while True:
+        _wait_for_tokens(user_id)
+        _count('calls')
+        try:
+            return call()
+        except HttpError as e:
+            if not is_retryable(e) or attempt >= max_retries:
+                _count('failures')
+                raise
+            if e.resp.status >= 500:
+                _count('server_errors')
+            else:
+                _count('rate_limited')
+            delay = backoff_delay(attempt, retry_after_seconds(e))
+            if time.monotonic() + delay > deadline:
+                _count('deadline_exceeded')
+                _count('failures')
+                logger.warning(f"[QUOTA] HTTP {e.resp.status} for user {user_id}, retry in {delay:.2f}s would pass the {RETRY_DEADLINE:.0f}s deadline")
+                raise
+            attempt += 1
+            _count('retries')
+            logger.warning(f"[QUOTA] HTTP {e.resp.status} for user {user_id}, retry {attempt}/{max_retries} in {delay:.2f}s")
+            time.sleep(delay)
@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+"""
+Recurrence Module
+Recurrence rules for Google Calendar: parsing from natural language, validation,
+and local expansion of recurring events (RRULE/EXDATE/RDATE) into instances.
+"""
+
+import logging
+import re
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from dateutil.rrule import rrulestr
+
+logger = logging.getLogger(__name__)
+
+# Frequencies that make sense for calendar events
+ALLOWED_FREQUENCIES = ('DAILY', 'WEEKLY', 'MONTHLY', 'YEARLY')
+
+WEEKDAY_CODES = {
+    'monday': 'MO', 'tuesday': 'TU', 'wednesday': 'WE', 'thursday': 'TH',
+    'friday': 'FR', 'saturday': 'SA', 'sunday': 'SU',
+}
+_DAY = r'(?:mon|tue|tues|wed|thu|thur|thurs|fri|sat|sun)(?:[a-z]*day)?s?'
+_UNITS = {'day': 'DAILY', 'week': 'WEEKLY', 'month': 'MONTHLY', 'year': 'YEARLY'}
+
+# Local grammar for explicit repeat phrases, tried in order (first match wins). A bare
+# "monthly" or "weekdays" mid-prompt is usually part of the title ("the monthly budget")
+_RECURRENCE_PATTERNS = [
+    (re.compile(r'\b(?:every|each)\s+weekdays?\b', re.I), lambda m: 'FREQ=WEEKLY;BYDAY=MO,TU,WE,TH,FR'),
+    (re.compile(r'\b(?:every|each)\s+weekends?\b', re.I), lambda m: 'FREQ=WEEKLY;BYDAY=SA,SU'),
+    (re.compile(r'\b(?:every|each)\s+(?:other|second)\s+(day|week|month|year)\b', re.I),
+     lambda m: f"FREQ={_UNITS[m.group(1).lower()]};INTERVAL=2"),
+    (re.compile(r'\bevery\s+(\d+)\s+(day|week|month|year)s\b', re.I),
+     lambda m: f"FREQ={_UNITS[m.group(2).lower()]};INTERVAL={int(m.group(1))}"),
+    (re.compile(rf'\b(?:every|each)\s+({_DAY}(?:\s*(?:,|and|&)\s*{_DAY})*)\b', re.I),
+     lambda m: f"FREQ=WEEKLY;BYDAY={','.join(_weekday_codes(m.group(1)))}"),
+    (re.compile(r'\b(?:every|each)\s+(day|week|month|year)\b', re.I), lambda m: f"FREQ={_UNITS[m.group(1).lower()]}"),
+]
+# A cadence adjective only counts at the start of the prompt ("daily standup", "biweekly 1:1")
+_LEADING_CADENCE = (
+    re.compile(r'^\s*(?:(daily|weekly|monthly|yearly|annual|annually)|bi-?(week|month)ly)\b', re.I),
+    lambda m: (f"FREQ={_UNITS[m.group(2).lower()]};INTERVAL=2" if m.group(2) else
+               f"FREQ={'YEARLY' if m.group(1).lower().startswith('annual') else m.group(1).upper()}"),
+)
+_COUNT_PATTERN = re.compile(r'\b(?:for\s+)?(\d+)\s+(?:times|occurrences)\b', re.I)
+
+# Expanded series kept in memory, keyed by series version and window
+EXPANSION_CACHE_SIZE = 512
+
+_expansion_cache = OrderedDict()
+_expansion_lock = threading.Lock()
+
+def _weekday_codes(text):
+    codes = []
+    for word in re.findall(r'[a-z]+', text.lower()):
+        for name, code in WEEKDAY_CODES.items():
+            if word != 'and' and name.startswith(word[:3]) and code not in codes:
+                codes.append(code)
+    return codes
+
+def _rule_start(rule, dtstart):
+    """dateutil needs DTSTART to be timezone-aware exactly when UNTIL is in UTC."""
+    until = re.search(r'UNTIL=([0-9TZ]+)', rule, re.I)
+    if until and until.group(1).upper().endswith('Z'):
+        return dtstart if dtstart.tzinfo else dtstart.replace(tzinfo=timezone.utc)
+    return dtstart.replace(tzinfo=None)
+
+def normalize_rrule(rule, dtstart=None):
+    """Validate a recurrence rule and return it as an 'RRULE:...' line.
+
+    Raises ValueError for anything Calendar would reject or that is not a
+    sensible event cadence (e.g. FREQ=MINUTELY).
+    """
+    if not rule or not isinstance(rule, str):
+        raise ValueError('Empty recurrence rule')
+    body = rule.strip().upper()
+    if body.startswith('RRULE:'):
+        body = body[len('RRULE:'):]
+    parts = dict(part.split('=', 1) for part in body.split(';') if '=' in part)
+    if parts.get('FREQ') not in ALLOWED_FREQUENCIES:
+        raise ValueError(f'Unsupported recurrence frequency: {parts.get("FREQ")}')
+    if 'COUNT' in parts and 'UNTIL' in parts:
+        raise ValueError('Recurrence rule cannot have both COUNT and UNTIL')
+    # dateutil raises ValueError on malformed parts
+    rrulestr(body, dtstart=_rule_start(body, dtstart or datetime(2000, 1, 1)))
+    return f'RRULE:{body}'
+
+def extract_recurrence(text, explicit_only=False):
+    """Find a recurrence phrase with the local grammar.
+
+    Returns (rrule_line, remaining_text), or (None, text) when the prompt does
+    not describe a repeating event. With explicit_only, a leading cadence
+    adjective ("weekly report review") doesn't count, only "every"/"each".
+    """
+    patterns = _RECURRENCE_PATTERNS if explicit_only else _RECURRENCE_PATTERNS + [_LEADING_CADENCE]
+    for pattern, build in patterns:
+        match = pattern.search(text)
+        if match:
+            rule = build(match)
+            remaining = text[:match.start()] + text[match.end():]
+            count = _COUNT_PATTERN.search(remaining)
+            if count:
+                rule += f';COUNT={int(count.group(1))}'
+                remaining = remaining[:count.start()] + remaining[count.end():]
+            return f'RRULE:{rule}', re.sub(r'\s+', ' ', remaining).strip()
+    return None, text
+
+def _rule_parts(rule):
+    return dict(part.split('=', 1) for part in rule[len('RRULE:'):].split(';'))
+
+def resolve_recurrence(text, suggested=None):
+    """Recurrence for a model-parsed prompt.
+
+    The model decides whether the event repeats: no suggestion means a
+    one-off event. The local grammar only checks and completes the model's
+    rule, e.g. adding the BYDAY or COUNT it left out.
+    """
+    if not suggested:
+        return None
+    rule, _ = extract_recurrence(text)
+    try:
+        suggested = normalize_rrule(suggested)
+    except ValueError:
+        # The model meant a repeat but garbled the rule; the prompt's own phrase is the next best thing
+        return rule
+    if rule is None:
+        return suggested
+    parts, local = _rule_parts(suggested), _rule_parts(rule)
+    if parts['FREQ'] != local['FREQ']:
+        return suggested
+    for key, value in local.items():
+        if key not in parts and not (key == 'COUNT' and 'UNTIL' in parts):
+            parts[key] = value
+    try:
+        return normalize_rrule(';'.join(f'{key}={value}' for key, value in parts.items()))
+    except ValueError:
+        return suggested
+
+def first_occurrence(rule, start_time):
+    """Move start_time onto the first date the rule produces (e.g. 'every Monday' asked on a Friday)."""
+    dtstart = _rule_start(rule, start_time)
+    try:
+        first = rrulestr(rule, dtstart=dtstart, forceset=True).after(dtstart, inc=True)
+    except (ValueError, TypeError):
+        return start_time
+    if first is None:
+        return start_time
+    return first.replace(tzinfo=start_time.tzinfo)
+
+def _zone(name, default_tz):
+    try:
+        return ZoneInfo(name) if name else default_tz
+    except ZoneInfoNotFoundError:
+        return default_tz
+
+def _parse_when(when, default_tz):
+    """Parse an API start/end/originalStartTime into (datetime, all_day).
+
+    All-day values come back as naive midnights; timed values are aware and
+    expressed in the event's own zone so the rule repeats in wall-clock time.
+    """
+    if 'dateTime' in when:
+        value = datetime.fromisoformat(when['dateTime'].replace('Z', '+00:00'))
+        return value.astimezone(_zone(when.get('timeZone'), value.tzinfo)), False
+    return datetime.fromisoformat(when['date']), True
+
+def _instance_key(start, all_day):
+    """Key that matches a generated instance to its exception's originalStartTime."""
+    if all_day:
+        return start.date().isoformat()
+    return start.astimezone(timezone.utc).replace(tzinfo=None)
+
+def _instance_id(master_id, start, all_day):
+    """Instance ID in Google's format: <seriesId>_<start in UTC or date>."""
+    if all_day:
+        return f"{master_id}_{start.strftime('%Y%m%d')}"
+    return f"{master_id}_{start.astimezone(timezone.utc).strftime('%Y%m%dT%H%M%SZ')}"
+
+def _when(value, all_day, zone_name):
+    if all_day:
+        return {'date': value.date().isoformat()}
+    when = {'dateTime': value.isoformat()}
+    if zone_name:
+        when['timeZone'] = zone_name
+    return when
+
+def _bounds(window_start, window_end, all_day, tz):
+    """Express the window in the same terms (naive or aware) as the series."""
+    if all_day:
+        return (window_start.astimezone(tz).replace(tzinfo=None),
+                window_end.astimezone(tz).replace(tzinfo=None))
+    return window_start, window_end
+
+_UNTIL = re.compile(r'UNTIL=(\d{8})(?:T(\d{6}))?(Z?)', re.I)
+
+def _anchor_until(line, start, all_day):
+    """Write an RRULE's UNTIL the way dateutil needs it for this series' DTSTART.
+
+    A timed series needs UNTIL in UTC: a date-only (or floating) UNTIL is the
+    end of that day (or that wall-clock time) in the event's zone. An all-day
+    series needs a date.
+    """
+    def anchor(match):
+        day, clock, utc = match.groups()
+        if all_day:
+            return f"UNTIL={day}"
+        if utc:
+            return match.group(0)
+        until = datetime.strptime(day + (clock or '235959'), '%Y%m%d%H%M%S').replace(tzinfo=start.tzinfo)
+        return f"UNTIL={until.astimezone(timezone.utc).strftime('%Y%m%dT%H%M%SZ')}"
+    if not line.upper().startswith(('RRULE', 'EXRULE')):
+        return line
+    return _UNTIL.sub(anchor, line)
+
+def expand_series(master, window_start, window_end, default_tz=timezone.utc):
+    """Expand a recurring master event into the instances overlapping [window_start, window_end).
+
+    EXDATE and RDATE lines are honoured; exceptions are applied by apply_exceptions.
+    Raises ValueError for rules dateutil can't expand.
+    """
+    start, all_day = _parse_when(master['start'], default_tz)
+    end, _ = _parse_when(master['end'], default_tz)
+    duration = end - start
+    zone_name = master['start'].get('timeZone')
+    tz = _zone(zone_name, default_tz)
+    lower, upper = _bounds(window_start, window_end, all_day, tz)
+
+    lines = [_anchor_until(line, start, all_day) for line in master.get('recurrence', [])]
+    rules = rrulestr('\n'.join(lines), dtstart=start, forceset=True)
+    instances = []
+    # Instances that started before the window can still overlap it
+    for occurrence in rules.between(lower - duration, upper, inc=True):
+        if occurrence + duration <= lower or occurrence >= upper:
+            continue
+        instance = {key: value for key, value in master.items() if key != 'recurrence'}
+        instance.update({
+            'id': _instance_id(master['id'], occurrence, all_day),
+            'recurringEventId': master['id'],
+            'originalStartTime': _when(occurrence, all_day, zone_name),
+            'start': _when(occurrence, all_day, zone_name),
+            'end': _when(occurrence + duration, all_day, zone_name),
+        })
+        instances.append(instance)
+    return instances
+
+def expand_series_cached(master, window_start, window_end, default_tz=timezone.utc):
+    """expand_series with an LRU cache; the etag changes whenever the series is edited."""
+    key = (master['id'], master.get('etag', master.get('updated')), window_start, window_end)
+    with _expansion_lock:
+        if key in _expansion_cache:
+            _expansion_cache.move_to_end(key)
+            return _expansion_cache[key]
+    instances = expand_series(master, window_start, window_end, default_tz)
+    with _expansion_lock:
+        _expansion_cache[key] = instances
+        while len(_expansion_cache) > EXPANSION_CACHE_SIZE:
+            _expansion_cache.popitem(last=False)
+    return instances
+
+def apply_exceptions(instances, exceptions, default_tz=timezone.utc):
+    """Drop cancelled instances and swap in modified ones, matched on originalStartTime."""
+    by_original = {}
+    for exception in exceptions:
+        original, all_day = _parse_when(exception['originalStartTime'], default_tz)
+        by_original[_instance_key(original, all_day)] = exception
+
+    result = []
+    for instance in instances:
+        start, all_day = _parse_when(instance['originalStartTime'], default_tz)
+        exception = by_original.pop(_instance_key(start, all_day), None)
+        if exception is None:
+            result.append(instance)
+        elif exception.get('status') != 'cancelled':
+            result.append(exception)
+    # Instances moved into the window from an occurrence outside it
+    result.extend(e for e in by_original.values() if e.get('status') != 'cancelled')
+    return result
+
+def _overlaps(event, window_start, window_end, default_tz):
+    start, all_day = _parse_when(event['start'], default_tz)
+    end, _ = _parse_when(event['end'], default_tz)
+    tz = _zone(event['start'].get('timeZone'), default_tz)
+    lower, upper = _bounds(window_start, window_end, all_day, tz)
+    return start < upper and end > lower
+
+def event_sort_key(event, default_tz=timezone.utc):
+    """Start instant of an event (all-day events start at midnight in default_tz)."""
+    start, all_day = _parse_when(event['start'], default_tz)
+    return start.replace(tzinfo=default_tz) if all_day else start
+
+def expand_events(items, window_start, window_end, default_tz=timezone.utc, list_instances=None):
+    """Turn events.list(singleEvents=False, showDeleted=True) items into sorted instances.
+
+    Recurring masters are expanded locally, exceptions (modified or cancelled
+    instances) are applied, and single events outside the window are dropped.
+    A series that can't be expanded locally is taken from list_instances(master)
+    (the API's own expansion, exceptions applied), or skipped without it.
+    """
+    masters = {}
+    exceptions = {}
+    singles = []
+    for item in items:
+        if item.get('recurringEventId'):
+            exceptions.setdefault(item['recurringEventId'], []).append(item)
+        elif item.get('recurrence'):
+            masters[item['id']] = item
+        elif item.get('status') != 'cancelled':
+            singles.append(item)
+
+    events = [event for event in singles if _overlaps(event, window_start, window_end, default_tz)]
+    for master_id, master in masters.items():
+        series_exceptions = exceptions.pop(master_id, [])
+        if master.get('status') == 'cancelled':
+            continue
+        try:
+            instances = expand_series_cached(master, window_start, window_end, default_tz)
+        except (ValueError, TypeError, KeyError) as e:
+            logger.warning(f"[RECURRENCE] Can't expand series {master_id} locally: {e}")
+            if list_instances:
+                events.extend(i for i in list_instances(master) if i.get('status') != 'cancelled')
+            continue
+        events.extend(apply_exceptions(instances, series_exceptions, default_tz))
+
+    # Exceptions whose series was not returned (e.g. the organizer's master is hidden)
+    for orphans in exceptions.values():
+        events.extend(e for e in orphans if e.get('status') != 'cancelled')
+
+    events = [event for event in events if _overlaps(event, window_start, window_end, default_tz)]
+    events.sort(key=lambda event: event_sort_key(event, default_tz))
+    return events
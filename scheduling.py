@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Scheduling Module
+Interval merging and free-slot search across many calendars.
+"""
+
+from bisect import bisect_left
+from datetime import datetime, time, timedelta
+
+# Candidate slots start on this grid (minutes past the hour)
+SLOT_GRANULARITY_MINUTES = 15
+
+# Preferred gap kept free before and after a proposed slot
+BUFFER_MINUTES = 15
+
+def merge_intervals(intervals):
+    """Merge overlapping or touching (start, end) intervals with a sort-and-sweep.
+
+    O(n log n) for the sort, then a single linear pass.
+    """
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1][1] = end
+        else:
+            merged.append([start, end])
+    return [(start, end) for start, end in merged]
+
+def parse_clock(value):
+    """Parse an 'HH:MM' working-hours string into a time."""
+    if isinstance(value, time):
+        return value
+    hours, minutes = value.split(':')
+    return time(int(hours), int(minutes))
+
+def working_windows(window_start, window_end, work_start, work_end, working_days=(0, 1, 2, 3, 4)):
+    """Yield the working-hour windows inside [window_start, window_end)."""
+    tz = window_start.tzinfo
+    day = window_start.date()
+    while day <= window_end.date():
+        if day.weekday() in working_days:
+            start = max(window_start, datetime.combine(day, work_start, tzinfo=tz))
+            end = min(window_end, datetime.combine(day, work_end, tzinfo=tz))
+            if start < end:
+                yield start, end
+        day += timedelta(days=1)
+
+def _align(dt):
+    """Round a datetime up to the slot grid."""
+    dt = dt.replace(second=0, microsecond=0)
+    remainder = dt.minute % SLOT_GRANULARITY_MINUTES
+    if remainder:
+        dt += timedelta(minutes=SLOT_GRANULARITY_MINUTES - remainder)
+    return dt
+
+def free_gaps(busy, window_start, window_end, work_start, work_end, working_days=(0, 1, 2, 3, 4)):
+    """Return free (start, end) gaps inside working hours, given merged busy intervals."""
+    gaps = []
+    index = 0
+    for day_start, day_end in working_windows(window_start, window_end, work_start, work_end, working_days):
+        cursor = day_start
+        while index < len(busy) and busy[index][1] <= day_start:
+            index += 1
+        scan = index
+        while scan < len(busy) and busy[scan][0] < day_end:
+            busy_start, busy_end = busy[scan]
+            if busy_start > cursor:
+                gaps.append((cursor, busy_start))
+            cursor = max(cursor, busy_end)
+            scan += 1
+        if cursor < day_end:
+            gaps.append((cursor, day_end))
+    return gaps
+
+def _has_buffer(busy, busy_starts, start, end, buffer):
+    """Check that no busy interval lies within buffer of [start, end)."""
+    index = bisect_left(busy_starts, end + buffer)
+    return index == 0 or busy[index - 1][1] <= start - buffer
+
+def rank_slots(candidates, window_start):
+    """Order candidate slots: earlier is better, and slots with a buffer win ties."""
+    def score(slot):
+        hours_out = (slot['start'] - window_start).total_seconds() / 3600
+        return hours_out + (0 if slot['buffered'] else 4)
+    return sorted(candidates, key=score)
+
+def find_free_slots(busy_intervals, window_start, window_end, duration_minutes,
+                    work_start='09:00', work_end='17:00', working_days=(0, 1, 2, 3, 4),
+                    max_results=10):
+    """Find ranked slots of duration_minutes that are free on every calendar."""
+    duration = timedelta(minutes=duration_minutes)
+    buffer = timedelta(minutes=BUFFER_MINUTES)
+    step = timedelta(minutes=max(SLOT_GRANULARITY_MINUTES, min(duration_minutes, 60)))
+    busy = merge_intervals(busy_intervals)
+    busy_starts = [start for start, _ in busy]
+    candidates = []
+    for gap_start, gap_end in free_gaps(busy, window_start, window_end,
+                                        parse_clock(work_start), parse_clock(work_end), working_days):
+        start = _align(gap_start)
+        while start + duration <= gap_end:
+            end = start + duration
+            candidates.append({
+                'start': start,
+                'end': end,
+                'buffered': _has_buffer(busy, busy_starts, start, end, buffer),
+            })
+            start += step
+    return rank_slots(candidates, window_start)[:max_results]
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Similarity Cache Module
+Reuses AI parse results for reworded prompts, matched locally with MinHash and LSH.
+"""
+
+import logging
+import os
+import random
+import re
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+from fast_parser import fast_parse, FAST_PARSE_THRESHOLD
+from parse_cache import normalize_prompt
+from recurrence import first_occurrence
+
+logger = logging.getLogger(__name__)
+
+SIMILARITY_CACHE = os.getenv('SIMILARITY_CACHE', 'false').lower() in ('1', 'true', 'yes')
+# Minimum Jaccard similarity of the prompts' non-time wording for a hit
+SIMILARITY_THRESHOLD = float(os.getenv('SIMILARITY_THRESHOLD', '0.8'))
+SIMILARITY_CACHE_SIZE = int(os.getenv('SIMILARITY_CACHE_SIZE', '2048'))
+SIMILARITY_CACHE_TTL = int(os.getenv('SIMILARITY_CACHE_TTL', str(24 * 3600)))
+
+SHINGLE_SIZE = 3
+# 16 bands of 4 rows: pairs above ~0.5 similarity almost always share a bucket
+LSH_BANDS = 16
+LSH_ROWS = 4
+
+_PRIME = (1 << 61) - 1
+_rng = random.Random(4099)
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(LSH_BANDS * LSH_ROWS)]
+
+# Chat shorthand the fast-path grammar doesn't know
+_SHORTHAND = [
+    (re.compile(r'\bw/o\b', re.I), 'without'),
+    (re.compile(r'\bw/\s*', re.I), 'with '),
+    (re.compile(r'\b(?:mtg|mtng)\b', re.I), 'meeting'),
+    (re.compile(r'\b(\d+)\s*m\b', re.I), r'\1 min'),
+    (re.compile(r'\b(\d+)\s*(?:h|hr)\b', re.I), r'\1 hour'),
+]
+
+def expand_shorthand(text):
+    """Spell out chat shorthand ("w/", "30m") so rewordings parse alike."""
+    for pattern, replacement in _SHORTHAND:
+        text = pattern.sub(replacement, text)
+    return text
+
+def shingles(text):
+    """Character n-grams of the normalized text."""
+    padded = f" {normalize_prompt(text)} "
+    if len(padded) <= SHINGLE_SIZE:
+        return {padded}
+    return {padded[i:i + SHINGLE_SIZE] for i in range(len(padded) - SHINGLE_SIZE + 1)}
+
+def minhash(shingle_set):
+    """MinHash signature: the smallest permuted hash of the set under each permutation."""
+    hashes = [zlib.crc32(s.encode('utf-8')) for s in shingle_set]
+    return tuple(min((a * h + b) % _PRIME for h in hashes) for a, b in _PERMUTATIONS)
+
+def jaccard(a, b):
+    return len(a & b) / len(a | b) if a or b else 1.0
+
+# Words that don't change what an event is
+_STOPWORDS = {'a', 'an', 'the', 'with', 'and', 'to', 'for', 'of', 'my', 'our', 'at', 'in', 'on', 'w'}
+
+def _words(text):
+    return set(re.findall(r'\w+', normalize_prompt(text or '')))
+
+def _content_words(text):
+    return _words(text) - _STOPWORDS
+
+def _bands(signature):
+    return [(band, signature[band * LSH_ROWS:(band + 1) * LSH_ROWS]) for band in range(LSH_BANDS)]
+
+def _wording(local):
+    """The part of a prompt the time grammar left over: what the event is and where."""
+    return f"{local['title']} {local['location'] or ''}".strip()
+
+class SimilarityCache:
+    """LRU of AI results indexed by the MinHash of their prompt's non-time wording.
+
+    A hit reuses the stored title, location and description but re-resolves
+    the date and time from the new prompt with the fast-path grammar, so
+    "sync w/ Ana tmrw 3pm 30m" can reuse the answer for "Sync with Ana
+    tomorrow at 3pm for 30 minutes" on any day, at any time.
+    """
+
+    def __init__(self, threshold=SIMILARITY_THRESHOLD, max_entries=SIMILARITY_CACHE_SIZE,
+                 ttl=SIMILARITY_CACHE_TTL, clock=time.time):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = clock
+        self.entries = OrderedDict()
+        self.buckets = {}
+        self.next_id = 0
+        self.lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'rejected': 0, 'unresolved': 0, 'stores': 0, 'evictions': 0}
+
+    def _count(self, key):
+        with self.lock:
+            self.stats[key] += 1
+
+    def get(self, text, current_time):
+        """Return a result for a near-duplicate prompt with its time re-resolved, or None."""
+        expanded = expand_shorthand(text)
+        local = fast_parse(expanded, current_time)
+        if not local['success'] or local['time_confidence'] < FAST_PARSE_THRESHOLD:
+            # Without a trustworthy local date/time there's nothing to re-anchor a reused answer to
+            self._count('unresolved')
+            return None
+        wording = shingles(_wording(local))
+        content = _content_words(_wording(local))
+        prompt_words = _words(expanded)
+        now = self.clock()
+
+        best, best_score = None, 0.0
+        with self.lock:
+            candidates = set()
+            for band in _bands(minhash(wording)):
+                candidates.update(self.buckets.get(band, ()))
+            for entry_id in candidates:
+                entry = self.entries[entry_id]
+                if entry['expires_at'] <= now:
+                    self._evict(entry_id)
+                    continue
+                score = jaccard(wording, entry['shingles'])
+                if score > best_score:
+                    best, best_score = entry, score
+            if best is None or best_score < self.threshold:
+                self.stats['misses'] += 1
+                return None
+            if content != best['content'] or not best['anchored'] <= prompt_words:
+                # Similar spelling but different words either way round: "Ana" vs "Ann",
+                # or "kickoff meeting" vs "kickoff meeting prep"
+                self.stats['rejected'] += 1
+                return None
+            self.entries.move_to_end(best['id'])
+            self.stats['hits'] += 1
+        logger.info(f"[SIMILAR] Reusing parse of '{best['prompt']}' (similarity {best_score:.2f}) for '{text}'")
+        return self._rebuild(best, local)
+
+    def _rebuild(self, entry, local):
+        result = dict(entry['result'], source='similar', date_time=local['date_time'])
+        # Duration and recurrence come from the new prompt whenever the grammar can read them there
+        # or could read them in the old one; otherwise the model found them in the shared wording
+        for field in ('duration_minutes', 'recurrence'):
+            if local[field] is not None or entry['local'][field] is not None:
+                result[field] = local[field]
+        if result['recurrence'] and local['recurrence'] is None:
+            result['date_time'] = first_occurrence(result['recurrence'], result['date_time'])
+        questions = []
+        if result['duration_minutes'] is None:
+            questions.append("What's the duration?")
+        if result['location'] is None:
+            questions.append('Where is this event?')
+        result['needs_followup'] = bool(questions)
+        result['followup_questions'] = questions
+        return result
+
+    def put(self, text, current_time, result):
+        """Index an AI result under its prompt's non-time wording."""
+        expanded = expand_shorthand(text)
+        local = fast_parse(expanded, current_time)
+        if not local['success']:
+            return
+        wording = shingles(_wording(local))
+        prompt_words = _words(expanded)
+        entry = {
+            'prompt': text,
+            'shingles': wording,
+            'signature': minhash(wording),
+            'content': _content_words(_wording(local)),
+            # Words of the reused fields that came from the prompt itself must recur in a match
+            'anchored': (_words(result['title']) | _words(result.get('location'))) & prompt_words,
+            'local': {'duration_minutes': local['duration_minutes'], 'recurrence': local['recurrence']},
+            'result': {key: value for key, value in result.items() if key != 'date_time'},
+            'expires_at': self.clock() + self.ttl,
+        }
+        with self.lock:
+            entry['id'] = self.next_id
+            self.next_id += 1
+            self.entries[entry['id']] = entry
+            for band in _bands(entry['signature']):
+                self.buckets.setdefault(band, set()).add(entry['id'])
+            self.stats['stores'] += 1
+            while len(self.entries) > self.max_entries:
+                self._evict(next(iter(self.entries)))
+
+    def _evict(self, entry_id):
+        entry = self.entries.pop(entry_id)
+        for band in _bands(entry['signature']):
+            bucket = self.buckets.get(band)
+            if bucket is not None:
+                bucket.discard(entry_id)
+                if not bucket:
+                    del self.buckets[band]
+        self.stats['evictions'] += 1
+
+    def get_stats(self):
+        """Hit/miss counters plus the current hit rate."""
+        with self.lock:
+            stats = dict(self.stats, size=len(self.entries))
+        lookups = stats['hits'] + stats['misses'] + stats['rejected']
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+        return stats
+
+_similarity_cache = None
+_similarity_cache_lock = threading.Lock()
+
+def get_similarity_cache():
+    """Get the process-wide similarity cache."""
+    global _similarity_cache
+    with _similarity_cache_lock:
+        if _similarity_cache is None:
+            _similarity_cache = SimilarityCache()
+        return _similarity_cache
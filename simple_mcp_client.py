@@ -4,18 +4,15 @@ Simplified MCP Client for Google Calendar Operations
 Uses direct function calls but maintains MCP interface structure.
 """
 
-import json
 import logging
 from typing import Dict, Any, Optional
 from datetime import datetime
-import dateparser
-import openai
 import re
-import os
 from dotenv import load_dotenv
 
 # Import calendar API functions
-from calendar_api import get_calendar_service, create_event, list_upcoming_events
+from calendar_api import get_calendar_service, get_user_timezone, create_event, list_upcoming_events
+from parsing_engine import parse_prompt_with_ai
 
 # Load environment variables
 load_dotenv()
@@ -38,99 +35,6 @@ class SimpleMCPClient:
         """Initialize the simplified MCP client."""
         self.request_id = 1
         
-    def get_openai_client(self):
-        """Get OpenAI client with API key."""
-        api_key = os.getenv('OPENAI_API_KEY')
-        if not api_key:
-            raise ValueError("OPENAI_API_KEY environment variable not set")
-        return openai.OpenAI(api_key=api_key)
-    
-    def parse_prompt_with_ai(self, text, chat_context=None):
-        """Parse natural language prompt using AI."""
-        logger.info(f"[AI] Parsing prompt: '{text}'")
-        
-        try:
-            client = self.get_openai_client()
-            current_time = datetime.now()
-            
-            messages = [
-                {
-                    "role": "system",
-                    "content": """You are a calendar assistant that extracts event details from natural language. 
-                    Return a JSON object with these fields:
-                    - title: The event title/description
-                    - date_time: The date and time in ISO format (YYYY-MM-DDTHH:MM:SS)
-                    - duration_minutes: Duration in minutes (only if explicitly mentioned)
-                    - location: Location/venue of the event (only if explicitly mentioned)
-                    - description: A brief description of the event
-                    - needs_followup: Boolean indicating if follow-up questions are needed
-                    - followup_questions: Array of questions to ask the user
-                    
-                    IMPORTANT: 
-                    - Use 2025 as the current year. Today is 2025-08-06.
-                    - Current time is """ + current_time.strftime('%H:%M') + """
-                    - For relative times like "in 2 hours", calculate from current time
-                    - Set needs_followup to TRUE if duration_minutes is null/not provided
-                    - Set needs_followup to TRUE if location is not explicitly mentioned
-                    - Do NOT provide default values for missing information
-                    - Only set location if it's explicitly mentioned in the prompt
-                    - Only set duration_minutes if it's explicitly mentioned in the prompt
-                    - Generate meaningful descriptions based on the event type
-                    
-                    Examples:
-                    "team meeting tomorrow at 3pm" → needs_followup: true, followup_questions: ["What's the duration?", "Where is the meeting?"]
-                    "doctor appointment on Friday 2pm for 30 minutes at City Medical Center" → needs_followup: false
-                    
-                    Return only valid JSON."""
-                }
-            ]
-            
-            if chat_context:
-                messages.extend(chat_context)
-            
-            messages.append({
-                "role": "user",
-                "content": f"Parse this calendar prompt: '{text}'"
-            })
-            
-            response = client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=messages,
-                temperature=0.1
-            )
-            
-            content = response.choices[0].message.content.strip()
-            logger.info(f"[AI] Response: {content}")
-            
-            # Extract JSON from response
-            json_match = re.search(r'\{.*\}', content, re.DOTALL)
-            if json_match:
-                parsed_data = json.loads(json_match.group())
-            else:
-                parsed_data = json.loads(content)
-            
-            # Parse datetime
-            date_time_str = parsed_data.get('date_time')
-            if date_time_str:
-                parsed_datetime = datetime.fromisoformat(date_time_str.replace('Z', '+00:00'))
-            else:
-                raise ValueError("No date_time in response")
-            
-            return {
-                'success': True,
-                'title': parsed_data.get('title', 'Untitled Event'),
-                'date_time': parsed_datetime,
-                'duration_minutes': parsed_data.get('duration_minutes'),
-                'location': parsed_data.get('location'),
-                'description': parsed_data.get('description', ''),
-                'needs_followup': parsed_data.get('needs_followup', False),
-                'followup_questions': parsed_data.get('followup_questions', [])
-            }
-            
-        except Exception as e:
-            logger.error(f"[ERROR] AI parsing failed: {e}")
-            return {'success': False, 'error': str(e)}
-    
     def add_calendar_event(self, prompt: str, user_id: str, chat_context: Optional[list] = None) -> Dict[str, Any]:
         """Add calendar event using direct function calls."""
         logger.info(f"[MCP] Adding calendar event - Prompt: '{prompt}', User: {user_id}")
@@ -146,7 +50,7 @@ class SimpleMCPClient:
                 }
             
             # Parse the prompt
-            parsed_data = self.parse_prompt_with_ai(prompt, chat_context)
+            parsed_data = parse_prompt_with_ai(prompt, chat_context, datetime.now(get_user_timezone(service)), user_id=user_id)
             
             if not parsed_data['success']:
                 return {
@@ -171,7 +75,8 @@ class SimpleMCPClient:
                 start_time=parsed_data['date_time'],
                 duration_minutes=parsed_data.get('duration_minutes'),
                 location=parsed_data.get('location'),
-                description=parsed_data.get('description', '')
+                description=parsed_data.get('description', ''),
+                recurrence=parsed_data.get('recurrence')
             )
             
             if result['success']:
@@ -213,7 +118,7 @@ class SimpleMCPClient:
                 }
             
             # Parse the prompt
-            parsed_data = self.parse_prompt_with_ai(prompt, chat_context)
+            parsed_data = parse_prompt_with_ai(prompt, chat_context, datetime.now(get_user_timezone(service)), user_id=user_id)
             
             if not parsed_data['success']:
                 return {
@@ -231,7 +136,8 @@ class SimpleMCPClient:
                 start_time=parsed_data['date_time'],
                 duration_minutes=duration_minutes,
                 location=parsed_data.get('location'),
-                description=parsed_data.get('description', '')
+                description=parsed_data.get('description', ''),
+                recurrence=parsed_data.get('recurrence')
             )
             
             if result['success']:
@@ -346,7 +252,8 @@ class SimpleMCPClient:
                 start_time=final_data['date_time'],
                 duration_minutes=final_data.get('duration_minutes'),
                 location=final_data.get('location'),
-                description=final_data.get('description', '')
+                description=final_data.get('description', ''),
+                recurrence=final_data.get('recurrence')
             )
             
             if result['success']:
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Test script for the add flows: concurrent auth and parsing, and bulk adds
+"""
+
+import time
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+import calendar_api
+import mcp_handlers
+import mcp_server
+
+DELAY = 0.3
+
+class Stages:
+    """Swaps the slow stages of add_calendar_event_mcp for timed fakes."""
+
+    def __init__(self, authenticated=True):
+        self.authenticated = authenticated
+        self.parse_times = []
+        self.saved = {}
+
+    def get_calendar_service(self, user_id):
+        time.sleep(DELAY)
+        return object() if self.authenticated else None
+
+    def parse_prompt_with_ai(self, prompt, chat_context, current_time, on_progress=None, user_id=None):
+        self.parse_times.append(current_time)
+        time.sleep(DELAY)
+        return {'success': True, 'title': 'sync', 'date_time': current_time + timedelta(days=1),
+                'duration_minutes': None, 'location': None, 'needs_followup': True,
+                'followup_questions': ["What's the duration?"]}
+
+    def __enter__(self):
+        patches = [
+            (calendar_api, 'get_calendar_service', self.get_calendar_service),
+            (calendar_api, 'start_conflict_prefetch', lambda service: None),
+            (mcp_handlers, 'parse_prompt_with_ai', self.parse_prompt_with_ai),
+            (mcp_handlers, 'check_conflicts', lambda *args: []),
+            (mcp_handlers, 'get_user_timezone', lambda service: ZoneInfo('Asia/Tokyo')),
+            (mcp_handlers, 'create_event', lambda **event: {'success': True, 'link': 'https://calendar.google.com/e1'}),
+        ]
+        for module, name, fake in patches:
+            self.saved[(module, name)] = getattr(module, name)
+            setattr(module, name, fake)
+        return self
+
+    def __exit__(self, *exc):
+        for (module, name), original in self.saved.items():
+            setattr(module, name, original)
+
+def test_stages_overlap_when_timezone_cached():
+    """With a cached timezone, latency is the slower stage rather than the sum."""
+    calendar_api._settings_cache['stage-user'] = (time.time(), {'timezone': 'Europe/Berlin'})
+    with Stages() as stages:
+        started = time.monotonic()
+        result = mcp_handlers.add_calendar_event_mcp('sync tomorrow 10am', 'stage-user')
+        elapsed = time.monotonic() - started
+    assert result['needs_followup']
+    assert stages.parse_times[0].tzinfo == ZoneInfo('Europe/Berlin')
+    assert elapsed < 2 * DELAY, elapsed
+
+    # The web UI's confirm step takes the same staged path
+    with Stages() as stages:
+        started = time.monotonic()
+        confirmed = mcp_server.MCPServer().handle_add_calendar_event_with_duration(
+            {'prompt': 'sync tomorrow 10am', 'user_id': 'stage-user', 'duration_minutes': 45})
+        confirm_elapsed = time.monotonic() - started
+    assert confirmed['success'] and confirmed['duration'] == '45 minutes'
+    assert confirm_elapsed < 2 * DELAY, confirm_elapsed
+    print(f"✅ Auth and parsing overlapped ({elapsed:.2f}s, confirm {confirm_elapsed:.2f}s for two {DELAY}s stages)")
+
+def test_cold_timezone_and_missing_auth():
+    """An uncached timezone waits for auth; a logged-out user still gets needs_auth."""
+    calendar_api._settings_cache.pop('cold-user', None)
+    with Stages() as stages:
+        mcp_handlers.add_calendar_event_mcp('sync tomorrow 10am', 'cold-user')
+    assert stages.parse_times[0].tzinfo == ZoneInfo('Asia/Tokyo')
+
+    with Stages(authenticated=False):
+        result = mcp_handlers.add_calendar_event_mcp('sync tomorrow 10am', 'cold-user')
+    assert result['needs_auth']
+    print("✅ Cold timezone resolved through auth, logged-out user asked to log in")
+
+def test_bulk_add_reports_each_item():
+    """Complete items are created under per-item nonces; the rest report why not."""
+    created = []
+    def parse_prompts_with_ai(prompts, current_time, user_id=None):
+        start = current_time.replace(hour=9, minute=0, second=0, microsecond=0)
+        return [
+            {'success': True, 'title': 'standup', 'date_time': start, 'duration_minutes': 15, 'location': 'Room 4', 'needs_followup': False},
+            {'success': True, 'title': 'lunch', 'date_time': start, 'duration_minutes': None, 'location': None,
+             'needs_followup': True, 'followup_questions': ["What's the duration?"]},
+            {'success': False, 'error': 'Could not parse date/time'},
+        ]
+    def create_event(**event):
+        created.append(event)
+        return {'success': True, 'link': 'https://calendar.google.com/e1'}
+
+    prompts = mcp_handlers.split_bulk_prompts(text="- standup 9am for 15 min in Room 4\n\n2. lunch at noon\n* ???")
+    assert prompts == ['standup 9am for 15 min in Room 4', 'lunch at noon', '???']
+    with Stages() as stages:
+        stages.saved[(mcp_handlers, 'parse_prompts_with_ai')] = mcp_handlers.parse_prompts_with_ai
+        stages.saved[(mcp_handlers, 'create_event')] = mcp_handlers.create_event
+        mcp_handlers.parse_prompts_with_ai = parse_prompts_with_ai
+        mcp_handlers.create_event = create_event
+        result = mcp_handlers.add_calendar_events_bulk_mcp(prompts, 'stage-user', request_nonce='bulk1', write_behind=False)
+    assert (result['created'], result['pending_followup'], result['failed']) == (1, 1, 1)
+    assert [item['success'] for item in result['results']] == [True, False, False]
+    assert created[0]['request_nonce'] == 'bulk1-0'
+    assert result['results'][1]['parsed_data']['request_nonce'] == 'bulk1-1'
+    too_many = mcp_handlers.add_calendar_events_bulk_mcp(['x'] * (mcp_handlers.BULK_MAX_PROMPTS + 1), 'stage-user')
+    assert not too_many['success']
+    print(f"✅ Bulk add: {result['message']}")
+
+def test_server_delegates_to_handler():
+    """The MCP server's add tool is add_calendar_event_mcp plus argument checks."""
+    calls = []
+    def add_calendar_event_mcp(prompt, user_id, **kwargs):
+        calls.append((prompt, user_id, kwargs))
+        return {'success': True}
+
+    original = mcp_server.add_calendar_event_mcp
+    mcp_server.add_calendar_event_mcp = add_calendar_event_mcp
+    try:
+        server = mcp_server.MCPServer()
+        progress = lambda fields, ready: None
+        assert server.handle_add_calendar_event({'prompt': 'sync tomorrow 10am', 'user_id': 'u', 'request_nonce': 'n1',
+                                                 'write_behind': False}, progress) == {'success': True}
+        assert not server.handle_add_calendar_event({'prompt': '', 'user_id': 'u'})['success']
+        # The UI's confirm step can queue the insert too
+        server.handle_add_calendar_event_with_duration({'prompt': 'sync tomorrow 10am', 'user_id': 'u', 'duration_minutes': 30,
+                                                        'write_behind': True})
+    finally:
+        mcp_server.add_calendar_event_mcp = original
+    assert calls == [
+        ('sync tomorrow 10am', 'u', {'chat_context': [], 'request_nonce': 'n1', 'write_behind': False, 'on_progress': progress}),
+        ('sync tomorrow 10am', 'u', {'chat_context': [], 'request_nonce': None, 'write_behind': True, 'duration_minutes': 30}),
+    ]
+    print("✅ Server add tool delegated to the shared handler")
+
+def test_confirmed_slots_are_checked_for_conflicts():
+    """The UI's confirm and follow-up paths ask before booking over busy time."""
+    busy = [{'start': '2025-08-06T10:00:00+09:00', 'end': '2025-08-06T11:00:00+09:00'}]
+    created = []
+    def parse_prompt_with_ai(prompt, chat_context, current_time, on_progress=None, user_id=None):
+        return {'success': True, 'title': 'review', 'date_time': datetime(2025, 8, 6, 9, 30), 'duration_minutes': None,
+                'location': None, 'needs_followup': True, 'followup_questions': ['Where is this event?']}
+    def check_conflicts(service, start_time, duration_minutes=None, prefetch=None):
+        # 09:30 for half an hour is free; anything longer runs into the 10:00 block
+        return busy if (duration_minutes or 60) > 30 else []
+    def create_event(**event):
+        created.append(event)
+        return {'success': True, 'link': 'https://calendar.google.com/e1'}
+
+    patches = [
+        (calendar_api, 'get_calendar_service', lambda user_id: object()),
+        (calendar_api, 'start_conflict_prefetch', lambda service: None),
+        (mcp_server, 'get_calendar_service', lambda user_id: object()),
+        (mcp_handlers, 'get_calendar_service', lambda user_id: object()),
+        (mcp_handlers, 'get_user_timezone', lambda service: ZoneInfo('Asia/Tokyo')),
+        (mcp_handlers, 'parse_prompt_with_ai', parse_prompt_with_ai),
+        (mcp_handlers, 'check_conflicts', check_conflicts),
+        (mcp_handlers, 'create_event', create_event),
+    ]
+    saved = [(module, name, getattr(module, name)) for module, name, _ in patches]
+    for module, name, fake in patches:
+        setattr(module, name, fake)
+    try:
+        server = mcp_server.MCPServer()
+        asked = server.handle_add_calendar_event_with_duration(
+            {'prompt': 'review tomorrow 9:30', 'user_id': 'u', 'duration_minutes': 90, 'request_nonce': 'n1'})
+        assert asked['needs_followup'] and asked['conflicts'] == busy and not created
+        assert len(asked['followup_questions']) == 1 and 'overlaps' in asked['followup_questions'][0]
+        assert asked['parsed_data']['request_nonce'] == 'n1'
+
+        # Agreeing books it; a follow-up that lengthens a free slot is checked again
+        booked = server.handle_followup_response({'original_prompt': 'review tomorrow 9:30', 'followup_response': 'yes',
+                                                  'user_id': 'u', 'original_parsed_data': asked['parsed_data']})
+        assert booked['success'] and created[0]['duration_minutes'] == 90 and created[0]['request_nonce'] == 'n1'
+        free = dict(asked['parsed_data'], duration_minutes=30, conflicts=None)
+        longer = server.handle_followup_response({'original_prompt': 'review tomorrow 9:30', 'followup_response': '2 hours',
+                                                  'user_id': 'u', 'original_parsed_data': free})
+        assert longer['needs_followup'] and longer['conflicts'] == busy and len(created) == 1
+
+        short = server.handle_add_calendar_event_with_duration({'prompt': 'review tomorrow 9:30', 'user_id': 'u', 'duration_minutes': 30})
+        assert short['success'] and len(created) == 2
+    finally:
+        for module, name, original in saved:
+            setattr(module, name, original)
+    print("✅ Confirmed and followed-up slots checked for conflicts")
+
+def test_reply_shows_calendar_default_duration():
+    """Without a parsed duration the reply shows the length create_event will use."""
+    def parse_prompt_with_ai(prompt, chat_context, current_time, on_progress=None, user_id=None):
+        return {'success': True, 'title': 'sync', 'date_time': current_time + timedelta(days=1),
+                'duration_minutes': None, 'location': 'Room 4', 'needs_followup': False}
+
+    with Stages() as stages:
+        stages.saved[(mcp_handlers, 'parse_prompt_with_ai')] = mcp_handlers.parse_prompt_with_ai
+        stages.saved[(mcp_handlers, 'get_default_duration')] = mcp_handlers.get_default_duration
+        stages.saved[(mcp_handlers, 'get_calendar_service')] = mcp_handlers.get_calendar_service
+        mcp_handlers.parse_prompt_with_ai = parse_prompt_with_ai
+        mcp_handlers.get_default_duration = lambda service: 25
+        mcp_handlers.get_calendar_service = lambda user_id: object()
+        result = mcp_handlers.add_calendar_event_mcp('sync tomorrow 10am in Room 4', 'stage-user', write_behind=False)
+        followup = mcp_handlers.handle_followup_response(
+            'sync tomorrow 10am', 'Room 4', 'stage-user',
+            {'title': 'sync', 'date_time': datetime(2025, 8, 7, 10, 0), 'duration_minutes': None, 'location': 'Room 4'})
+    assert result['success'] and result['duration'] == '25 minutes'
+    assert '**Duration:** 25 minutes' in result['message']
+    assert followup['success'] and followup['duration'] == '25 minutes'
+    print("✅ Reply duration matches the calendar default")
+
+if __name__ == "__main__":
+    test_stages_overlap_when_timezone_cached()
+    test_cold_timezone_and_missing_auth()
+    test_bulk_add_reports_each_item()
+    test_server_delegates_to_handler()
+    test_confirmed_slots_are_checked_for_conflicts()
+    test_reply_shows_calendar_default_duration()
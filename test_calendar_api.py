@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Test script for the Google Calendar helpers, using in-memory fakes of the API
+"""
+
+import json
+import re
+import time
+from datetime import datetime
+from types import SimpleNamespace
+from zoneinfo import ZoneInfo
+
+import httplib2
+from googleapiclient.errors import HttpError
+
+import calendar_api
+import mcp_handlers
+from mcp_handlers import apply_conflicts
+
+def request(result):
+    """A googleapiclient-style request whose execute() returns result."""
+    return SimpleNamespace(http=None, execute=lambda http=None: result)
+
+class FakeFreeBusy:
+    """freebusy().query() answering in UTC, like the real API."""
+
+    def __init__(self, calendars):
+        self.calendars = calendars
+        self.bodies = []
+
+    def query(self, body):
+        self.bodies.append(body)
+        return request({'calendars': {calendar_id: self.calendars.get(calendar_id, {'busy': []})
+                                      for calendar_id in (item['id'] for item in body['items'])}})
+
+class FakeEvents:
+    """events() that stores inserts by ID and answers a reused ID with 409."""
+
+    def __init__(self):
+        self.stored = {}
+        self.series = []
+        self.later = []
+        self.api_instances = {}
+
+    def insert(self, calendarId, body):
+        def execute(http=None):
+            if body['id'] in self.stored:
+                raise HttpError(httplib2.Response({'status': 409}), json.dumps({'error': {'code': 409}}).encode('utf-8'))
+            self.stored[body['id']] = dict(body, status='confirmed', htmlLink=f"https://calendar.google.com/{body['id']}")
+            return self.stored[body['id']]
+        return SimpleNamespace(http=None, execute=execute)
+
+    def get(self, calendarId, eventId):
+        return request(self.stored[eventId])
+
+    def list(self, calendarId, singleEvents, **kwargs):
+        # The expansion window's items, or with singleEvents the events after it
+        return request({'items': self.later if singleEvents else self.series})
+
+    def instances(self, calendarId, eventId, **kwargs):
+        return request({'items': self.api_instances.get(eventId, [])})
+
+def fake_service(user_id, timezone='America/New_York', calendars=None):
+    """A service for user_id with cached settings, so no settings call is made."""
+    calendar_api._settings_cache[user_id] = (time.time(), {'timezone': timezone, 'defaultEventLength': '60'})
+    calendar_api.invalidate_busy_cache(user_id)
+    freebusy = FakeFreeBusy(calendars or {})
+    events = FakeEvents()
+    return SimpleNamespace(calendar_user_id=user_id, freebusy=lambda: freebusy, events=lambda: events)
+
+def timed(event_id, start, end, ical_uid=None):
+    event = {'id': event_id, 'start': {'dateTime': start}, 'end': {'dateTime': end}}
+    if ical_uid:
+        event['iCalUID'] = ical_uid
+    return event
+
+def test_merge_orders_and_dedups_calendars():
+    """Streams merge by start time; an event shared by two calendars is listed once."""
+    work, team = {'id': 'work', 'summary': 'Work'}, {'id': 'team', 'summary': 'Team'}
+    shared = timed('inv', '2025-08-05T10:00:00Z', '2025-08-05T11:00:00Z', ical_uid='inv@google.com')
+    streams = [
+        [(work, timed('w1', '2025-08-05T09:00:00Z', '2025-08-05T09:30:00Z')), (work, shared),
+         (work, timed('w2', '2025-08-05T15:00:00+02:00', '2025-08-05T16:00:00+02:00'))],
+        [(team, dict(shared, id='inv-copy')), (team, timed('t1', '2025-08-05T12:00:00Z', '2025-08-05T12:30:00Z'))],
+    ]
+    merged = calendar_api._merge_calendar_streams(streams, max_results=10, tz=ZoneInfo('UTC'))
+    assert [event['id'] for _, event in merged] == ['w1', 'inv', 't1', 'w2']
+    assert [calendar['id'] for calendar, _ in merged] == ['work', 'work', 'team', 'work']
+
+    assert [event['id'] for _, event in calendar_api._merge_calendar_streams(streams, max_results=2, tz=ZoneInfo('UTC'))] == ['w1', 'inv']
+    print("✅ Calendars merged in start order with shared events listed once")
+
+def test_conflicts_are_worded_in_local_time():
+    """A 2pm booking in New York overlaps a busy 18:00Z block, shown as 02:00 PM."""
+    service = fake_service('conflicts@example.com', calendars={
+        'primary': {'busy': [{'start': '2025-08-05T18:00:00Z', 'end': '2025-08-05T19:00:00Z'}]}})
+    new_york = ZoneInfo('America/New_York')
+    conflicts = calendar_api.check_conflicts(service, datetime(2025, 8, 5, 14, 0, tzinfo=new_york), 30)
+    assert conflicts == [{'start': '2025-08-05T14:00:00-04:00', 'end': '2025-08-05T15:00:00-04:00'}]
+
+    parsed = apply_conflicts({'title': 'sync', 'followup_questions': []}, conflicts)
+    assert parsed['needs_followup']
+    assert '(02:00 PM-03:00 PM)' in parsed['followup_questions'][0], parsed['followup_questions']
+    print("✅ Conflicts reported in the user's timezone")
+
+def test_free_slots_flag_unreadable_calendars():
+    """Attendee calendars freebusy couldn't read are reported, not treated as free."""
+    not_found = {'errors': [{'domain': 'global', 'reason': 'notFound'}]}
+    service = fake_service('slots@example.com', timezone='Asia/Tokyo', calendars={
+        'primary': {'busy': [{'start': '2025-08-05T00:00:00Z', 'end': '2025-08-05T01:00:00Z'}]},
+        'bob@example.com': not_found, 'eve@example.com': not_found})
+    original = mcp_handlers.get_calendar_service
+    mcp_handlers.get_calendar_service = lambda user_id: service
+    try:
+        result = mcp_handlers.find_free_slots_mcp('slots@example.com', 60, ['primary', 'bob@example.com'],
+                                                  window_start='2025-08-05T09:00', window_end='2025-08-05T12:00')
+        blind = mcp_handlers.find_free_slots_mcp('slots@example.com', 60, ['bob@example.com', 'eve@example.com'],
+                                                 window_start='2025-08-05T09:00', window_end='2025-08-05T12:00')
+    finally:
+        mcp_handlers.get_calendar_service = original
+    assert result['success'] and result['unavailable_calendars'] == ['bob@example.com']
+    assert 'bob@example.com' in result['warning']
+    # The window defaults to the user's Calendar timezone: 09:00-10:00 Tokyo is busy
+    starts = sorted(slot['start'] for slot in result['slots'])
+    assert starts[0] == '2025-08-05T10:00:00+09:00', starts
+    assert any(slot['display'] == 'Tuesday, August 05 at 10:00 AM' for slot in result['slots'])
+    assert not blind['success'] and blind['unavailable_calendars'] == ['bob@example.com', 'eve@example.com']
+    print("✅ Unreadable calendars reported instead of assumed free")
+
+def test_event_ids_and_duplicate_inserts():
+    """Nonce'd requests get stable base32hex IDs and replay to the existing event; others are new events."""
+    start = datetime(2025, 8, 5, 9, 0)
+    ids = [calendar_api.make_event_id('ids@example.com', 'standup', start, 15, request_nonce='n1') for _ in range(2)]
+    ids.append(calendar_api.make_event_id('ids@example.com', 'standup', start, 15))
+    assert ids[0] == ids[1] != ids[2]
+    assert all(re.fullmatch(r'[0-9a-v]{5,1024}', event_id) for event_id in ids), ids
+
+    service = fake_service('ids@example.com')
+    first = calendar_api.create_event(service, 'standup', start, 15, request_nonce='n1')
+    retry = calendar_api.create_event(service, 'standup', start, 15, request_nonce='n1')
+    assert first['success'] and not first.get('duplicate')
+    assert retry['success'] and retry['duplicate'] and retry['event']['id'] == first['event']['id']
+
+    # Without a nonce, the same content twice is two events
+    again = [calendar_api.create_event(service, 'standup', start, 15) for _ in range(2)]
+    assert all(result['success'] and not result.get('duplicate') for result in again)
+    assert len(service.events().stored) == 3
+
+    service.events().stored[first['event']['id']]['status'] = 'cancelled'
+    deleted = calendar_api.create_event(service, 'standup', start, 15, request_nonce='n1')
+    assert not deleted['success'] and 'deleted' in deleted['error']
+    print("✅ Event IDs: retries deduplicated, repeats and re-adds without a nonce created")
+
+def all_day(event_id, day, next_day):
+    return {'id': event_id, 'start': {'date': day}, 'end': {'date': next_day}}
+
+def test_local_expansion_listing():
+    """Series expand in the user's zone, broken rules use the API's instances and later events are kept."""
+    auckland = 'Pacific/Auckland'
+    service = fake_service('series@example.com', timezone=auckland)
+    events = service.events()
+    zone = {'timeZone': auckland}
+    events.series = [
+        # Over at midnight Auckland time, which is already past (01:00 on the 6th in Auckland)
+        all_day('holiday', '2025-08-05', '2025-08-06'),
+        all_day('offsite', '2025-08-06', '2025-08-07'),
+        {'id': 'gym', 'recurrence': ['RRULE:FREQ=DAILY;UNTIL=20250807'],
+         'start': dict(zone, dateTime='2025-08-04T07:00:00+12:00'), 'end': dict(zone, dateTime='2025-08-04T08:00:00+12:00')},
+        {'id': 'broken', 'recurrence': ['RRULE:FREQ=WEEKLY;BYDAY=XX'],
+         'start': dict(zone, dateTime='2025-08-04T12:00:00+12:00'), 'end': dict(zone, dateTime='2025-08-04T13:00:00+12:00')},
+    ]
+    events.api_instances['broken'] = [
+        timed('broken_20250806T000000Z', '2025-08-06T12:00:00+12:00', '2025-08-06T13:00:00+12:00')]
+    events.later = [timed('conference', '2025-10-01T09:00:00+13:00', '2025-10-01T17:00:00+13:00')]
+
+    listed = calendar_api._list_calendar_series(service, 'primary', '2025-08-05T13:00:00Z', 10)
+    assert [event['id'] for event in listed] == [
+        'offsite', 'gym_20250805T190000Z', 'broken_20250806T000000Z', 'gym_20250806T190000Z', 'conference']
+    assert len(calendar_api._list_calendar_series(service, 'primary', '2025-08-05T13:00:00Z', 2)) == 2
+    print("✅ Locally expanded agenda matches the API's listing")
+
+if __name__ == "__main__":
+    test_merge_orders_and_dedups_calendars()
+    test_conflicts_are_worded_in_local_time()
+    test_free_slots_flag_unreadable_calendars()
+    test_event_ids_and_duplicate_inserts()
+    test_local_expansion_listing()
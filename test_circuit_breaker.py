@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Test script for the latency-aware circuit breaker around the AI parser
+"""
+
+import parsing_engine
+from circuit_breaker import CircuitBreaker, CLOSED, OPEN
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+def make_breaker(clock):
+    return CircuitBreaker('test', window_seconds=60, min_samples=5, p95_seconds=5, error_rate=0.5, open_seconds=30, clock=clock)
+
+def test_slow_calls_open_and_probe_recovers():
+    """A slow p95 opens the breaker; after the open period one probe decides recovery."""
+    clock = Clock()
+    breaker = make_breaker(clock)
+    for latency in (1, 1, 1, 1):
+        breaker.record(latency)
+    breaker.record(12)
+    assert breaker.state == OPEN and not breaker.allow()
+
+    clock.now += 31
+    assert breaker.allow()          # the probe
+    assert not breaker.allow()      # everyone else stays local meanwhile
+    breaker.record(9)               # still slow
+    assert breaker.state == OPEN
+
+    clock.now += 31
+    assert breaker.allow()
+    breaker.record(0.8)
+    assert breaker.state == CLOSED and breaker.allow()
+    stats = breaker.get_stats()
+    assert stats['opened'] == 2 and stats['probes'] == 2 and stats['short_circuited'] == 2
+    print(f"✅ Breaker opened on slow p95 and recovered through probes: {stats}")
+
+def test_error_rate_opens_and_old_samples_expire():
+    """Mostly failing calls open the breaker; failures older than the window don't count."""
+    clock = Clock()
+    breaker = make_breaker(clock)
+    for ok in (False, False, True):
+        breaker.record(0.5, ok)
+    clock.now += 61
+    for ok in (True, True, False, True, True):
+        breaker.record(0.5, ok)
+    assert breaker.state == CLOSED
+    for _ in range(4):
+        breaker.record(0.5, False)
+    assert breaker.state == OPEN
+    print("✅ Error rate opened the breaker, expired samples ignored")
+
+def test_open_breaker_parses_locally():
+    """While open, prompts never reach OpenAI."""
+    class Unreachable:
+        @property
+        def chat(self):
+            raise AssertionError("OpenAI called while the breaker is open")
+
+    clock = Clock()
+    breaker = make_breaker(clock)
+    breaker._open('test')
+    previous = parsing_engine.llm_breaker, parsing_engine._openai_client
+    parsing_engine.llm_breaker, parsing_engine._openai_client = breaker, Unreachable()
+    try:
+        result = parsing_engine._parse_with_model('dentist tomorrow at 3pm', None, parsing_engine.datetime(2025, 8, 6, 11, 10))
+    finally:
+        parsing_engine.llm_breaker, parsing_engine._openai_client = previous
+    assert result.get('source') == 'fallback'
+    print("✅ Open breaker routed the prompt to the local parser")
+
+if __name__ == "__main__":
+    test_slow_calls_open_and_probe_recovers()
+    test_error_rate_opens_and_old_samples_expire()
+    test_open_breaker_parses_locally()
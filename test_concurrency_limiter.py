@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Test script for the AIMD concurrency limiter in front of OpenAI
+"""
+
+import os
+import threading
+import time
+
+import httpx
+
+import parsing_engine
+from circuit_breaker import CircuitBreaker
+from concurrency_limiter import AdaptiveLimiter, LimiterTimeout
+
+class Overloaded(Exception):
+    pass
+
+def make_limiter(**options):
+    return AdaptiveLimiter('test', lambda error: isinstance(error, Overloaded), **options)
+
+def wait_for(condition):
+    deadline = time.monotonic() + 2
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+
+def test_additive_increase_multiplicative_decrease():
+    """Successes grow the limit slowly; a burst of 429s halves it once."""
+    limiter = make_limiter(initial=4, max_limit=6)
+    for _ in range(8):
+        with limiter.slot('u'):
+            pass
+    assert limiter.get_stats()['limit'] == 5
+    for _ in range(3):
+        try:
+            with limiter.slot('u'):
+                raise Overloaded()
+        except Overloaded:
+            pass
+    stats = limiter.get_stats()
+    assert stats['limit'] == 2 and stats['decreases'] == 1 and stats['overloads'] == 3
+    try:
+        with limiter.slot('u'):
+            raise ValueError('bad request')
+    except ValueError:
+        pass
+    assert limiter.get_stats()['limit'] == 2
+    print(f"✅ AIMD limit adapted: {stats}")
+
+def test_waiters_served_round_robin_by_user():
+    """A burst from one user doesn't make another user wait behind all of it."""
+    limiter = make_limiter(initial=1, max_limit=1, max_wait=2)
+    limiter.acquire('holder')
+    order = []
+    def waiter(user, n):
+        with limiter.slot(user):
+            order.append(f'{user}{n}')
+    threads = []
+    for user, n in (('a', 1), ('a', 2), ('a', 3), ('b', 1)):
+        thread = threading.Thread(target=waiter, args=(user, n))
+        thread.start()
+        threads.append(thread)
+        wait_for(lambda: limiter.get_stats()['queue_depth'] == len(threads))
+    stats = limiter.get_stats()
+    assert stats['waiting_users'] == 2 and stats['in_flight'] == 1
+    limiter.release()
+    for thread in threads:
+        thread.join()
+    assert order == ['a1', 'b1', 'a2', 'a3'], order
+    print(f"✅ Waiters served fairly: {order}")
+
+def test_max_wait_times_out():
+    """A caller gives up after max_wait and leaves the queue clean."""
+    limiter = make_limiter(initial=1, max_wait=0.1)
+    limiter.acquire('holder')
+    try:
+        limiter.acquire('late')
+    except LimiterTimeout:
+        pass
+    else:
+        raise AssertionError("acquire did not time out")
+    stats = limiter.get_stats()
+    assert stats['timeouts'] == 1 and stats['queue_depth'] == 0 and stats['waiting_users'] == 0
+    print("✅ Queue wait bounded")
+
+def test_rate_limit_reaches_limiter():
+    """The shared client doesn't retry a 429 itself, so the limiter shrinks on the first one."""
+    requests = []
+    def rate_limited(request):
+        requests.append(request)
+        return httpx.Response(429, json={'error': {'message': 'Rate limit reached', 'type': 'requests'}})
+
+    limiter = AdaptiveLimiter('openai', parsing_engine._is_overload, initial=4)
+    saved = (parsing_engine._openai_client, parsing_engine.llm_limiter, parsing_engine.llm_breaker,
+             parsing_engine.LLM_HEDGING, os.environ.get('OPENAI_API_KEY'))
+    os.environ['OPENAI_API_KEY'] = 'test-key'
+    parsing_engine._openai_client = None
+    try:
+        client = parsing_engine.get_openai_client()
+        assert client.max_retries == 0
+        parsing_engine._openai_client = client.with_options(http_client=httpx.Client(transport=httpx.MockTransport(rate_limited)))
+        parsing_engine.llm_limiter, parsing_engine.llm_breaker = limiter, CircuitBreaker('test', min_samples=100)
+        parsing_engine.LLM_HEDGING = False
+        parsing_engine.parse_prompt_with_ai('catch up with the landlord about the boiler sometime', user_id='aimd-user')
+    finally:
+        (parsing_engine._openai_client, parsing_engine.llm_limiter, parsing_engine.llm_breaker,
+         parsing_engine.LLM_HEDGING, api_key) = saved
+        if api_key is None:
+            os.environ.pop('OPENAI_API_KEY', None)
+        else:
+            os.environ['OPENAI_API_KEY'] = api_key
+    assert len(requests) == 1, f"429 retried {len(requests) - 1} times before the limiter saw it"
+    assert limiter.get_stats()['limit'] < 4
+    print("✅ 429 reaches the limiter")
+
+if __name__ == "__main__":
+    test_additive_increase_multiplicative_decrease()
+    test_waiters_served_round_robin_by_user()
+    test_max_wait_times_out()
+    test_rate_limit_reaches_limiter()
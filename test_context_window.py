@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Test script for token-budgeted chat context
+"""
+
+from datetime import datetime
+
+from context_window import fit_context, message_tokens
+
+def conversation(rounds):
+    """A browser-style chatContext: prompt, follow-up question, user reply, repeated."""
+    turns = []
+    for i in range(rounds):
+        turns.append({'role': 'user', 'content': f'project review {i} tomorrow at 3pm for 45 minutes at Room {i}'})
+        turns.append({'role': 'assistant', 'content': "Please provide additional details: What's the duration? Where is this event?"})
+    return turns
+
+def test_short_context_kept_verbatim():
+    """Small conversations pass through untouched, minus the repeated prompt."""
+    turns = conversation(1) + [{'role': 'user', 'content': 'at Room 9'}]
+    fitted = fit_context(turns, 'at Room 9')
+    assert fitted == turns[:-1]
+    assert fit_context([{'role': 'user', 'content': 'gym at 7pm'}], 'gym at 7pm') == []
+    print("✅ Short context kept verbatim")
+
+def test_long_context_fits_budget():
+    """Old turns collapse into one summary; the newest stay verbatim within the budget."""
+    turns = conversation(40)
+    fitted = fit_context(turns, 'something new', budget=200, recent_turns=4)
+    assert sum(message_tokens(turn) for turn in fitted) <= 200
+    assert fitted[0]['role'] == 'system' and 'Room 37' in fitted[0]['content']
+    assert fitted[-4:] == turns[-4:]
+
+    # "tomorrow" in the summary is the user's tomorrow
+    fitted = fit_context(turns, 'something new', budget=200, recent_turns=4, current_time=datetime(2025, 8, 6, 23, 30))
+    assert 'date time: 2025-08-07 15:00' in fitted[0]['content'], fitted[0]['content']
+    print(f"✅ {len(turns)} turns fitted into {len(fitted)} messages")
+
+def test_oversized_turn_truncated():
+    """A single huge turn is cut down rather than blowing the budget."""
+    fitted = fit_context([{'role': 'user', 'content': 'lorem ipsum ' * 2000}], budget=100)
+    assert len(fitted) == 1 and message_tokens(fitted[0]) <= 100
+    assert fit_context([{'role': 'tool', 'content': 'x'}, 'junk', {'role': 'user'}]) == []
+    print("✅ Oversized and malformed turns handled")
+
+if __name__ == "__main__":
+    test_short_context_kept_verbatim()
+    test_long_context_fits_budget()
+    test_oversized_turn_truncated()
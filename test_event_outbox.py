@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Test script for the write-behind event outbox
+"""
+
+import os
+import tempfile
+import time
+from datetime import datetime
+
+from event_outbox import EventOutbox
+
+class FakeInserts:
+    """Stands in for create_event, failing the first few calls."""
+
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.calls = []
+
+    def __call__(self, service, title, start_time, duration_minutes=None, location=None, description=None, request_nonce=None, recurrence=None):
+        self.calls.append(request_nonce)
+        if len(self.calls) <= self.failures:
+            return {'success': False, 'error': 'Rate limit exceeded'}
+        return {'success': True, 'event': {'id': f'evt{request_nonce}'}, 'link': 'https://calendar.google.com/event'}
+
+def make_outbox(inserts, max_attempts=8):
+    path = os.path.join(tempfile.mkdtemp(), 'outbox.db')
+    return EventOutbox(path, service_factory=lambda user_id: object(), max_attempts=max_attempts, insert_event=inserts)
+
+def test_enqueue_then_insert():
+    """A queued insert is reported pending, then done once a worker runs it."""
+    inserts = FakeInserts()
+    outbox = make_outbox(inserts)
+    job_id = outbox.enqueue('outbox@example.com', 'Standup', datetime(2025, 8, 4, 9, 0), 15, None, '', 'nonce-1')
+    assert outbox.get_status(job_id)['status'] == 'pending'
+
+    assert outbox.run_once()
+    status = outbox.get_status(job_id)
+    assert status['status'] == 'done'
+    assert status['result']['event_id'] == 'evtnonce-1'
+    assert not outbox.run_once()
+    print("✅ Queued insert completed")
+
+def test_failed_insert_is_retried_with_same_nonce():
+    """A failed attempt is rescheduled and replayed under the same nonce."""
+    inserts = FakeInserts(failures=1)
+    outbox = make_outbox(inserts)
+    job_id = outbox.enqueue('outbox@example.com', 'Review', datetime(2025, 8, 4, 14, 0))
+
+    assert outbox.run_once()
+    status = outbox.get_status(job_id)
+    assert status['status'] == 'pending' and status['attempts'] == 1
+
+    with outbox._connect() as conn:
+        conn.execute("UPDATE event_jobs SET next_attempt_at = 0 WHERE id = ?", (job_id,))
+    assert outbox.run_once()
+    assert outbox.get_status(job_id)['status'] == 'done'
+    assert inserts.calls == [job_id, job_id]
+    print("✅ Failed insert retried with the same nonce")
+
+def test_gives_up_after_max_attempts():
+    """A job that keeps failing is marked failed."""
+    outbox = make_outbox(FakeInserts(failures=10), max_attempts=1)
+    job_id = outbox.enqueue('outbox@example.com', 'Lunch', datetime(2025, 8, 4, 12, 0))
+    outbox.run_once()
+    status = outbox.get_status(job_id)
+    assert status['status'] == 'failed'
+    assert status['error'] == 'Rate limit exceeded'
+    print("✅ Job failed after max attempts")
+
+def test_abandoned_job_is_reclaimed():
+    """A job leased by a worker that died is picked up after its lease expires."""
+    inserts = FakeInserts()
+    outbox = make_outbox(inserts)
+    job_id = outbox.enqueue('outbox@example.com', '1:1', datetime(2025, 8, 4, 16, 0))
+    assert outbox.claim_next()['id'] == job_id
+    assert outbox.claim_next() is None
+
+    with outbox._connect() as conn:
+        conn.execute("UPDATE event_jobs SET lease_until = ? WHERE id = ?", (time.time() - 1, job_id))
+    assert outbox.run_once()
+    assert outbox.get_status(job_id)['status'] == 'done'
+    print("✅ Abandoned job reclaimed")
+
+if __name__ == "__main__":
+    test_enqueue_then_insert()
+    test_failed_insert_is_retried_with_same_nonce()
+    test_gives_up_after_max_attempts()
+    test_abandoned_job_is_reclaimed()
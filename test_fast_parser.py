@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Test script for the fast-path parser against a labelled prompt corpus
+"""
+
+from datetime import datetime
+
+from fast_parser import fast_parse, FAST_PARSE_THRESHOLD
+
+NOW = datetime(2025, 8, 6, 11, 10)  # Wednesday
+
+# (prompt, expected fields) - None means the prompt must be left to the AI parser
+CORPUS = [
+    ("standup tomorrow 9am 15 min", {'title': 'standup', 'date_time': datetime(2025, 8, 7, 9, 0), 'duration_minutes': 15}),
+    ("Team meeting tomorrow at 3pm", {'title': 'Team meeting', 'date_time': datetime(2025, 8, 7, 15, 0), 'location': None}),
+    ("doctor appointment on Friday 2pm for 30 minutes at City Medical Center",
+     {'title': 'doctor appointment', 'date_time': datetime(2025, 8, 8, 14, 0), 'duration_minutes': 30, 'location': 'City Medical Center'}),
+    ("call with John in 2 hours", {'title': 'call with John', 'date_time': datetime(2025, 8, 6, 13, 10)}),
+    ("call mom in 30 minutes", {'title': 'call mom', 'date_time': datetime(2025, 8, 6, 11, 40)}),
+    ("lunch with Ana on Aug 12 at 12:30pm for an hour at Cafe Roma",
+     {'title': 'lunch with Ana', 'date_time': datetime(2025, 8, 12, 12, 30), 'duration_minutes': 60, 'location': 'Cafe Roma'}),
+    ("standup every weekday at 9:30am for 15 minutes in Room 4",
+     {'title': 'standup', 'date_time': datetime(2025, 8, 7, 9, 30), 'duration_minutes': 15, 'location': 'Room 4',
+      'recurrence': 'RRULE:FREQ=WEEKLY;BYDAY=MO,TU,WE,TH,FR'}),
+    ("review 2025-09-01 at 14:00 for 45 minutes", {'title': 'review', 'date_time': datetime(2025, 9, 1, 14, 0), 'duration_minutes': 45}),
+    ("dentist on the 5th of September at 10am", {'title': 'dentist', 'date_time': datetime(2025, 9, 5, 10, 0)}),
+    ("Schedule a sync with design team today at 4pm for half an hour",
+     {'title': 'sync with design team', 'date_time': datetime(2025, 8, 6, 16, 0), 'duration_minutes': 30}),
+    ("interview Monday 10:30am for 1 hour at HQ", {'title': 'interview', 'date_time': datetime(2025, 8, 11, 10, 30), 'duration_minutes': 60, 'location': 'HQ'}),
+    ("yoga on Thursday at 6pm for 90 minutes", {'title': 'yoga', 'date_time': datetime(2025, 8, 7, 18, 0), 'duration_minutes': 90}),
+    ("1-on-1 with Priya on 8/20 at 11am", None),
+    ("board meeting Sept 3 at 9am for 2 hours at The Boardroom",
+     {'title': 'board meeting', 'date_time': datetime(2025, 9, 3, 9, 0), 'duration_minutes': 120, 'location': 'The Boardroom'}),
+    ("pick up kids today at 3:15pm", {'title': 'pick up kids', 'date_time': datetime(2025, 8, 6, 15, 15)}),
+    ("flight to Boston tomorrow at 6am", {'title': 'flight to Boston', 'date_time': datetime(2025, 8, 7, 6, 0)}),
+    ("team lunch at noon tomorrow at Olive Garden", {'title': 'team lunch', 'date_time': datetime(2025, 8, 7, 12, 0), 'location': 'Olive Garden'}),
+    ("Book a haircut Saturday 11am for 45 min", {'title': 'haircut', 'date_time': datetime(2025, 8, 9, 11, 0), 'duration_minutes': 45}),
+    ("daily standup at 9am", {'title': 'standup', 'date_time': datetime(2025, 8, 7, 9, 0), 'recurrence': 'RRULE:FREQ=DAILY'}),
+    ("planning meeting on 2025-08-18 at 13:30 in Room 12",
+     {'title': 'planning meeting', 'date_time': datetime(2025, 8, 18, 13, 30), 'location': 'Room 12'}),
+    ("Discuss the monthly budget tomorrow at 2pm",
+     {'title': 'Discuss the monthly budget', 'date_time': datetime(2025, 8, 7, 14, 0), 'recurrence': None}),
+    # Shapes the grammar should not guess at
+    ("weekly report review Friday 3pm", None),
+    ("Call Bob at 5pm in 2 days", None),
+    ("Interview at 10am tomorrow in 2 weeks", None),
+    ("meeting at 9pm yesterday", None),
+    ("Review at 3pm not tomorrow but friday", None),
+    ("dentist at 4pm tomorrow, actually make it thursday", None),
+    ("gym tomorrow morning", None),
+    ("meeting sometime next week", None),
+    ("dinner next friday at 7pm", None),
+    ("coffee at starbucks tomorrow 8am", None),
+    ("1:1 with Sam at 3:30", None),
+    ("call the bank around 2pm tomorrow", None),
+    ("party on saturday evening", None),
+    ("remind me about the report before 5pm", None),
+    ("conference from Monday to Wednesday", None),
+    ("move my 3pm to 4pm", None),
+]
+
+def check(prompt, expected):
+    """Return (accepted, correct) for one labelled prompt."""
+    result = fast_parse(prompt, NOW)
+    accepted = result['success'] and result['confidence'] >= FAST_PARSE_THRESHOLD
+    if expected is None:
+        return accepted, not accepted
+    if not accepted:
+        return False, True
+    return True, all(result.get(field) == value for field, value in expected.items())
+
+def test_corpus_precision_and_coverage():
+    """Everything the fast path accepts is right, and it covers most common shapes."""
+    accepted = 0
+    wrong = []
+    for prompt, expected in CORPUS:
+        took, correct = check(prompt, expected)
+        accepted += took
+        if not correct:
+            wrong.append((prompt, fast_parse(prompt, NOW)))
+    assert not wrong, wrong
+    parseable = sum(1 for _, expected in CORPUS if expected is not None)
+    coverage = accepted / len(CORPUS)
+    assert accepted >= 0.9 * parseable
+    print(f"✅ Fast path took {accepted}/{len(CORPUS)} prompts ({coverage:.0%}) off OpenAI with no mistakes")
+
+def test_followups_match_missing_fields():
+    """Missing duration or location still triggers the usual follow-up questions."""
+    result = fast_parse("Team meeting tomorrow at 3pm", NOW)
+    assert result['needs_followup']
+    assert result['followup_questions'] == ["What's the duration?", 'Where is this event?']
+    complete = fast_parse("doctor appointment on Friday 2pm for 30 minutes at City Medical Center", NOW)
+    assert not complete['needs_followup']
+    print("✅ Follow-up questions match missing fields")
+
+if __name__ == "__main__":
+    test_corpus_precision_and_coverage()
+    test_followups_match_missing_fields()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Test script for hedged requests
+"""
+
+import json
+import threading
+import time
+from datetime import datetime
+from types import SimpleNamespace
+
+import parsing_engine
+from circuit_breaker import CircuitBreaker, LatencyWindow
+from hedging import Hedger
+
+def make_hedger(**options):
+    window = LatencyWindow(60)
+    for _ in range(20):
+        window.add(0.05)
+    options.setdefault('min_delay', 0.05)
+    return Hedger('test', window, percentile=0.9, min_samples=10, workers=4, **options)
+
+def slow_then_fast():
+    """First call hangs until cancelled; later calls answer at once."""
+    calls = []
+    def attempt(cancelled):
+        calls.append(cancelled)
+        if len(calls) == 1:
+            cancelled.wait(2)
+            return 'slow'
+        return 'fast'
+    return attempt, calls
+
+def test_hedge_wins_and_cancels_primary():
+    """A stuck first call is overtaken by the hedge, which cancels it."""
+    hedger = make_hedger()
+    assert abs(hedger.delay() - 0.05) < 1e-9
+    assert hedger.run(lambda cancelled: 'quick') == 'quick'
+
+    attempt, calls = slow_then_fast()
+    started = time.monotonic()
+    assert hedger.run(attempt) == 'fast'
+    assert time.monotonic() - started < 1
+    assert calls[0].wait(1)
+    stats = hedger.get_stats()
+    assert stats['calls'] == 2 and stats['hedged'] == 1 and stats['hedge_wins'] == 1
+    print(f"✅ Hedge won and cancelled the slow call: {stats}")
+
+def test_hedge_rate_cap_and_errors():
+    """Past the cap the caller just waits; a failing hedge leaves the primary's answer."""
+    hedger = make_hedger(max_per_minute=0.001, burst=1)
+    attempt, _ = slow_then_fast()
+    assert hedger.run(attempt) == 'fast'
+
+    assert hedger.run(lambda cancelled: time.sleep(0.2) or 'waited') == 'waited'
+    assert hedger.get_stats()['rate_capped'] == 1
+
+    hedger = make_hedger()
+    failed = threading.Event()
+    def flaky(cancelled):
+        if not failed.is_set():
+            failed.set()
+            time.sleep(0.2)
+            return 'primary'
+        raise RuntimeError('hedge failed')
+    assert hedger.run(flaky) == 'primary'
+    assert hedger.get_stats()['primary_wins'] == 1
+    print("✅ Hedge rate capped and failed hedges ignored")
+
+class LingeringOpenAI:
+    """The first stream sends its tool call at once but takes a while to end; later ones end at once."""
+
+    def __init__(self, arguments, linger):
+        self.arguments = arguments
+        self.linger = linger
+        self.calls = 0
+        self.finished = threading.Event()
+        self.chat = SimpleNamespace(completions=self)
+
+    def create(self, **kwargs):
+        self.calls += 1
+        first = self.calls == 1
+        call = SimpleNamespace(function=SimpleNamespace(name='record_event', arguments=self.arguments))
+        yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=None, tool_calls=[call]))])
+        if first:
+            time.sleep(self.linger)
+            self.finished.set()
+
+def test_cancelled_loser_not_recorded():
+    """Only attempts that weren't cancelled count toward the breaker's latency window."""
+    arguments = json.dumps({'title': 'swim', 'date_time': '2025-08-07T07:00:00', 'needs_followup': True})
+    fake = LingeringOpenAI(arguments, linger=0.5)
+    breaker = CircuitBreaker('test', min_samples=100)
+    saved = (parsing_engine._openai_client, parsing_engine.llm_breaker, parsing_engine.llm_hedger, parsing_engine.LLM_HEDGING)
+    parsing_engine._openai_client, parsing_engine.llm_breaker = fake, breaker
+    parsing_engine.llm_hedger, parsing_engine.LLM_HEDGING = make_hedger(), True
+    try:
+        result = parsing_engine.parse_prompt_with_ai('swim tomorrow morning', [{'role': 'user', 'content': 'earlier turn'}],
+                                                     datetime(2025, 8, 6, 11, 10))
+        assert fake.finished.wait(2)
+        time.sleep(0.1)
+    finally:
+        parsing_engine._openai_client, parsing_engine.llm_breaker, parsing_engine.llm_hedger, parsing_engine.LLM_HEDGING = saved
+    assert result['source'] == 'ai' and fake.calls == 2
+    count, _, latencies = breaker.window.snapshot()
+    assert count == 1 and max(latencies) < 0.5, latencies
+    print("✅ Cancelled hedge loser kept out of the breaker's samples")
+
+if __name__ == "__main__":
+    test_hedge_wins_and_cancels_primary()
+    test_hedge_rate_cap_and_errors()
+    test_cancelled_loser_not_recorded()
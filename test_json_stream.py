@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Test script for incremental JSON field extraction
+"""
+
+import json
+
+from json_stream import JsonFieldStream
+
+ARGUMENTS = json.dumps({
+    'title': 'Say "hi", then {leave}',
+    'date_time': '2025-08-07T16:00:00',
+    'followup_questions': ["What's the duration?", 'Where, exactly?'],
+    'needs_followup': True,
+})
+
+def test_fields_complete_as_they_close():
+    """Each field comes back on the chunk that closes it, one character at a time."""
+    stream = JsonFieldStream()
+    order = []
+    for char in ARGUMENTS:
+        order.extend(stream.feed(char))
+    assert order == ['title', 'date_time', 'followup_questions', 'needs_followup']
+    assert stream.fields == json.loads(ARGUMENTS)
+    assert stream.buffer == ARGUMENTS
+    print("✅ Fields decoded in order despite quotes, commas and braces inside values")
+
+def test_partial_field_waits():
+    """A field cut mid-value isn't reported until it closes."""
+    stream = JsonFieldStream()
+    assert stream.feed('{"title": "stand') == {}
+    assert stream.feed('up", "date_') == {'title': 'standup'}
+    assert stream.feed('time": "2025-08-07T09:00:00"}') == {'date_time': '2025-08-07T09:00:00'}
+    print("✅ Partial fields held back until complete")
+
+if __name__ == "__main__":
+    test_fields_complete_as_they_close()
+    test_partial_field_waits()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Test script for streaming parse progress over the MCP stdio protocol
+"""
+
+import io
+import json
+from contextlib import redirect_stdout
+
+from mcp_client import MCPClient
+from mcp_server import MCPServer
+
+FIELDS = [{'title': 'sync'}, {'title': 'sync', 'date_time': '2025-08-07T10:00:00'}]
+
+class FakeServerProcess:
+    """Replays canned stdout lines and records what the client writes."""
+
+    def __init__(self, lines):
+        self.stdin = io.StringIO()
+        self.stdout = io.StringIO(''.join(line + '\n' for line in lines))
+
+    def poll(self):
+        return None
+
+def test_server_emits_progress_before_result():
+    """A tools/call with a progress token streams notifications ahead of the reply."""
+    def handle_add_calendar_event(params, on_progress=None):
+        for fields in FIELDS:
+            on_progress(fields, 'date_time' in fields)
+        return {'success': True}
+
+    server = MCPServer()
+    server.handle_add_calendar_event = handle_add_calendar_event
+    out = io.StringIO()
+    with redirect_stdout(out):
+        response = server.process_request({'jsonrpc': '2.0', 'id': 7, 'method': 'tools/call', 'params': {
+            'name': 'add_calendar_event', 'arguments': {}, '_meta': {'progressToken': 7}}})
+    notes = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert [note['method'] for note in notes] == ['notifications/progress'] * 2
+    assert [note['params']['progress'] for note in notes] == [1, 2]
+    assert notes[-1]['params']['ready'] and 'id' not in notes[-1]
+    assert response['id'] == 7
+    print("✅ Server sent progress notifications before the result")
+
+def test_client_skips_notifications():
+    """The client hands notifications to on_progress and returns the real reply."""
+    client = MCPClient()
+    result = {'content': [{'type': 'text', 'text': json.dumps({'success': True})}]}
+    client.server_process = FakeServerProcess([
+        json.dumps({'jsonrpc': '2.0', 'method': 'notifications/progress', 'params': {'progressToken': 1, 'progress': 1, 'fields': FIELDS[0]}}),
+        json.dumps({'jsonrpc': '2.0', 'method': 'notifications/progress', 'params': {'progressToken': 1, 'progress': 2, 'fields': FIELDS[1]}}),
+        json.dumps({'jsonrpc': '2.0', 'id': 1, 'result': result}),
+    ])
+    progress = []
+    reply = client.add_calendar_event('sync tomorrow 10am', 'someone', on_progress=progress.append)
+    assert reply == {'success': True}
+    assert [p['fields'] for p in progress] == FIELDS
+    sent = json.loads(client.server_process.stdin.getvalue())
+    assert sent['params']['_meta'] == {'progressToken': 1}
+    print("✅ Client forwarded progress and kept the reply")
+
+if __name__ == "__main__":
+    test_server_emits_progress_before_result()
+    test_client_skips_notifications()
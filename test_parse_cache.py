@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Test script for the parse-result cache
+"""
+
+import os
+import tempfile
+from datetime import datetime
+
+from parse_cache import ParseCache, normalize_prompt
+
+MORNING = datetime(2025, 8, 4, 9, 0)
+RESULT = {
+    'success': True,
+    'title': 'standup',
+    'date_time': datetime(2025, 8, 5, 9, 0),
+    'duration_minutes': 15,
+    'location': None,
+    'description': '',
+    'needs_followup': True,
+    'followup_questions': ['Where is the meeting?'],
+    'recurrence': None,
+    'source': 'ai',
+}
+
+def test_normalized_prompts_share_an_entry():
+    """Case, spacing and punctuation differences hit the same entry."""
+    cache = ParseCache()
+    cache.put('Standup tomorrow 9am, 15 min', MORNING, RESULT)
+    assert normalize_prompt('  Standup  tomorrow 9am, 15 min!') == 'standup tomorrow 9am 15 min'
+    hit = cache.get('standup TOMORROW 9am 15 min.', MORNING.replace(hour=11))
+    assert hit == RESULT and hit is not RESULT
+    assert cache.get_stats()['hits'] == 1
+    print("✅ Normalized prompt hit the cache")
+
+def test_anchor_changes_at_midnight_and_minute():
+    """"tomorrow" misses on the next day; "in 2 hours" misses a minute later."""
+    cache = ParseCache()
+    cache.put('standup tomorrow 9am', MORNING, RESULT)
+    assert cache.get('standup tomorrow 9am', datetime(2025, 8, 5, 0, 1)) is None
+
+    cache.put('call in 2 hours', MORNING, RESULT)
+    assert cache.get('call in 2 hours', MORNING.replace(second=30)) is not None
+    assert cache.get('call in 2 hours', MORNING.replace(minute=1)) is None
+    stats = cache.get_stats()
+    assert stats['misses'] == 2 and stats['hits'] == 1
+    print(f"✅ Anchors kept relative prompts fresh (hit rate {stats['hit_rate']:.2f})")
+
+def test_ttl_and_lru_eviction():
+    """Entries expire after the TTL and the least recently used one is evicted first."""
+    now = [1000.0]
+    cache = ParseCache(max_entries=2, ttl=60, clock=lambda: now[0])
+    cache.put('a tomorrow', MORNING, RESULT)
+    cache.put('b tomorrow', MORNING, RESULT)
+    cache.get('a tomorrow', MORNING)
+    cache.put('c tomorrow', MORNING, RESULT)
+    assert cache.get('b tomorrow', MORNING) is None
+    assert cache.get('a tomorrow', MORNING) is not None
+
+    now[0] += 61
+    assert cache.get('a tomorrow', MORNING) is None
+    assert cache.get_stats()['expired'] == 1
+    print("✅ TTL and LRU eviction honoured")
+
+def test_sqlite_tier_survives_restart():
+    """A new process finds results written by an earlier one."""
+    path = os.path.join(tempfile.mkdtemp(), 'parse_cache.db')
+    ParseCache(db_path=path).put('standup tomorrow 9am', MORNING, RESULT)
+    fresh = ParseCache(db_path=path)
+    assert fresh.get('standup tomorrow 9am', MORNING) == RESULT
+    assert fresh.get_stats()['sqlite_hits'] == 1
+    assert fresh.get('standup tomorrow 9am', MORNING) == RESULT
+    assert fresh.get_stats()['hits'] == 1
+    print("✅ SQLite tier served a cold cache")
+
+def test_namespace_separates_prompt_versions():
+    """A prompt-version or model bump doesn't serve parses persisted by the old one."""
+    path = os.path.join(tempfile.mkdtemp(), 'parse_cache.db')
+    ParseCache(db_path=path, namespace='v3:gpt-3.5-turbo').put('standup tomorrow 9am', MORNING, RESULT)
+    assert ParseCache(db_path=path, namespace='v4:gpt-3.5-turbo').get('standup tomorrow 9am', MORNING) is None
+    assert ParseCache(db_path=path, namespace='v3:gpt-4o-mini').get('standup tomorrow 9am', MORNING) is None
+    assert ParseCache(db_path=path, namespace='v3:gpt-3.5-turbo').get('standup tomorrow 9am', MORNING) == RESULT
+    print("✅ Prompt version and model namespace the cache")
+
+if __name__ == "__main__":
+    test_normalized_prompts_share_an_entry()
+    test_anchor_changes_at_midnight_and_minute()
+    test_ttl_and_lru_eviction()
+    test_sqlite_tier_survives_restart()
+    test_namespace_separates_prompt_versions()
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Test script for the AI parser's record_event tool call decoding
+"""
+
+import json
+from datetime import datetime
+from types import SimpleNamespace
+from zoneinfo import ZoneInfo
+
+import parsing_engine
+from parsing_engine import ParseResult, SYSTEM_PROMPT, parse_prompt, parse_prompt_with_ai, parse_prompts_with_ai
+
+NOW = datetime(2025, 8, 6, 11, 10)
+
+class FakeOpenAI:
+    """Streams a record_event call carrying the given arguments, a few characters per chunk."""
+
+    def __init__(self, arguments):
+        self.arguments = arguments
+        self.requests = []
+        self.chat = SimpleNamespace(completions=self)
+
+    def create(self, **kwargs):
+        self.requests.append(kwargs)
+        assert kwargs['stream']
+        for i in range(0, len(self.arguments), 7):
+            call = SimpleNamespace(function=SimpleNamespace(name='record_event', arguments=self.arguments[i:i + 7]))
+            delta = SimpleNamespace(content=None, tool_calls=[call])
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=delta)])
+
+def parse_with(arguments, prompt, current_time=NOW, on_progress=None):
+    fake = FakeOpenAI(arguments)
+    previous = parsing_engine._openai_client
+    parsing_engine._openai_client = fake
+    try:
+        return parse_prompt_with_ai(prompt, [{'role': 'user', 'content': 'earlier turn'}], current_time, on_progress), fake
+    finally:
+        parsing_engine._openai_client = previous
+
+def test_tool_call_decodes_into_result():
+    """Arguments of the forced record_event call become a validated parse result."""
+    arguments = json.dumps({
+        'title': 'gym', 'date_time': '2025-08-07T07:00:00', 'duration_minutes': 60,
+        'location': 'Fitness First', 'description': 'Workout', 'needs_followup': False,
+    })
+    progress = []
+    result, fake = parse_with(arguments, 'gym tomorrow morning for an hour at Fitness First',
+                              on_progress=lambda fields, ready: progress.append((dict(fields), ready)))
+    assert result['source'] == 'ai'
+    assert result['date_time'] == datetime(2025, 8, 7, 7, 0)
+    assert result['duration_minutes'] == 60 and not result['needs_followup']
+    request = fake.requests[0]
+    assert request['tools'][0]['function']['name'] == 'record_event'
+    assert request['tool_choice']['function']['name'] == 'record_event'
+    # Title and start are reported ready before the rest of the call has streamed
+    first_ready = next(fields for fields, ready in progress if ready)
+    assert first_ready == {'title': 'gym', 'date_time': '2025-08-07T07:00:00'}
+    assert len(progress) == 6
+    print("✅ record_event call streamed and decoded")
+
+def test_invalid_arguments_fall_back():
+    """Arguments that fail validation fall back to the local parser instead of raising."""
+    result, _ = parse_with('{"title": "gym", "date_time": "tomorrow morning"}', 'gym tomorrow morning')
+    assert result.get('source') != 'ai'
+    print("✅ Invalid arguments fell back to the local parser")
+
+def test_validation_rules():
+    """Durations must be sane and missing details always trigger follow-ups."""
+    result = ParseResult.from_arguments({'title': ' sync ', 'date_time': '2025-08-07T10:00:00', 'needs_followup': False}, 'sync')
+    assert result.title == 'sync'
+    assert result.needs_followup
+    assert result.followup_questions == ["What's the duration?", 'Where is this event?']
+    for bad in ({'title': 'x', 'date_time': '2025-08-07T10:00:00', 'duration_minutes': -5},
+                {'title': 'x', 'date_time': '2025-08-07T10:00:00', 'duration_minutes': True},
+                {'title': '', 'date_time': '2025-08-07T10:00:00'},
+                {'title': 'x', 'date_time': None}):
+        try:
+            ParseResult.from_arguments(bad, 'x')
+        except ValueError:
+            continue
+        raise AssertionError(f"accepted {bad}")
+    print("✅ Tool arguments validated")
+
+def test_static_prompt_prefix():
+    """The system prefix is identical on every request; only the last messages vary."""
+    _, first = parse_with('{}', 'gym tomorrow morning')
+    _, later = parse_with('{}', 'gym tomorrow morning', NOW.replace(hour=17, minute=42))
+    before, after = first.requests[0]['messages'], later.requests[0]['messages']
+    assert before[0] == after[0] == {'role': 'system', 'content': SYSTEM_PROMPT}
+    assert '11:10' in before[-2]['content'] and '17:42' in after[-2]['content']
+    print("✅ System prompt prefix is static")
+
+class FakeBatchOpenAI(FakeOpenAI):
+    """Answers a batch request with one record_events call."""
+
+    def create(self, **kwargs):
+        self.requests.append(kwargs)
+        call = SimpleNamespace(function=SimpleNamespace(name='record_events', arguments=self.arguments))
+        message = SimpleNamespace(content=None, tool_calls=[call])
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+def test_batch_parse_with_per_item_errors():
+    """Model-bound prompts share one request; a bad item falls back without sinking the rest."""
+    fake = FakeBatchOpenAI(json.dumps({'events': [
+        {'index': 0, 'title': 'swim', 'date_time': '2025-08-07T07:00:00', 'needs_followup': True},
+        {'index': 1, 'title': 'party', 'date_time': 'saturday evening', 'needs_followup': True},
+    ]}))
+    prompts = ['swim tomorrow morning', 'Team meeting tomorrow at 3pm', 'party on saturday evening', 'brunch next sunday at 11am', ' ']
+    parsing_engine._openai_client, previous = fake, parsing_engine._openai_client
+    try:
+        results = parse_prompts_with_ai(prompts, NOW, batch_size=3)
+    finally:
+        parsing_engine._openai_client = previous
+    assert len(fake.requests) == 1
+    assert fake.requests[0]['tool_choice']['function']['name'] == 'record_events'
+    assert '2: "brunch next sunday at 11am"' in fake.requests[0]['messages'][-1]['content']
+    assert results[0]['source'] == 'ai' and results[0]['date_time'] == datetime(2025, 8, 7, 7, 0)
+    assert results[1]['source'] == 'fast'
+    assert results[2].get('source') != 'ai' and results[3].get('source') != 'ai'
+    assert results[4] == {'success': False, 'error': 'Empty prompt'}
+    print("✅ Batch parsed in one request with per-item fallbacks")
+
+def test_batch_size_below_one_parses_singly():
+    """PARSE_BATCH_SIZE <= 0 sends one prompt per request instead of leaving results empty."""
+    fake = FakeOpenAI(json.dumps({'title': 'swim', 'date_time': '2025-08-07T07:00:00', 'needs_followup': True}))
+    parsing_engine._openai_client, previous = fake, parsing_engine._openai_client
+    try:
+        results = parse_prompts_with_ai(['dentist checkup tomorrow morning', 'bike service friday evening'], NOW, batch_size=0)
+    finally:
+        parsing_engine._openai_client = previous
+    assert len(fake.requests) == 2
+    assert all(result and result['success'] for result in results), results
+    print("✅ Batch size 0 parsed each prompt on its own")
+
+def test_fallback_parser():
+    """The dateparser fallback reads dates with its shared parser and memoizes repeats."""
+    parsing_engine._fallback_title.cache_clear()
+    result = parse_prompt('March 14 at 4:30pm')
+    assert result['source'] == 'fallback' and (result['date_time'].month, result['date_time'].hour) == (3, 16)
+    assert result['title'] == 'March 14 4:30pm'
+    parse_prompt('March 14 at 4:30pm')
+    assert parsing_engine._fallback_title.cache_info().hits == 1
+    assert not parse_prompt('no date here')['success']
+
+    # Relative dates resolve from the caller's time in the user's zone, not the server clock
+    tokyo = datetime(2025, 8, 6, 23, 30, tzinfo=ZoneInfo('Asia/Tokyo'))
+    assert parse_prompt('tomorrow at 9am', tokyo)['date_time'] == datetime(2025, 8, 7, 9, 0)
+    parsing_engine._parse_date_fragment.cache_clear()
+    parse_prompt('tomorrow at 9am', tokyo)
+    parse_prompt('tomorrow at 9am', tokyo.replace(tzinfo=ZoneInfo('Europe/Berlin')))
+    assert parsing_engine._parse_date_fragment.cache_info().misses == 2
+    print("✅ Fallback parser resolved and memoized a date")
+
+if __name__ == "__main__":
+    test_tool_call_decodes_into_result()
+    test_invalid_arguments_fall_back()
+    test_validation_rules()
+    test_static_prompt_prefix()
+    test_batch_parse_with_per_item_errors()
+    test_batch_size_below_one_parses_singly()
+    test_fallback_parser()
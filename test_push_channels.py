@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Test script for push-notification channels against a local stand-in for Google
+"""
+
+import itertools
+
+import app as flask_app
+from push_channels import AgendaCache, ChannelManager
+
+class FakeRequest:
+    """Minimal stand-in for a googleapiclient HttpRequest."""
+    http = None
+
+    def __init__(self, result):
+        self.result = result
+
+    def execute(self, http=None):
+        return self.result
+
+class FakeCalendar:
+    """Records watch/stop calls the way the Calendar API would receive them."""
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.calendar_user_id = 'push@example.com'
+        self.watched = []
+        self.stopped = []
+
+    def events(self):
+        return self
+
+    def channels(self):
+        return self
+
+    def watch(self, calendarId, body):
+        self.watched.append((calendarId, body))
+        expiration = int((self.clock() + int(body['params']['ttl'])) * 1000)
+        return FakeRequest({'id': body['id'], 'resourceId': f'resource-{calendarId}', 'expiration': str(expiration)})
+
+    def stop(self, body):
+        self.stopped.append(body['id'])
+        return FakeRequest({})
+
+class LocalNotifier:
+    """Posts notifications to the webhook route like Google's push service does."""
+
+    def __init__(self, client):
+        self.client = client
+        self.message_numbers = itertools.count(1)
+
+    def post(self, channel, state='exists', token=None):
+        return self.client.post('/calendar/notifications', headers={
+            'X-Goog-Channel-ID': channel.channel_id,
+            'X-Goog-Channel-Token': channel.token if token is None else token,
+            'X-Goog-Resource-ID': channel.resource_id,
+            'X-Goog-Resource-State': state,
+            'X-Goog-Message-Number': str(next(self.message_numbers)),
+        })
+
+def make_manager(now):
+    clock = lambda: now[0]
+    calendar = FakeCalendar(clock)
+    cache = AgendaCache(clock=clock)
+    manager = ChannelManager('https://example.com/calendar/notifications', cache,
+                             service_factory=lambda user_id: calendar, ttl=3600, renew_margin=600, clock=clock)
+    manager.start_renewal_thread = lambda *args: None
+    return manager, cache, calendar
+
+def test_notifications_invalidate_agenda():
+    """A change notification posted to the webhook drops the cached agenda."""
+    now = [1000.0]
+    manager, cache, calendar = make_manager(now)
+    flask_app.channel_manager = manager
+    flask_app.agenda_cache = cache
+    notifier = LocalNotifier(flask_app.app.test_client())
+
+    channel = manager.register('push@example.com')
+    assert manager.is_watching('push@example.com')
+    cache.put('push@example.com', 'agenda', [{'summary': 'Standup'}])
+
+    assert notifier.post(channel, state='sync').status_code == 204
+    assert cache.get('push@example.com', 'agenda') is not None
+
+    assert notifier.post(channel, token='forged').status_code == 404
+    assert cache.get('push@example.com', 'agenda') is not None
+
+    assert notifier.post(channel, state='exists').status_code == 204
+    assert cache.get('push@example.com', 'agenda') is None
+    print("✅ Webhook notification invalidated the cached agenda")
+
+class RacingMCPClient:
+    """Lists an agenda while a change notification arrives mid-fetch."""
+
+    def __init__(self, notify):
+        self.notify = notify
+        self.calls = 0
+
+    def list_upcoming_events(self, user_id, max_results=10, all_calendars=False):
+        self.calls += 1
+        if self.calls == 1:
+            self.notify()
+        return {'success': True, 'events': [{'summary': f'Standup v{self.calls}'}]}
+
+def test_agenda_fetched_before_change_is_not_cached():
+    """A notification between reading the generation and put keeps the stale agenda out."""
+    now = [1000.0]
+    manager, cache, calendar = make_manager(now)
+    channel = manager.register('push@example.com')
+    notifier = LocalNotifier(flask_app.app.test_client())
+    client = RacingMCPClient(lambda: notifier.post(channel))
+    original = (flask_app.channel_manager, flask_app.agenda_cache, flask_app.get_mcp_client)
+    flask_app.channel_manager, flask_app.agenda_cache, flask_app.get_mcp_client = manager, cache, lambda: client
+    flask_app.agenda_calendars[('push@example.com', False)] = ['primary']
+    try:
+        with flask_app.app.test_client() as browser:
+            with browser.session_transaction() as session:
+                session['user_id'] = 'push@example.com'
+            assert browser.get('/list_events').get_json()['events'] == [{'summary': 'Standup v1'}]
+            assert cache.get('push@example.com', (False, 10)) is None
+            # Nothing changed during the second fetch, so it is cached and served
+            assert browser.get('/list_events').get_json()['events'] == [{'summary': 'Standup v2'}]
+            assert browser.get('/list_events').get_json()['events'] == [{'summary': 'Standup v2'}]
+            assert client.calls == 2
+    finally:
+        flask_app.channel_manager, flask_app.agenda_cache, flask_app.get_mcp_client = original
+        flask_app.agenda_calendars.pop(('push@example.com', False), None)
+
+    generation = cache.generation('push@example.com')
+    cache.mark_dirty('push@example.com')
+    assert not cache.put('push@example.com', 'agenda', [], generation)
+    print("✅ Agenda listed before a change was not cached")
+
+def test_channels_renew_before_expiry():
+    """Channels are replaced before they expire and the old one is stopped."""
+    now = [1000.0]
+    manager, cache, calendar = make_manager(now)
+    first = manager.register('push@example.com')
+
+    now[0] += 1000
+    assert manager.renew_due() == []
+
+    now[0] += 2100
+    assert manager.renew_due() == [('push@example.com', 'primary')]
+    assert calendar.stopped == [first.channel_id]
+    assert manager.is_watching('push@example.com')
+    assert len(calendar.watched) == 2
+    print("✅ Channel renewed before expiry")
+
+def test_stop_on_logout():
+    """Stopping a user closes every channel they had open."""
+    now = [1000.0]
+    manager, cache, calendar = make_manager(now)
+    manager.ensure_channels('push@example.com', ['primary', 'team@example.com'])
+    manager.stop('push@example.com')
+    assert len(calendar.stopped) == 2
+    assert not manager.is_watching('push@example.com')
+    print("✅ Channels stopped on logout")
+
+if __name__ == "__main__":
+    test_notifications_invalidate_agenda()
+    test_agenda_fetched_before_change_is_not_cached()
+    test_channels_renew_before_expiry()
+    test_stop_on_logout()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Test script for the Calendar quota and retry layer
+"""
+
+import json
+import time
+import httplib2
+from googleapiclient.errors import HttpError
+
+import rate_limiter
+from rate_limiter import TokenBucket, execute_with_retry, get_quota_stats, is_retryable, retry_after_seconds
+
+def make_error(status, reason=None, retry_after=None):
+    """Build an HttpError like the Google client raises."""
+    headers = {'status': status}
+    if retry_after is not None:
+        headers['retry-after'] = retry_after
+    content = json.dumps({'error': {'errors': [{'reason': reason}] if reason else []}}).encode('utf-8')
+    return HttpError(httplib2.Response(headers), content)
+
+def test_token_bucket_burst_then_wait():
+    """A bucket serves its burst immediately and then spaces out calls."""
+    bucket = TokenBucket(rate=10, capacity=2)
+    assert bucket.reserve() == 0.0
+    assert bucket.reserve() == 0.0
+    wait = bucket.reserve()
+    assert 0.05 < wait <= 0.1
+    print(f"✅ Third call waits {wait:.3f}s")
+
+def test_retryable_classification():
+    """Quota 403s, 429s and 5xx are retried; other errors are not."""
+    assert is_retryable(make_error(429))
+    assert is_retryable(make_error(503))
+    assert is_retryable(make_error(403, 'rateLimitExceeded'))
+    assert is_retryable(make_error(403, 'userRateLimitExceeded'))
+    assert not is_retryable(make_error(403, 'forbidden'))
+    assert not is_retryable(make_error(404))
+    assert retry_after_seconds(make_error(429, retry_after='3')) == 3.0
+    print("✅ Error classification is correct")
+
+def test_retries_until_success():
+    """Transient failures are retried and counted."""
+    failures = [make_error(429, retry_after='0'), make_error(500)]
+
+    def call():
+        if failures:
+            raise failures.pop(0)
+        return {'ok': True}
+
+    before = get_quota_stats()
+    base_delay, rate_limiter.RETRY_BASE_DELAY = rate_limiter.RETRY_BASE_DELAY, 0.001
+    try:
+        assert execute_with_retry(call, user_id='retry@example.com') == {'ok': True}
+    finally:
+        rate_limiter.RETRY_BASE_DELAY = base_delay
+    after = get_quota_stats()
+    assert after['retries'] - before['retries'] == 2
+    assert after['rate_limited'] - before['rate_limited'] == 1
+    assert after['server_errors'] - before['server_errors'] == 1
+    print("✅ Retried 429 and 500 before succeeding")
+
+def test_non_retryable_raises():
+    """Permanent errors surface immediately."""
+    calls = []
+
+    def call():
+        calls.append(1)
+        raise make_error(400)
+
+    try:
+        execute_with_retry(call, user_id='fail@example.com')
+        assert False, "expected HttpError"
+    except HttpError:
+        pass
+    assert len(calls) == 1
+    print("✅ Non-retryable error raised without retry")
+
+def test_retries_stop_at_deadline():
+    """A Retry-After past the deadline is raised instead of slept on."""
+    calls = []
+
+    def call():
+        calls.append(1)
+        raise make_error(429, retry_after='60')
+
+    before = get_quota_stats()
+    deadline, rate_limiter.RETRY_DEADLINE = rate_limiter.RETRY_DEADLINE, 1
+    started = time.monotonic()
+    try:
+        execute_with_retry(call, user_id='deadline@example.com')
+        assert False, "expected HttpError"
+    except HttpError:
+        pass
+    finally:
+        rate_limiter.RETRY_DEADLINE = deadline
+    assert time.monotonic() - started < 1
+    assert len(calls) == 1
+    assert get_quota_stats()['deadline_exceeded'] - before['deadline_exceeded'] == 1
+    print("✅ Retry past the deadline raised without sleeping")
+
+def test_server_reports_quota_stats():
+    """The MCP server's stats method carries the quota counters."""
+    from mcp_server import MCPServer
+
+    response = MCPServer().process_request({'jsonrpc': '2.0', 'id': 3, 'method': 'stats', 'params': {}})
+    json.dumps(response)
+    assert response['result']['quota'].keys() == get_quota_stats().keys()
+    assert 'offloaded' in response['result']['parsing']
+    print("✅ Quota stats reported by the server")
+
+if __name__ == "__main__":
+    test_token_bucket_burst_then_wait()
+    test_retryable_classification()
+    test_retries_until_success()
+    test_non_retryable_raises()
+    test_retries_stop_at_deadline()
+    test_server_reports_quota_stats()
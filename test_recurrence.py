@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Test script for recurrence rules and local recurring-event expansion
+"""
+
+from datetime import datetime, timezone
+
+from recurrence import expand_events, extract_recurrence, normalize_rrule, first_occurrence, resolve_recurrence
+
+UTC = timezone.utc
+WINDOW_START = datetime(2025, 3, 3, tzinfo=UTC)   # Monday
+WINDOW_END = datetime(2025, 3, 17, tzinfo=UTC)
+
+STANDUP = {
+    'id': 'standup',
+    'etag': '"1"',
+    'summary': 'Standup',
+    'start': {'dateTime': '2025-02-03T09:30:00-08:00', 'timeZone': 'America/Los_Angeles'},
+    'end': {'dateTime': '2025-02-03T09:45:00-08:00', 'timeZone': 'America/Los_Angeles'},
+    'recurrence': ['RRULE:FREQ=WEEKLY;BYDAY=MO,TU,WE,TH,FR', 'EXDATE;TZID=America/Los_Angeles:20250304T093000'],
+}
+
+def starts(events, event_id_prefix='standup'):
+    return [e['start']['dateTime'] for e in events if e['id'].startswith(event_id_prefix)]
+
+def test_weekday_series_expands_in_wall_clock_time():
+    """A weekday standup repeats at 9:30 local time across the DST change, minus its EXDATE."""
+    events = expand_events([STANDUP], WINDOW_START, WINDOW_END)
+    standups = starts(events)
+    assert len(standups) == 9  # two working weeks minus the excluded Tuesday
+    assert '2025-03-04T09:30:00-08:00' not in standups
+    assert standups[0] == '2025-03-03T09:30:00-08:00'
+    assert '2025-03-10T09:30:00-07:00' in standups  # after the DST switch on March 9
+    assert events[0]['id'] == 'standup_20250303T173000Z'
+    assert 'recurrence' not in events[0]
+    print(f"✅ Expanded {len(standups)} standups")
+
+def test_exceptions_are_applied():
+    """Cancelled instances disappear and moved instances replace the original slot."""
+    cancelled = {
+        'id': 'standup_20250305T173000Z', 'recurringEventId': 'standup', 'status': 'cancelled',
+        'originalStartTime': {'dateTime': '2025-03-05T09:30:00-08:00', 'timeZone': 'America/Los_Angeles'},
+    }
+    moved = {
+        'id': 'standup_20250306T173000Z', 'recurringEventId': 'standup', 'status': 'confirmed', 'summary': 'Standup (late)',
+        'originalStartTime': {'dateTime': '2025-03-06T17:30:00Z'},
+        'start': {'dateTime': '2025-03-06T11:00:00-08:00'},
+        'end': {'dateTime': '2025-03-06T11:15:00-08:00'},
+    }
+    lunch = {
+        'id': 'lunch', 'summary': 'Lunch',
+        'start': {'dateTime': '2025-03-05T12:00:00-08:00'},
+        'end': {'dateTime': '2025-03-05T13:00:00-08:00'},
+    }
+    events = expand_events([STANDUP, cancelled, moved, lunch], WINDOW_START, WINDOW_END)
+    standups = starts(events)
+    assert len(standups) == 8
+    assert '2025-03-05T09:30:00-08:00' not in standups
+    assert '2025-03-06T09:30:00-08:00' not in standups
+    assert '2025-03-06T11:00:00-08:00' in standups
+    assert [e['summary'] for e in events].count('Lunch') == 1
+    assert events == sorted(events, key=lambda e: datetime.fromisoformat(e['start']['dateTime']))
+    print("✅ Cancelled and moved instances applied")
+
+def test_all_day_series_and_until():
+    """All-day series stay dates and stop at UNTIL."""
+    review = {
+        'id': 'review',
+        'summary': 'Sprint review',
+        'start': {'date': '2025-02-24'},
+        'end': {'date': '2025-02-25'},
+        'recurrence': ['RRULE:FREQ=WEEKLY;UNTIL=20250310'],
+    }
+    events = expand_events([review], WINDOW_START, WINDOW_END)
+    assert [e['start'] for e in events] == [{'date': '2025-03-03'}, {'date': '2025-03-10'}]
+    assert events[1]['id'] == 'review_20250310'
+    print("✅ All-day series expanded until UNTIL")
+
+def test_date_only_until_and_unexpandable_series():
+    """A timed series' date-only UNTIL ends with that day in the event's zone; broken rules fall back."""
+    gym = dict(STANDUP, id='gym', recurrence=['RRULE:FREQ=DAILY;UNTIL=20250305'])
+    broken = dict(STANDUP, id='broken', recurrence=['RRULE:FREQ=DAILY;BYDAY=XX'])
+    api_instance = {
+        'id': 'broken_20250310T163000Z', 'recurringEventId': 'broken',
+        'start': {'dateTime': '2025-03-10T09:30:00-07:00'}, 'end': {'dateTime': '2025-03-10T09:45:00-07:00'},
+    }
+    # Read as midnight UTC, UNTIL would drop the 5th (17:30 UTC)
+    assert starts(expand_events([gym], WINDOW_START, WINDOW_END), 'gym') == [
+        '2025-03-03T09:30:00-08:00', '2025-03-04T09:30:00-08:00', '2025-03-05T09:30:00-08:00']
+
+    events = expand_events([gym, broken], WINDOW_START, WINDOW_END, list_instances=lambda master: [api_instance])
+    assert [e['id'] for e in events][-1] == 'broken_20250310T163000Z' and len(events) == 4
+    assert [e['id'] for e in expand_events([broken, gym], WINDOW_START, WINDOW_END)] == [
+        'gym_20250303T173000Z', 'gym_20250304T173000Z', 'gym_20250305T173000Z']
+    print("✅ Date-only UNTIL read in the event's zone; unexpandable series fell back")
+
+def test_local_grammar_extracts_rules():
+    """Common repeat phrases become RRULEs and are removed from the prompt."""
+    cases = {
+        'standup every weekday at 9:30 for 15 minutes': ('RRULE:FREQ=WEEKLY;BYDAY=MO,TU,WE,TH,FR', 'standup at 9:30 for 15 minutes'),
+        'yoga every Tuesday and Thursday at 7am': ('RRULE:FREQ=WEEKLY;BYDAY=TU,TH', 'yoga at 7am'),
+        '1:1 with Sam every other week at 2pm 6 times': ('RRULE:FREQ=WEEKLY;INTERVAL=2;COUNT=6', '1:1 with Sam at 2pm'),
+        'monthly rent payment on the 1st': ('RRULE:FREQ=MONTHLY', 'rent payment on the 1st'),
+        'lunch with Ana tomorrow at noon': (None, 'lunch with Ana tomorrow at noon'),
+        # Cadence words inside a title are not repeat phrases
+        'Discuss the monthly budget tomorrow at 2pm': (None, 'Discuss the monthly budget tomorrow at 2pm'),
+        'review the weekly report Friday 3pm': (None, 'review the weekly report Friday 3pm'),
+        'plan the weekdays rota at 4pm': (None, 'plan the weekdays rota at 4pm'),
+    }
+    for prompt, expected in cases.items():
+        assert extract_recurrence(prompt) == expected, prompt
+    assert extract_recurrence('weekly report review Friday 3pm', explicit_only=True)[0] is None
+    print(f"✅ Local grammar handled {len(cases)} prompts")
+
+def test_model_decides_whether_event_repeats():
+    """The grammar completes or repairs the model's rule but never overrules a null."""
+    assert resolve_recurrence('Discuss the monthly budget tomorrow at 2pm', None) is None
+    assert resolve_recurrence('daily standup at 9am', None) is None
+    assert resolve_recurrence('yoga every Tuesday and Thursday at 7am 6 times', 'FREQ=WEEKLY') == 'RRULE:FREQ=WEEKLY;BYDAY=TU,TH;COUNT=6'
+    assert resolve_recurrence('standup every weekday', 'FREQ=SOMETIMES') == 'RRULE:FREQ=WEEKLY;BYDAY=MO,TU,WE,TH,FR'
+    assert resolve_recurrence('weekly sync every Monday', 'FREQ=DAILY') == 'RRULE:FREQ=DAILY'
+    print("✅ Model's recurrence checked and completed by the grammar")
+
+def test_rules_are_validated():
+    """Model-suggested rules are normalized, and nonsense is rejected."""
+    assert normalize_rrule('freq=weekly;byday=mo,we') == 'RRULE:FREQ=WEEKLY;BYDAY=MO,WE'
+    for bad in ('FREQ=MINUTELY', 'FREQ=WEEKLY;BYDAY=XX', 'FREQ=DAILY;COUNT=3;UNTIL=20250101T000000Z', ''):
+        try:
+            normalize_rrule(bad)
+        except ValueError:
+            continue
+        raise AssertionError(f"accepted {bad!r}")
+    # "every Monday" asked on a Friday starts next Monday
+    assert first_occurrence('RRULE:FREQ=WEEKLY;BYDAY=MO', datetime(2025, 8, 8, 9, 30)) == datetime(2025, 8, 11, 9, 30)
+    print("✅ Recurrence rules validated")
+
+if __name__ == "__main__":
+    test_weekday_series_expands_in_wall_clock_time()
+    test_exceptions_are_applied()
+    test_all_day_series_and_until()
+    test_date_only_until_and_unexpandable_series()
+    test_local_grammar_extracts_rules()
+    test_model_decides_whether_event_repeats()
+    test_rules_are_validated()
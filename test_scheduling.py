@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Test script for the free-slot scheduling engine
+"""
+
+from datetime import datetime, timedelta, timezone
+
+from scheduling import merge_intervals, free_gaps, find_free_slots, parse_clock
+
+UTC = timezone.utc
+MONDAY = datetime(2025, 8, 4, tzinfo=UTC)
+
+def at(day_offset, hour, minute=0):
+    """Datetime on the test week (day 0 is a Monday)."""
+    return MONDAY + timedelta(days=day_offset, hours=hour, minutes=minute)
+
+def test_merge_intervals():
+    """Overlapping and touching intervals collapse, disjoint ones stay."""
+    merged = merge_intervals([
+        (at(0, 13), at(0, 14)),
+        (at(0, 9), at(0, 10)),
+        (at(0, 9, 30), at(0, 11)),
+        (at(0, 11), at(0, 11, 30)),
+    ])
+    assert merged == [(at(0, 9), at(0, 11, 30)), (at(0, 13), at(0, 14))]
+    print(f"✅ Merged into {len(merged)} intervals")
+
+def test_free_gaps_respect_working_hours():
+    """Gaps are clipped to working hours and skip weekends."""
+    busy = merge_intervals([(at(0, 8), at(0, 10)), (at(0, 12), at(0, 13))])
+    gaps = free_gaps(busy, at(0, 0), at(7, 0), parse_clock('09:00'), parse_clock('17:00'))
+    assert gaps[0] == (at(0, 10), at(0, 12))
+    assert gaps[1] == (at(0, 13), at(0, 17))
+    assert all(gap[0].weekday() < 5 for gap in gaps)
+    assert len(gaps) == 6  # Monday has two gaps, Tuesday to Friday one each
+    print(f"✅ Found {len(gaps)} working-hour gaps")
+
+def test_find_free_slots_across_many_calendars():
+    """A busy day for 15 attendees leaves only the common free time."""
+    busy = []
+    for person in range(15):
+        busy.append((at(0, 9), at(0, 9 + person % 3 + 1)))
+        busy.append((at(0, 14), at(0, 15)))
+    slots = find_free_slots(busy, at(0, 0), at(1, 0), 30, '09:00', '17:00', max_results=5)
+    assert slots
+    for slot in slots:
+        assert slot['end'] - slot['start'] == timedelta(minutes=30)
+        assert not any(start < slot['end'] and slot['start'] < end for start, end in busy)
+    assert slots[0]['start'] >= at(0, 12)
+    print(f"✅ First candidate: {slots[0]['start'].isoformat()}")
+
+def test_buffered_slots_rank_first():
+    """A slot with breathing room beats one squeezed against a meeting."""
+    busy = [(at(0, 9), at(0, 10))]
+    slots = find_free_slots(busy, at(0, 9), at(0, 12), 30, '09:00', '12:00')
+    assert slots[0]['buffered']
+    assert slots[0]['start'] == at(0, 10, 30)
+    print("✅ Buffered slot ranked first")
+
+if __name__ == "__main__":
+    test_merge_intervals()
+    test_free_gaps_respect_working_hours()
+    test_find_free_slots_across_many_calendars()
+    test_buffered_slots_rank_first()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Test script for the near-duplicate (MinHash/LSH) parse cache
+"""
+
+from datetime import datetime, timedelta
+
+from similarity_cache import SimilarityCache, expand_shorthand
+
+NOW = datetime(2025, 8, 6, 11, 10)
+RESULT = {
+    'success': True,
+    'title': 'Sync with Ana',
+    'date_time': datetime(2025, 8, 7, 15, 0),
+    'duration_minutes': 30,
+    'location': None,
+    'description': 'Catch-up with Ana',
+    'needs_followup': True,
+    'followup_questions': ['Where is this event?'],
+    'recurrence': None,
+    'source': 'ai',
+}
+
+def test_reworded_prompt_reuses_result():
+    """Shorthand rewording hits, and the date/time comes from the new prompt."""
+    cache = SimilarityCache()
+    cache.put('Sync with Ana tomorrow at 3pm for 30 minutes', NOW, RESULT)
+    assert expand_shorthand('sync w/ Ana tmrw 3pm 30m') == 'sync with Ana tmrw 3pm 30 min'
+
+    hit = cache.get('sync w/ Ana tmrw 3pm 30m', NOW)
+    assert hit['source'] == 'similar'
+    assert (hit['title'], hit['description'], hit['duration_minutes']) == ('Sync with Ana', 'Catch-up with Ana', 30)
+    assert hit['date_time'] == datetime(2025, 8, 7, 15, 0)
+
+    next_week = cache.get('sync with Ana friday 4pm', NOW + timedelta(days=7))
+    assert next_week['date_time'] == datetime(2025, 8, 15, 16, 0)
+    # The old prompt's duration was read by the grammar, so it isn't carried over
+    assert next_week['duration_minutes'] is None and next_week['needs_followup']
+    print("✅ Reworded prompt reused the AI result with a re-resolved time")
+
+def test_different_events_miss():
+    """Other names, other events and prompts without a clear time don't reuse the result."""
+    cache = SimilarityCache()
+    cache.put('Sync with Ana tomorrow at 3pm for 30 minutes', NOW, RESULT)
+    cache.put('Quarterly planning review with Ana friday 10am', NOW, dict(RESULT, title='Quarterly planning review with Ana'))
+    # Close enough wording, but the name the title came from isn't in the new prompt
+    assert cache.get('Quarterly planning review with Ann friday 10am', NOW) is None
+    # ...or the new prompt adds a word the cached one didn't have
+    cache.put('Project kickoff meeting tomorrow at 3pm', NOW, dict(RESULT, title='Project kickoff meeting'))
+    assert cache.get('Project kickoff meeting prep tomorrow at 3pm', NOW) is None
+    assert cache.get('dentist tomorrow 3pm', NOW) is None
+    assert cache.get('sync with Ana tomorrow afternoon', NOW) is None
+    stats = cache.get_stats()
+    assert (stats['hits'], stats['rejected'], stats['misses'], stats['unresolved']) == (0, 2, 1, 1)
+    print("✅ Different events and vague times missed")
+
+def test_eviction_and_ttl():
+    """The LRU bound and TTL drop entries from the LSH index too."""
+    clock = [1000.0]
+    cache = SimilarityCache(max_entries=1, ttl=60, clock=lambda: clock[0])
+    cache.put('Sync with Ana tomorrow at 3pm for 30 minutes', NOW, RESULT)
+    cache.put('standup tomorrow 9am for 15 min', NOW, dict(RESULT, title='standup'))
+    assert cache.get('sync with Ana tomorrow 3pm', NOW) is None
+    assert cache.get('standup tomorrow at 9am', NOW)['title'] == 'standup'
+    clock[0] += 61
+    assert cache.get('standup tomorrow at 9am', NOW) is None
+    assert cache.get_stats()['size'] == 0 and not cache.buckets
+    print("✅ Evicted and expired entries left the index")
+
+if __name__ == "__main__":
+    test_reworded_prompt_reuses_result()
+    test_different_events_miss()
+    test_eviction_and_ttl()